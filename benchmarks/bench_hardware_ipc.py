@@ -0,0 +1,96 @@
+"""
+Hardware Daemon IPC Benchmark
+=============================
+
+Round-trip latency of the hardware daemon's Unix socket RPC against an
+in-memory controller (no serial port), i.e. the overhead the daemon adds
+to every RS485 command:
+- ping:    empty request/response
+- unlock:  locker command (u16 request, one byte response)
+- states:  polled lock states (four byte response)
+- status:  JSON status
+
+Usage:
+    python benchmarks/bench_hardware_ipc.py [calls]
+    (default: 5000 calls per request type)
+
+Author: CartWise Team
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from hardware.daemon import HardwareDaemon  # noqa: E402
+from hardware.ipc import OP_STATUS, HardwareClient  # noqa: E402
+from hardware.rs485 import LockStateData  # noqa: E402
+
+
+class MemoryController:
+    """Answers like a connected RS485Controller without touching a port."""
+
+    port = "memory"
+    baudrate = 19200
+    is_connected = False
+
+    def connect(self) -> bool:
+        self.is_connected = True
+        return True
+
+    def disconnect(self):
+        self.is_connected = False
+
+    def get_metrics(self) -> dict:
+        return {"enabled": False}
+
+    def unlock_cart(self, locker_id: int) -> bool:
+        return True
+
+    def get_all_locks_state(self) -> LockStateData:
+        return LockStateData(0xFF, 0xFF, 0x0F, 0x00)
+
+
+def percentile(samples: list, fraction: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = str(Path(tmp) / "hardware.sock")
+        daemon = HardwareDaemon(MemoryController(), socket_path, poll_interval=0.05)
+        daemon.start()
+        client = HardwareClient(socket_path)
+        while not client.connect():
+            time.sleep(0.05)
+        time.sleep(0.1)  # First lock state poll
+
+        requests = {
+            "ping": client.ping,
+            "unlock": lambda: client.unlock_cart(0),
+            "states": client.get_all_locks_state,
+            "status": lambda: client.call(OP_STATUS),
+        }
+
+        print(f"Hardware daemon round trips ({calls} calls each)")
+        print(f"{'request':>8} {'p50 us':>8} {'p99 us':>8} {'calls/s':>9}")
+        for name, request in requests.items():
+            request()  # warm up
+            samples = []
+            for _ in range(calls):
+                started = time.perf_counter()
+                request()
+                samples.append((time.perf_counter() - started) * 1e6)
+            print(f"{name:>8} {percentile(samples, 0.5):>8.1f} {percentile(samples, 0.99):>8.1f} "
+                  f"{1e6 / (sum(samples) / calls):>9.0f}")
+
+        client.disconnect()
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+JSON Response Encoding Benchmark
+================================
+
+Serialization throughput of a rental history response (1k and 10k
+rentals) through three paths:
+- default:   FastAPI response_model path (validate the returned model,
+             serialize to jsonable dicts) + JSONResponse (json.dumps)
+- fast:      same response_model path + FastJSONResponse (orjson when
+             installed, compact json.dumps otherwise)
+- model:     model_response() - TypeAdapter.dump_json straight to bytes
+
+Usage:
+    python benchmarks/bench_json.py [rounds]
+    (default: 20 rounds per size)
+
+Author: CartWise Team
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from api.responses import FastJSONResponse, model_response, orjson  # noqa: E402
+from models import Rental, RentalHistoryResponse, RentalStatus  # noqa: E402
+
+SIZES = (1000, 10000)
+
+
+def make_history(count: int) -> RentalHistoryResponse:
+    """Build a history response of `count` rentals."""
+    start = datetime(2025, 1, 1, 8, 0)
+    rentals = []
+    for i in range(count):
+        started = start + timedelta(minutes=7 * i)
+        returned = i % 3 != 0
+        rentals.append(Rental(
+            rental_id=i + 1,
+            cart_id=i % 16 + 1,
+            user_phone=f"05{i:08d}",
+            locker_id=i % 16 + 1,
+            start_time=started,
+            expected_return=started + timedelta(hours=2),
+            actual_return=started + timedelta(minutes=50) if returned else None,
+            status=RentalStatus.RETURNED if returned else RentalStatus.ACTIVE,
+            notes="Returned late" if i % 10 == 0 else None,
+        ))
+    return RentalHistoryResponse(rentals=rentals, total_count=count, active_count=count // 3, late_count=count // 10)
+
+
+async def response_model_body(field, history, response_class) -> bytes:
+    """Encode like a route with response_model=RentalHistoryResponse."""
+    content = await serialize_response(field=field, response_content=history)
+    return response_class(content).body
+
+
+def measure(encode, rounds: int) -> float:
+    """Average milliseconds per call."""
+    encode()  # warm up
+    started = time.perf_counter()
+    for _ in range(rounds):
+        encode()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    field = create_response_field(name="bench", type_=RentalHistoryResponse)
+    loop = asyncio.new_event_loop()
+
+    print(f"JSON encoding of GET /rentals/history (orjson: {'yes' if orjson else 'no'})")
+    print(f"{'rentals':>8} {'path':>8} {'ms/resp':>9} {'resp/s':>8} {'MB/s':>7} {'speedup':>8}")
+
+    for size in SIZES:
+        history = make_history(size)
+        paths = {
+            "default": lambda: loop.run_until_complete(response_model_body(field, history, JSONResponse)),
+            "fast": lambda: loop.run_until_complete(response_model_body(field, history, FastJSONResponse)),
+            "model": lambda: model_response(history).body,
+        }
+
+        baseline = None
+        for name, encode in paths.items():
+            size_mb = len(encode()) / 1e6
+            ms = measure(encode, rounds)
+            baseline = baseline or ms
+            print(f"{size:>8} {name:>8} {ms:>9.2f} {1000 / ms:>8.1f} {size_mb * 1000 / ms:>7.1f} {baseline / ms:>7.1f}x")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Lazy Logging Micro-Benchmark
+============================
+
+Per-command cost of the debug logging in the RS485 hot path
+(_build_message + _send_command) with DEBUG disabled, the production
+setting:
+- eager: f-string messages with hex dumps (the previous code)
+- lazy:  %-style arguments, LazyHex and an isEnabledFor guard
+
+Also reports the full _build_message + _send_command time of the current
+controller against an in-memory port (sleeps disabled), to put the
+saving in context.
+
+Usage:
+    python benchmarks/bench_lazy_logging.py [iterations]
+    (default: 200000)
+
+Author: CartWise Team
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core.logging import LazyHex  # noqa: E402
+from hardware import rs485  # noqa: E402
+from hardware.rs485 import Command, RS485Controller  # noqa: E402
+
+logger = logging.getLogger("bench.rs485")
+logger.setLevel(logging.INFO)
+
+MESSAGE = bytes([0x02, 0x05, 0x31, 0x03, 0x3B])
+RESPONSE = bytes([0x02, 0x05, 0x31, 0xFF, 0x0F, 0x00, 0x00, 0x03, 0x49])
+
+
+def eager(attempt: int = 0, retry_count: int = 3, lock_num: int = 5):
+    """Debug statements of one command as previously written."""
+    logger.debug(f"Built KR-CU16 message: {MESSAGE.hex().upper()} (Lock={lock_num}, CMD={Command.UNLOCK.name})")
+    logger.debug(f"Buffers cleared (attempt {attempt + 1}/{retry_count})")
+    logger.debug(f">> Sent: {MESSAGE.hex().upper()}")
+    logger.debug(f"<< Received: {RESPONSE.hex().upper() if RESPONSE else 'None'}")
+
+
+def lazy(attempt: int = 0, retry_count: int = 3, lock_num: int = 5):
+    """Debug statements of one command as now written."""
+    logger.debug("Built KR-CU16 message: %s (Lock=%s, CMD=%s)", LazyHex(MESSAGE), lock_num, Command.UNLOCK.name)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Buffers cleared (attempt %d/%d)", attempt + 1, retry_count)
+    if debug:
+        logger.debug(">> Sent: %s", LazyHex(MESSAGE))
+    if debug:
+        logger.debug("<< Received: %s", LazyHex(RESPONSE))
+
+
+class MemoryPort:
+    """In-memory serial port answering every command with RESPONSE."""
+
+    is_open = True
+
+    def write(self, data): pass
+    def flush(self): pass
+    def setRTS(self, value): pass
+    def reset_input_buffer(self): pass
+    def reset_output_buffer(self): pass
+    def read(self, size): return RESPONSE
+
+
+def per_call_ns(func, iterations: int) -> float:
+    """Average nanoseconds per call."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e9
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    eager_ns = per_call_ns(eager, iterations)
+    lazy_ns = per_call_ns(lazy, iterations)
+
+    controller = RS485Controller()
+    controller.serial = MemoryPort()
+    controller.ensure_port_ready = lambda: None
+    rs485.time.sleep = lambda seconds: None  # Benchmark the code, not the protocol delays
+
+    def command():
+        message = controller._build_message(0, 5, Command.UNLOCK)
+        controller._send_command(message, expected_response_len=9)
+
+    command_ns = per_call_ns(command, iterations // 10)
+
+    print(f"debug logging per command, DEBUG off ({iterations} iterations):")
+    print(f"  eager f-strings: {eager_ns:8.0f} ns")
+    print(f"  lazy:            {lazy_ns:8.0f} ns  (saves {eager_ns - lazy_ns:.0f} ns per command)")
+    print(f"full build + send (in-memory port, no sleeps): {command_ns:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
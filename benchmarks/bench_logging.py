@@ -0,0 +1,106 @@
+"""
+Logging Pipeline Benchmark
+==========================
+
+Requests/sec of a logging API endpoint (/rentals/stats/summary: one INFO
+line + one database read) under three logging setups:
+- off:    LOG_LEVEL=WARNING (INFO records are filtered out)
+- sync:   INFO, console + rotating file handlers on the root logger
+          (the previous setup: every log call formats and writes inline)
+- queued: INFO, setup_logging() queue handler + background writer
+
+It also reports the caller-side cost of one logger.info() call, which
+is what the event loop and the RS485/monitor threads pay inline.
+
+Console output goes to a file in a temporary directory (like stdout
+redirected to a service log), so terminal speed does not skew results.
+
+Usage:
+    python benchmarks/bench_logging.py [requests] [concurrency]
+    (defaults: 3000 requests, 20 concurrent)
+
+Author: CartWise Team
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+WORKDIR = tempfile.mkdtemp(prefix="cartwise-bench-logging-")
+os.chdir(WORKDIR)
+sys.stdout = open(os.path.join(WORKDIR, "stdout.log"), "w", buffering=1)
+REPORT = sys.__stdout__
+
+import httpx  # noqa: E402
+
+from core import setup_logging, stop_logging  # noqa: E402
+from api import create_app  # noqa: E402
+
+
+def use_sync_handlers():
+    """Replace the queue handler with the handlers it feeds (inline I/O)."""
+    from core import logging as core_logging
+
+    root = logging.getLogger()
+    handlers = list(core_logging._listener.handlers)
+    core_logging._listener.stop()
+    core_logging._listener = None
+    root.handlers.clear()
+    for handler in handlers:
+        root.addHandler(handler)
+
+
+async def run(app, total: int, concurrency: int) -> float:
+    """Issue requests and return requests/sec."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/rentals/stats/summary")  # warm up
+
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/rentals/stats/summary")
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+def caller_cost_us(calls: int = 20000) -> float:
+    """Average microseconds spent inside logger.info() by the caller."""
+    logger = logging.getLogger("bench")
+    started = time.perf_counter()
+    for i in range(calls):
+        logger.info("Cart %d assigned to %s (rental %d)", i % 16, "0501234567", i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    app = create_app()
+    print(f"{total} requests, {concurrency} concurrent (workdir {WORKDIR})", file=REPORT)
+
+    for mode in ("off", "sync", "queued"):
+        setup_logging(level="WARNING" if mode == "off" else "INFO")
+        if mode == "sync":
+            use_sync_handlers()
+
+        rate = asyncio.run(run(app, total, concurrency))
+        cost = caller_cost_us()
+        print(f"{mode:>7}: {rate:8.0f} req/s   logger.info(): {cost:6.2f} us/call", file=REPORT)
+
+    stop_logging()
+
+
+if __name__ == "__main__":
+    main()
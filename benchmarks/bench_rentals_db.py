@@ -0,0 +1,145 @@
+"""
+Rentals Database Benchmark
+==========================
+
+Compares the v1 (ISO TEXT timestamps) and v2 (INTEGER epoch) rentals
+schemas on a large table:
+- overdue query (status + expected_return range)
+- row hydration into Rental objects
+- one-off migration time
+
+Usage:
+    python benchmarks/bench_rentals_db.py [rows]   (default: 1000000)
+
+Author: CartWise Team
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from models.rental import Rental, RentalStatus  # noqa: E402
+from utils.database import RentalDatabase  # noqa: E402
+
+V1_TABLE_SQL = """
+    CREATE TABLE rentals (
+        rental_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cart_id INTEGER NOT NULL,
+        user_phone TEXT NOT NULL,
+        locker_id INTEGER NOT NULL,
+        start_time TEXT NOT NULL,
+        expected_return TEXT NOT NULL,
+        actual_return TEXT,
+        status TEXT NOT NULL,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def build_v1_database(path: str, rows: int):
+    """Create a v1-schema database filled with synthetic rentals."""
+    now = datetime.now()
+    statuses = [RentalStatus.RETURNED.value] * 8 + [RentalStatus.RETURNED_LATE.value, RentalStatus.ACTIVE.value]
+
+    with sqlite3.connect(path) as conn:
+        conn.execute(V1_TABLE_SQL)
+        conn.execute("CREATE INDEX idx_status ON rentals(status)")
+        conn.execute("CREATE INDEX idx_status_expected_return ON rentals(status, expected_return)")
+
+        batch = []
+        for i in range(rows):
+            start = now - timedelta(minutes=random.randint(0, 525600))
+            expected = start + timedelta(hours=2)
+            status = statuses[i % len(statuses)]
+            actual = None if status == RentalStatus.ACTIVE.value else (start + timedelta(minutes=90)).isoformat()
+            batch.append((i % 50, f"05{i % 10000000:08d}", i % 16,
+                          start.isoformat(), expected.isoformat(), actual, status))
+            if len(batch) == 50000:
+                conn.executemany("""
+                    INSERT INTO rentals (cart_id, user_phone, locker_id, start_time,
+                                         expected_return, actual_return, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, batch)
+                batch = []
+        if batch:
+            conn.executemany("""
+                INSERT INTO rentals (cart_id, user_phone, locker_id, start_time,
+                                     expected_return, actual_return, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, batch)
+
+
+def v1_overdue(path: str):
+    """Baseline: v1 overdue query with string comparison and validated hydration."""
+    with sqlite3.connect(path) as conn:
+        conn.row_factory = sqlite3.Row
+        started = time.perf_counter()
+        rows = conn.execute("""
+            SELECT * FROM rentals WHERE status = ? AND expected_return < ?
+            ORDER BY expected_return ASC
+        """, (RentalStatus.ACTIVE.value, datetime.now().isoformat())).fetchall()
+        queried = time.perf_counter()
+        rentals = [
+            Rental(
+                rental_id=row["rental_id"], cart_id=row["cart_id"], user_phone=row["user_phone"],
+                locker_id=row["locker_id"],
+                start_time=datetime.fromisoformat(row["start_time"]),
+                expected_return=datetime.fromisoformat(row["expected_return"]),
+                actual_return=datetime.fromisoformat(row["actual_return"]) if row["actual_return"] else None,
+                status=RentalStatus(row["status"]), notes=row["notes"],
+            )
+            for row in rows
+        ]
+        hydrated = time.perf_counter()
+    return len(rentals), queried - started, hydrated - queried
+
+
+def v2_overdue(db: RentalDatabase):
+    """v2 overdue query through RentalDatabase, split into query and hydration."""
+    with sqlite3.connect(db.db_path) as conn:
+        from utils.database import RENTAL_COLUMNS, to_epoch
+        started = time.perf_counter()
+        rows = conn.execute(f"""
+            SELECT {RENTAL_COLUMNS} FROM rentals WHERE status = ? AND expected_return < ?
+            ORDER BY expected_return ASC
+        """, (RentalStatus.ACTIVE.value, to_epoch(datetime.now()))).fetchall()
+        queried = time.perf_counter()
+        rentals = [db._row_to_rental(row) for row in rows]
+        hydrated = time.perf_counter()
+    return len(rentals), queried - started, hydrated - queried
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rentals.db")
+
+        print(f"Building v1 database with {rows:,} rentals...")
+        build_v1_database(path, rows)
+
+        count, query_s, hydrate_s = v1_overdue(path)
+        print(f"v1 overdue: {count:,} rows | query {query_s * 1000:.1f} ms | "
+              f"hydration {hydrate_s * 1000:.1f} ms ({hydrate_s / max(count, 1) * 1e6:.2f} us/row)")
+
+        started = time.perf_counter()
+        db = RentalDatabase(path)
+        print(f"Migration to v2: {time.perf_counter() - started:.1f} s")
+
+        count, query_s, hydrate_s = v2_overdue(db)
+        print(f"v2 overdue: {count:,} rows | query {query_s * 1000:.1f} ms | "
+              f"hydration {hydrate_s * 1000:.1f} ms ({hydrate_s / max(count, 1) * 1e6:.2f} us/row)")
+
+        print(f"Database size after migration: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Cold Start Benchmark
+====================
+
+Wall-clock time of fresh interpreters for:
+- python:  bare interpreter start (`python -c pass`), the floor
+- server:  run_server.py --startup-only (imports + create_app, no serving)
+- agent:   import of raspberry_pi/local_agent.py (imports + logging setup)
+
+Every run is a new process, so nothing is cached in memory (the OS page
+cache and .pyc files still are - as on a kiosk that reboots). Track the
+median between changes; use `python run_server.py --profile-startup` to
+see which imports dominate.
+
+Usage:
+    python benchmarks/bench_startup.py [runs]
+    (default: 10 runs per target)
+
+Author: CartWise Team
+"""
+
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+TARGETS = {
+    "python": [sys.executable, "-c", "pass"],
+    "server": [sys.executable, str(ROOT / "run_server.py"), "--startup-only"],
+    "agent": [
+        sys.executable, "-c",
+        f"import sys; sys.path.insert(0, {str(ROOT / 'raspberry_pi')!r}); import local_agent",
+    ],
+}
+
+
+def measure(command, runs: int, cwd: str) -> list:
+    """Run a command `runs` times and return wall-clock milliseconds."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    # Logs and data directories are created in a scratch directory
+    workdir = tempfile.mkdtemp(prefix="cartwise-bench-startup-")
+
+    print(f"Cold start, {runs} runs each (ms)")
+    print(f"{'target':>8} {'min':>8} {'median':>8} {'max':>8} {'over python':>12}")
+
+    floor = None
+    for name, command in TARGETS.items():
+        measure(command, 1, workdir)  # Warm the page cache and .pyc files
+        times = measure(command, runs, workdir)
+        median = statistics.median(times)
+        floor = median if floor is None else floor
+        print(f"{name:>8} {min(times):>8.0f} {median:>8.0f} {max(times):>8.0f} {median - floor:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Async Database Load Test
+========================
+
+Mixed read/write traffic against the rentals database from many
+concurrent coroutines, the way FastAPI handlers issue it. Compares:
+- sync:  RentalDatabase called directly inside coroutines (blocks the loop)
+- async: AsyncRentalDatabase (1 writer thread + reader pool)
+
+Reports p50/p99 operation latency and event-loop lag (how late a 10 ms
+heartbeat fires), which is what every other request on the server feels.
+
+Usage:
+    python benchmarks/load_test_async_db.py [clients] [ops_per_client] [write_ratio]
+    (defaults: 50 clients, 40 ops each, 0.2 writes)
+
+Author: CartWise Team
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from models.rental import Rental  # noqa: E402
+from utils.database import RentalDatabase  # noqa: E402
+from utils.async_database import AsyncRentalDatabase  # noqa: E402
+
+
+def percentile(samples, pct):
+    """Get a percentile (0-100) of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def new_rental(i: int) -> Rental:
+    """Build a rental for the write path."""
+    now = datetime.now()
+    return Rental(cart_id=i % 50, user_phone=f"05{i:08d}", locker_id=i % 16,
+                  start_time=now, expected_return=now + timedelta(hours=2))
+
+
+async def heartbeat(lags, stop):
+    """Measure how late a 10 ms sleep wakes up."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - started - 0.01)
+
+
+async def client(db, is_async, client_id, ops, write_ratio, latencies):
+    """Issue a mix of lookups and rental writes."""
+    for i in range(ops):
+        started = time.perf_counter()
+        phone = f"05{random.randint(0, 5000):08d}"
+        if random.random() < write_ratio:
+            rental = new_rental(client_id * ops + i)
+            if is_async:
+                await db.create_rental(rental)
+            else:
+                db.create_rental(rental)
+        else:
+            if is_async:
+                await db.get_active_rental_by_phone(phone)
+            else:
+                db.get_active_rental_by_phone(phone)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0)  # Yield like a real handler would between requests
+
+
+async def run(mode, db, clients, ops, write_ratio):
+    """Run one load scenario and print its latency profile."""
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        client(db, mode == "async", c, ops, write_ratio, latencies) for c in range(clients)
+    ])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+
+    print(f"{mode:>5}: {len(latencies) / elapsed:8.0f} ops/s | "
+          f"op p50 {statistics.median(latencies) * 1000:6.2f} ms  p99 {percentile(latencies, 99) * 1000:7.2f} ms | "
+          f"loop lag p99 {percentile(lags or [0.0], 99) * 1000:7.2f} ms  max {max(lags or [0.0]) * 1000:7.2f} ms")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    write_ratio = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = RentalDatabase(os.path.join(tmp, "rentals.db"))
+        for i in range(5000):
+            db.create_rental(new_rental(i))
+
+        print(f"{clients} clients x {ops} ops, {write_ratio:.0%} writes")
+        asyncio.run(run("sync", db, clients, ops, write_ratio))
+
+        async_db = AsyncRentalDatabase(db)
+        asyncio.run(run("async", async_db, clients, ops, write_ratio))
+        async_db.close()
+
+
+if __name__ == "__main__":
+    main()
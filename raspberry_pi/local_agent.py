@@ -24,7 +24,9 @@ from datetime import datetime
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from hardware.rs485 import RS485Controller
+from hardware.ipc import HardwareClient
 from core import setup_logging, get_logger
+from core.tracing import Tracer, correlation_context
 
 # Setup logging
 setup_logging()
@@ -43,7 +45,8 @@ class LocalAgent:
         api_key: str,
         serial_port: str = "/dev/ttyUSB0",
         baudrate: int = 19200,
-        poll_interval: float = 1.0
+        poll_interval: float = 1.0,
+        hardware_socket: Optional[str] = None
     ):
         """
         Initialize local agent.
@@ -55,14 +58,22 @@ class LocalAgent:
             serial_port: RS485 serial port
             baudrate: RS485 baud rate
             poll_interval: Polling interval in seconds
+            hardware_socket: Hardware daemon socket (the daemon owns the
+                             serial port; serial_port/baudrate are ignored)
         """
         self.cloud_url = cloud_url.rstrip('/')
         self.branch_id = branch_id
         self.api_key = api_key
         self.poll_interval = poll_interval
 
-        # Initialize RS485 controller
-        self.controller = RS485Controller(port=serial_port, baudrate=baudrate)
+        # Initialize RS485 controller (or the client of the hardware daemon)
+        if hardware_socket:
+            self.controller = HardwareClient(hardware_socket)
+        else:
+            self.controller = RS485Controller(port=serial_port, baudrate=baudrate)
+
+        # Spans of executed commands (reported with each command result)
+        self.tracer = Tracer(service=f"agent:{branch_id}", capacity=256)
 
         # Session for HTTP requests
         self.session = requests.Session()
@@ -77,7 +88,7 @@ class LocalAgent:
 
         logger.info(f"Local Agent initialized for branch: {branch_id}")
         logger.info(f"Cloud URL: {cloud_url}")
-        logger.info(f"Serial port: {serial_port}")
+        logger.info(f"Serial port: {hardware_socket or serial_port}")
 
     def start(self):
         """Start the local agent."""
@@ -200,26 +211,50 @@ class LocalAgent:
         command_id = command.get('id')
         command_type = command.get('type')
         params = command.get('params', {})
+        correlation_id = command.get('correlation_id')
 
         logger.info(f"Executing command: {command_type} (ID: {command_id})")
 
+        # Spans recorded here are sent back with the result and joined to the
+        # trace of the API request that queued the command
+        with correlation_context(correlation_id, command.get('parent_span_id')):
+            with self.tracer.span("agent.execute_command", command_type=command_type, command_id=command_id):
+                success, result = self._run_command(command_type, params)
+
+        spans = self.tracer.get_trace(correlation_id) if correlation_id else None
+        self.report_command_result(command_id, success, result, correlation_id, spans)
+
+    def _run_command(self, command_type: str, params: dict):
+        """
+        Run one command against the RS485 controller.
+
+        Args:
+            command_type: Command type (unlock, lock, get_status, check_return)
+            params: Command parameters
+
+        Returns:
+            Tuple of (success, result dictionary)
+        """
         try:
             result = None
             success = False
 
             if command_type == 'unlock':
                 locker_id = params.get('locker_id')
-                success = self.controller.unlock_cart(locker_id)
+                with self.tracer.span("rs485.unlock_cart", locker_id=locker_id):
+                    success = self.controller.unlock_cart(locker_id)
                 result = {'locker_id': locker_id, 'unlocked': success}
 
             elif command_type == 'lock':
                 locker_id = params.get('locker_id')
-                success = self.controller.lock_cart(locker_id)
+                with self.tracer.span("rs485.lock_cart", locker_id=locker_id):
+                    success = self.controller.lock_cart(locker_id)
                 result = {'locker_id': locker_id, 'locked': success}
 
             elif command_type == 'get_status':
                 locker_id = params.get('locker_id')
-                state = self.controller.get_lock_state(locker_id)
+                with self.tracer.span("rs485.get_lock_state", locker_id=locker_id):
+                    state = self.controller.get_lock_state(locker_id)
                 if state:
                     success = True
                     result = {
@@ -232,7 +267,8 @@ class LocalAgent:
 
             elif command_type == 'check_return':
                 locker_id = params.get('locker_id')
-                returned = self.controller.check_cart_returned(locker_id)
+                with self.tracer.span("rs485.check_cart_returned", locker_id=locker_id):
+                    returned = self.controller.check_cart_returned(locker_id)
                 success = True
                 result = {'locker_id': locker_id, 'returned': returned}
 
@@ -240,14 +276,20 @@ class LocalAgent:
                 logger.warning(f"Unknown command type: {command_type}")
                 result = {'error': f'Unknown command: {command_type}'}
 
-            # Report result back to cloud
-            self.report_command_result(command_id, success, result)
+            return success, result
 
         except Exception as e:
             logger.error(f"Error executing command {command_type}: {e}")
-            self.report_command_result(command_id, False, {'error': str(e)})
+            return False, {'error': str(e)}
 
-    def report_command_result(self, command_id: str, success: bool, result: dict):
+    def report_command_result(
+        self,
+        command_id: str,
+        success: bool,
+        result: dict,
+        correlation_id: Optional[str] = None,
+        spans: Optional[list] = None
+    ):
         """
         Report command execution result back to cloud.
 
@@ -255,6 +297,8 @@ class LocalAgent:
             command_id: Command ID
             success: Whether command succeeded
             result: Result data
+            correlation_id: Correlation ID received with the command
+            spans: Timing spans recorded while executing the command
         """
         try:
             self.session.post(
@@ -264,7 +308,9 @@ class LocalAgent:
                     'branch_id': self.branch_id,
                     'success': success,
                     'result': result,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': datetime.now().isoformat(),
+                    'correlation_id': correlation_id,
+                    'spans': spans
                 }
             )
             logger.info(f"Command result reported: {command_id} - {'SUCCESS' if success else 'FAILED'}")
@@ -310,6 +356,8 @@ def main():
                        help='RS485 baud rate (default: 19200)')
     parser.add_argument('--poll-interval', type=float, default=1.0,
                        help='Polling interval in seconds (default: 1.0)')
+    parser.add_argument('--hardware-socket', default=None,
+                       help='Use the hardware daemon on this Unix socket instead of the serial port')
 
     args = parser.parse_args()
 
@@ -320,7 +368,8 @@ def main():
         api_key=args.api_key,
         serial_port=args.serial_port,
         baudrate=args.baudrate,
-        poll_interval=args.poll_interval
+        poll_interval=args.poll_interval,
+        hardware_socket=args.hardware_socket
     )
 
     agent.start()
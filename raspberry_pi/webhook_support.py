@@ -72,7 +72,7 @@ class WebhookManager:
             True if at least one webhook succeeded
         """
         if not self.enabled:
-            logger.debug(f"Webhooks disabled - skipping event: {event_type}")
+            logger.debug("Webhooks disabled - skipping event: %s", event_type)
             return False
 
         # Build payload
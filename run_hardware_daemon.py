@@ -0,0 +1,26 @@
+"""
+CartWise Pro - Hardware Daemon Launcher
+========================================
+
+Runs the process that owns the RS485 serial port. Point the API
+(HARDWARE_SOCKET in config/.env) or the Raspberry Pi agent
+(--hardware-socket) at its socket.
+
+Usage:
+    python run_hardware_daemon.py [--socket data/hardware.sock]
+        [--serial-port /dev/ttyUSB0] [--baudrate 19200] [--poll-interval 1]
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from hardware.daemon import main
+
+if __name__ == "__main__":
+    main()
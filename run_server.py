@@ -6,43 +6,176 @@ Launches the FastAPI server with proper Python path configuration.
 
 Usage:
     python run_server.py
+    python run_server.py --workers 4
+        Run several worker processes sharing state (see WORKERS in .env)
+    python run_server.py --profile-startup [--min-ms 2]
+        Print the import-time tree and app creation time, then exit
 
 Author: CartWise Team
 Version: 1.0.0
 """
 
-import sys
 import os
+import sys
+import time
 from pathlib import Path
 
+STARTED = time.perf_counter()
+
 # Add src directory to Python path
 project_root = Path(__file__).parent
 src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
-# Now import and run
-import uvicorn
-from core import settings, setup_logging, get_logger
-from api import create_app
+# Marker line printed by --startup-only (parsed by --profile-startup)
+TIMING_MARKER = "startup-timing"
 
-# Setup logging
-setup_logging()
-logger = get_logger(__name__)
+# Stores that must be shared by all workers, with their multi-worker defaults
+SHARED_STORE_DEFAULTS = {
+    "STATE_DB_PATH": "data/state.db",
+    "OTP_STORE_PATH": "data/otp.db",
+    "RATE_LIMIT_STORE_PATH": "data/rate_limits.db",
+}
 
-# Create application
-app = create_app()
 
-if __name__ == "__main__":
+def build_app():
+    """Configure logging and create the application."""
+    from core import setup_logging
+    from api import create_app
+
+    setup_logging()
+    return create_app()
+
+
+def __getattr__(name: str):
+    # `uvicorn run_server:app` - the app is only built when asked for
+    if name == "app":
+        global app
+        app = build_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def startup_only():
+    """Build the app and report timings without serving (profiling child)."""
+    application = build_app()
+    ready = time.perf_counter()
+    routes = len(application.routes)
+    print(f"{TIMING_MARKER} total_ms={(ready - STARTED) * 1000:.1f} routes={routes}", flush=True)
+
+    from core import stop_logging
+
+    stop_logging()
+
+
+def configure_workers(workers: int):
+    """
+    Point the shared stores at files for a multi-worker run.
+
+    Sets the environment inherited by the worker processes; paths already
+    configured are kept.
+
+    Args:
+        workers: Number of worker processes
+    """
+    os.environ["WORKERS"] = str(workers)
+    if workers > 1:
+        for name, path in SHARED_STORE_DEFAULTS.items():
+            if not os.environ.get(name):
+                os.environ[name] = path
+
+
+def profile_startup(min_ms: float):
+    """Run startup in a child interpreter under -X importtime and print the profile."""
+    import subprocess
+
+    from core.import_profile import format_tree, parse_importtime, top_self_time
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(Path(__file__).resolve()), "--startup-only"],
+        capture_output=True,
+        text=True,
+        cwd=str(project_root),
+    )
+    roots = parse_importtime(result.stderr.splitlines())
+    timing = next(
+        (line for line in result.stdout.splitlines() if line.startswith(TIMING_MARKER)), None
+    )
+    if result.returncode != 0 or timing is None:
+        print(result.stderr[-2000:], file=sys.stderr)
+        sys.exit(f"Startup failed (exit code {result.returncode})")
+
+    print(f"Import tree (>= {min_ms:g} ms cumulative)")
+    print(format_tree(roots, min_ms=min_ms))
+    print()
+    print("Highest self time")
+    for node in top_self_time(roots):
+        print(f"{node.self_us / 1000:>9.1f} ms  {node.name}")
+    print()
+    print(f"Imports: {sum(node.cumulative_us for node in roots) / 1000:.1f} ms")
+    print(timing.replace(TIMING_MARKER, "Startup (process start to app created):"))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CartWise Pro API server")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print the import-time tree and startup time, then exit")
+    parser.add_argument("--min-ms", type=float, default=2.0,
+                        help="Hide imports cheaper than this (with --profile-startup)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: WORKERS setting)")
+    parser.add_argument("--startup-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        profile_startup(args.min_ms)
+        return
+    if args.startup_only:
+        startup_only()
+        return
+
+    import uvicorn
+    from core import settings, setup_logging, get_logger
+
+    # Worker processes read their settings from the environment set here
+    workers = args.workers if args.workers is not None else settings.WORKERS
+    configure_workers(workers)
+
+    setup_logging()
+    logger = get_logger(__name__)
+
     logger.info("=" * 80)
     logger.info(f"Starting CartWise Pro Server")
     logger.info(f"Host: {settings.HOST}")
     logger.info(f"Port: {settings.PORT}")
+    logger.info(f"Workers: {workers}")
     logger.info(f"API Docs: http://{settings.HOST}:{settings.PORT}/docs")
     logger.info("=" * 80)
 
+    if workers > 1:
+        logger.info(f"Shared state: {os.environ['STATE_DB_PATH']}")
+        # Each worker imports run_server and builds its own app
+        uvicorn.run(
+            "run_server:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            workers=workers,
+            app_dir=str(project_root),
+            log_level="info",
+        )
+        return
+
+    application = build_app()
+    logger.info(f"Startup: {(time.perf_counter() - STARTED) * 1000:.0f} ms")
     uvicorn.run(
-        app,
+        application,
         host=settings.HOST,
         port=settings.PORT,
         log_level="info",
     )
+
+
+if __name__ == "__main__":
+    main()
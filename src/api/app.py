@@ -11,15 +11,16 @@ Version: 1.0.0
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from core import setup_logging, get_logger, settings
-from hardware.rs485 import RS485Controller
-from api.dependencies import set_lock_controller, init_monitor, shutdown_monitor
-from api.routers import auth_router, carts_router, health_router, rentals_router, agent_router
+from api.dependencies import start_services, stop_services
+from api.routers import auth_router, carts_router, health_router, rentals_router, agent_router, events_router
+from api.metrics import MetricsMiddleware, register_collectors
+from api.tracing import TracingMiddleware
+from api.responses import FastJSONResponse
 
-# Setup logging
-setup_logging()
 logger = get_logger(__name__)
 
 
@@ -30,6 +31,9 @@ def create_app() -> FastAPI:
     Returns:
         Configured FastAPI app instance
     """
+    # No-op if the launcher already configured logging
+    setup_logging()
+
     # Create FastAPI app
     app = FastAPI(
         title=settings.API_TITLE,
@@ -37,6 +41,7 @@ def create_app() -> FastAPI:
         version=settings.API_VERSION,
         docs_url="/docs",
         redoc_url="/redoc",
+        default_response_class=FastJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse,
     )
 
     # CORS middleware
@@ -48,12 +53,20 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Request metrics (latency histograms, status codes, in-flight) for /metrics
+    app.add_middleware(MetricsMiddleware)
+    register_collectors()
+
+    # Correlation ID + root span per request (exported at /traces)
+    app.add_middleware(TracingMiddleware)
+
     # Register routers
     app.include_router(health_router)
     app.include_router(auth_router)
     app.include_router(carts_router)
     app.include_router(rentals_router)
     app.include_router(agent_router)  # Agent communication endpoints
+    app.include_router(events_router)  # Server-Sent Events for dashboards
 
     # Mount static files directory
     static_dir = os.path.join(
@@ -66,32 +79,10 @@ def create_app() -> FastAPI:
     # Startup event
     @app.on_event("startup")
     async def startup_event():
-        """Initialize hardware connections and services on startup."""
+        """Start hardware and services in the background (does not block serving)."""
         logger.info("Starting CartWise Pro API Server...")
-
-        # Initialize RS485 controller
-        try:
-            lock_controller = RS485Controller(
-                port=settings.SERIAL_PORT, baudrate=settings.BAUD_RATE
-            )
-            if lock_controller.connect():
-                logger.info("RS485 controller connected")
-                set_lock_controller(lock_controller)
-            else:
-                logger.warning("RS485 controller not available (running in demo mode)")
-                set_lock_controller(None)
-        except Exception as e:
-            logger.error(f"Failed to initialize RS485 controller: {e}")
-            set_lock_controller(None)
-
-        # Initialize and start CU16 monitor service
-        try:
-            init_monitor()
-            logger.info("CU16 monitor service initialized")
-        except Exception as e:
-            logger.error(f"Failed to initialize monitor service: {e}")
-
-        logger.info("CartWise Pro API Server started successfully!")
+        start_services()
+        logger.info("CartWise Pro API Server accepting requests (hardware and monitor starting in background)")
 
     # Shutdown event
     @app.on_event("shutdown")
@@ -99,19 +90,8 @@ def create_app() -> FastAPI:
         """Cleanup on shutdown."""
         logger.info("Shutting down CartWise Pro API Server...")
 
-        # Shutdown monitor service
-        try:
-            shutdown_monitor()
-        except Exception as e:
-            logger.error(f"Error shutting down monitor: {e}")
-
-        # Disconnect RS485 controller
-        from api.dependencies import get_lock_controller
-
-        lock_controller = get_lock_controller()
-        if lock_controller:
-            lock_controller.disconnect()
-            logger.info("RS485 controller disconnected")
+        # Stop monitor, let pending database operations finish, close RS485
+        stop_services()
 
         logger.info("Shutdown complete")
 
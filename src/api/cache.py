@@ -0,0 +1,138 @@
+"""
+Conditional Response Cache
+==========================
+
+Pre-serialized JSON bodies cached per data version, with ETag /
+If-None-Match support.
+
+A body is serialized once per version of the data it is built from;
+every later request at that version reuses the bytes, and a client that
+already has them gets 304 Not Modified after a header comparison.
+
+ETags combine a per-process boot ID with the version, so a restarted
+server (whose versions start over) never matches an old client's ETag.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import threading
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+from core.metrics import registry
+
+BOOT_ID = uuid.uuid4().hex[:8]
+
+RESPONSE_CACHE = registry.counter(
+    "cartwise_response_cache_total",
+    "Cached JSON responses by result (hit, miss, not_modified)",
+    ("name", "result"),
+)
+
+
+def make_etag(version: int) -> str:
+    """Build the ETag of a data version."""
+    return f'"{BOOT_ID}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison).
+
+    Args:
+        if_none_match: Header value ("*" or a comma-separated ETag list)
+        etag: Current ETag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+class VersionedCache:
+    """
+    Serialized bodies keyed by name, each valid for one data version.
+
+    Example:
+        body, etag = cache.get("carts", bus.version("cart"), build_body)
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, version: int, build: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """
+        Get the body of `name` at `version`, building it on a miss.
+
+        The version must be read before the data is, so a change made
+        while building bumps it past the cached entry.
+
+        Args:
+            name: Cache key (e.g. "carts")
+            version: Current version of the underlying data
+            build: Serializes the current data
+
+        Returns:
+            (body, etag)
+        """
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version:
+            RESPONSE_CACHE.inc(name, "hit")
+            return entry[1], make_etag(version)
+
+        RESPONSE_CACHE.inc(name, "miss")
+        body = build()
+        with self._lock:
+            current = self._entries.get(name)
+            if current is None or current[0] <= version:
+                self._entries[name] = (version, body)
+        return body, make_etag(version)
+
+    def clear(self):
+        """Drop all cached bodies."""
+        with self._lock:
+            self._entries.clear()
+
+    def response(
+        self,
+        request: Request,
+        name: str,
+        version: int,
+        build: Callable[[], bytes],
+    ) -> Response:
+        """
+        Build a conditional JSON response.
+
+        Args:
+            request: Incoming request (for If-None-Match)
+            name: Cache key
+            version: Current version of the underlying data
+            build: Serializes the current data
+
+        Returns:
+            304 if the client's ETag is current, otherwise 200 with the body
+        """
+        etag = make_etag(version)
+        # no-cache: clients may store the body but must revalidate it
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            RESPONSE_CACHE.inc(name, "not_modified")
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        body, _ = self.get(name, version, build)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+response_cache = VersionedCache()
@@ -8,25 +8,53 @@ Author: CartWise Team
 Version: 1.0.0
 """
 
-from typing import Dict, Optional
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
 from core import settings, get_logger
-from utils import OTPManager, RentalDatabase
-from utils.auth_tokens import AuthTokenManager
-from providers.sms import InforuSMSProvider
+from utils import OTPManager, AsyncRentalDatabase, create_otp_store, create_token_store
+from utils.auth_tokens import AuthTokenManager, MODE_SIGNED
+from utils.rate_limit import RateLimiter, create_rate_limiter
+from utils.events import EventBus
+from utils.leader import LeaderElection
+from utils.state_backend import StateBackend, create_state_backend
+from utils.state_sync import StateSync
+from providers.storage import RentalStore, create_rental_store
 from hardware.rs485 import RS485Controller
+from hardware.connector import HardwareConnector
+from hardware.discovery import calibrate_controller
+from hardware.forwarding import HardwareCommandServer, RemoteLockController
+from hardware.ipc import HardwareClient
 from hardware.cu16_monitor import CU16MonitorSync
 from models import Cart, CartStatus
 
+if TYPE_CHECKING:
+    from providers.sms import InforuSMSProvider
+
 logger = get_logger(__name__)
 
 # Global instances (singletons)
 _otp_manager: Optional[OTPManager] = None
-_sms_provider: Optional[InforuSMSProvider] = None
+_sms_provider: Optional["InforuSMSProvider"] = None
 _lock_controller: Optional[RS485Controller] = None
 _carts_db: Optional[Dict[int, Cart]] = None
-_rental_db: Optional[RentalDatabase] = None
+_rental_db: Optional[RentalStore] = None
+_async_rental_db: Optional[AsyncRentalDatabase] = None
 _monitor: Optional[CU16MonitorSync] = None
 _auth_token_manager: Optional[AuthTokenManager] = None
+_rate_limiter: Optional[RateLimiter] = None
+_event_bus: Optional[EventBus] = None
+_hardware_connector: Optional[HardwareConnector] = None
+_state_backend: Optional[StateBackend] = None
+_state_sync: Optional[StateSync] = None
+_leader_election: Optional[LeaderElection] = None
+_remote_controller: Optional[RemoteLockController] = None
+_command_server: Optional[HardwareCommandServer] = None
+
+# Guards one-time construction of services also built by the startup thread
+_init_lock = threading.RLock()
+_services_started = False
+_services_stopped = threading.Event()
+_init_errors: Dict[str, str] = {}
 
 
 def get_otp_manager() -> OTPManager:
@@ -36,14 +64,17 @@ def get_otp_manager() -> OTPManager:
         _otp_manager = OTPManager(
             code_length=settings.OTP_LENGTH,
             expiration_minutes=settings.OTP_EXPIRATION_MINUTES,
+            store=create_otp_store(settings.OTP_STORE_PATH, settings.OTP_MAX_ENTRIES),
         )
     return _otp_manager
 
 
-def get_sms_provider() -> InforuSMSProvider:
-    """Get SMS provider instance."""
+def get_sms_provider() -> "InforuSMSProvider":
+    """Get SMS provider instance (constructed on first use)."""
     global _sms_provider
     if _sms_provider is None:
+        from providers.sms import InforuSMSProvider
+
         _sms_provider = InforuSMSProvider(
             username=settings.INFORU_USERNAME, password=settings.INFORU_PASSWORD
         )
@@ -51,43 +82,158 @@ def get_sms_provider() -> InforuSMSProvider:
 
 
 def get_lock_controller() -> Optional[RS485Controller]:
-    """Get RS485 lock controller instance."""
-    global _lock_controller
-    return _lock_controller
+    """
+    Get RS485 lock controller instance.
+
+    On a follower worker this is a proxy that forwards commands to the
+    leader (None while the leader's controller is not connected).
+    """
+    if _lock_controller is not None:
+        return _lock_controller
+    if _remote_controller is not None and _remote_controller.is_connected:
+        return _remote_controller
+    return None
 
 
 def set_lock_controller(controller: Optional[RS485Controller]):
-    """Set RS485 lock controller instance."""
+    """Set RS485 lock controller instance (also used by a running monitor)."""
     global _lock_controller
-    _lock_controller = controller
+    with _init_lock:
+        _lock_controller = controller
+        if _monitor is not None:
+            _monitor.lock_controller = controller
+
+
+def get_hardware_connector() -> Optional[HardwareConnector]:
+    """Get the background RS485 connector (None before startup)."""
+    return _hardware_connector
+
+
+def start_hardware():
+    """
+    Connect the RS485 controller in the background.
+
+    Returns immediately; the controller is set (and the API leaves demo
+    mode) once the port opens - or, with HARDWARE_SOCKET, once the hardware
+    daemon reports its port open. Failures are retried with backoff.
+    """
+    global _hardware_connector
+    if _hardware_connector is not None:
+        return
+
+    if settings.HARDWARE_SOCKET:
+        # The hardware daemon owns the port; connected once it answers
+        controller = HardwareClient(settings.HARDWARE_SOCKET, timeout=settings.HARDWARE_RPC_TIMEOUT)
+    else:
+        controller = RS485Controller(
+            port=settings.SERIAL_PORT,
+            baudrate=settings.BAUD_RATE,
+            enable_metrics=settings.RS485_METRICS_ENABLED,
+        )
+    _hardware_connector = HardwareConnector(
+        controller,
+        on_connect=set_lock_controller,
+        max_delay=settings.RS485_RETRY_MAX_SECONDS,
+        calibrate=_calibrate if not settings.HARDWARE_SOCKET else None,
+    )
+    _hardware_connector.start()
+
+
+def _calibrate(controller: RS485Controller):
+    """Apply the cached (or newly discovered) port and baud rate."""
+    if settings.RS485_DISCOVERY:
+        calibrate_controller(controller, settings.RS485_CALIBRATION_PATH)
+
+
+def stop_hardware():
+    """Stop connecting and close the RS485 controller."""
+    global _hardware_connector
+    if _hardware_connector is not None:
+        _hardware_connector.stop()
+        _hardware_connector = None
+
+    if _lock_controller is not None:
+        _lock_controller.disconnect()
+        set_lock_controller(None)
+        logger.info("RS485 controller disconnected")
+
+
+def get_state_backend() -> StateBackend:
+    """Get the state backend (shared by all workers when STATE_DB_PATH is set)."""
+    global _state_backend
+    if _state_backend is None:
+        with _init_lock:
+            if _state_backend is None:
+                _state_backend = create_state_backend(settings.STATE_DB_PATH)
+    return _state_backend
+
+
+def get_state_sync() -> StateSync:
+    """Get the worker state sync (owns the carts of this worker)."""
+    global _state_sync
+    if _state_sync is None:
+        with _init_lock:
+            if _state_sync is None:
+                # Note: locker_id starts from 0 (locker #1 = ADDR 0x00 in KR-CU16 protocol)
+                default_carts = {
+                    cart_id: Cart(cart_id=cart_id, locker_id=cart_id - 1, status=CartStatus.AVAILABLE, is_locked=True)
+                    for cart_id in range(1, 6)
+                }
+                _state_sync = StateSync(
+                    get_state_backend(),
+                    get_event_bus(),
+                    default_carts,
+                    poll_interval=settings.STATE_POLL_INTERVAL,
+                )
+    return _state_sync
 
 
 def get_carts_db() -> Dict[int, Cart]:
     """Get carts database."""
     global _carts_db
     if _carts_db is None:
-        # Initialize with default carts
-        # Note: locker_id starts from 0 (locker #1 = ADDR 0x00 in KR-CU16 protocol)
-        _carts_db = {
-            1: Cart(cart_id=1, locker_id=0, status=CartStatus.AVAILABLE, is_locked=True),
-            2: Cart(cart_id=2, locker_id=1, status=CartStatus.AVAILABLE, is_locked=True),
-            3: Cart(cart_id=3, locker_id=2, status=CartStatus.AVAILABLE, is_locked=True),
-            4: Cart(cart_id=4, locker_id=3, status=CartStatus.AVAILABLE, is_locked=True),
-            5: Cart(cart_id=5, locker_id=4, status=CartStatus.AVAILABLE, is_locked=True),
-        }
+        _carts_db = get_state_sync().carts
         logger.info(f"Initialized {len(_carts_db)} carts in database")
     return _carts_db
 
 
-def get_rental_db() -> RentalDatabase:
-    """Get rental database instance."""
+def get_rental_db() -> RentalStore:
+    """Get rental database instance (backend selected by DATABASE_URL)."""
     global _rental_db
     if _rental_db is None:
-        _rental_db = RentalDatabase()
-        logger.info("Rental database initialized")
+        with _init_lock:
+            if _rental_db is None:
+                _rental_db = create_rental_store(settings.DATABASE_URL, settings.BRANCH_ID)
+                logger.info("Rental database initialized")
     return _rental_db
 
 
+def get_async_rental_db() -> AsyncRentalDatabase:
+    """Get async rental database (for use inside async route handlers)."""
+    global _async_rental_db
+    if _async_rental_db is None:
+        with _init_lock:
+            if _async_rental_db is None:
+                _async_rental_db = AsyncRentalDatabase(get_rental_db())
+    return _async_rental_db
+
+
+def close_async_rental_db():
+    """Stop the async rental database worker threads."""
+    global _async_rental_db
+    if _async_rental_db:
+        _async_rental_db.close()
+        _async_rental_db = None
+
+
+def get_event_bus() -> EventBus:
+    """Get event bus instance (locker state changes, cart returns)."""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus()
+    return _event_bus
+
+
 def get_monitor() -> Optional[CU16MonitorSync]:
     """Get CU16 monitor instance."""
     global _monitor
@@ -98,23 +244,164 @@ def init_monitor():
     """Initialize and start the CU16 monitor service."""
     global _monitor
 
+    with _init_lock:
+        if _monitor is not None:
+            logger.warning("Monitor already initialized")
+            return
+
+        rental_db = get_rental_db()
+        carts_db = get_carts_db()
+
+        _monitor = CU16MonitorSync(
+            lock_controller=get_lock_controller(),
+            rental_db=rental_db,
+            carts_db=carts_db,
+            check_interval=5,  # Check every 5 seconds
+            event_bus=get_event_bus(),
+        )
+
+        _monitor.start()
+    logger.info("CU16 monitor service started")
+
+
+def is_leader() -> bool:
+    """True if this worker owns the serial port and the monitor."""
+    return _leader_election is None or _leader_election.is_leader
+
+
+def start_services():
+    """
+    Start hardware and background services without blocking startup
+    (idempotent: does nothing if they are already started).
+
+    The RS485 connection and the rental database + monitor are brought up
+    in background threads, so the server answers /health/live right away;
+    /health/ready reports when they are up.
+
+    With a shared state backend (several workers) only the elected leader
+    connects the hardware and runs the monitor; the other workers forward
+    hardware commands to it.
+    """
+    global _services_started, _leader_election, _remote_controller
+    if _services_started:
+        return
+    _services_started = True
+
+    _services_stopped.clear()
+    _init_errors.clear()
+
+    backend = get_state_backend()
+    if backend.shared:
+        get_state_sync().start()
+        _remote_controller = RemoteLockController(backend, timeout=settings.HARDWARE_FORWARD_TIMEOUT)
+        _leader_election = LeaderElection(settings.LEADER_LOCK_PATH, on_elected=_become_leader)
+        _leader_election.start()
+    else:
+        start_hardware()
+    threading.Thread(target=_init_services, name="services-init", daemon=True).start()
+
+
+def _become_leader():
+    """Take over the hardware and the monitor (leader election thread)."""
+    global _command_server
+    if _services_stopped.is_set():
+        return
+    start_hardware()
+    _command_server = HardwareCommandServer(get_state_backend(), lambda: _lock_controller)
+    _command_server.start()
+    if _rental_db is not None:
+        # Promoted after startup (the previous leader exited)
+        _start_monitor()
+
+
+def _start_monitor():
+    """Start the monitor, recording a failure for readiness."""
     if _monitor is not None:
-        logger.warning("Monitor already initialized")
+        return
+    try:
+        init_monitor()
+    except Exception as e:
+        _init_errors["monitor"] = str(e)
+        logger.error(f"Failed to initialize monitor service: {e}")
         return
 
-    lock_controller = get_lock_controller()
-    rental_db = get_rental_db()
-    carts_db = get_carts_db()
+    if _services_stopped.is_set():
+        # Shut down while starting
+        shutdown_monitor()
 
-    _monitor = CU16MonitorSync(
-        lock_controller=lock_controller,
-        rental_db=rental_db,
-        carts_db=carts_db,
-        check_interval=5  # Check every 5 seconds
-    )
 
-    _monitor.start()
-    logger.info("CU16 monitor service started")
+def _init_services():
+    """Construct the rental database and start the monitor (startup thread)."""
+    try:
+        get_async_rental_db()
+    except Exception as e:
+        _init_errors["database"] = str(e)
+        logger.error(f"Failed to initialize rental database: {e}")
+        return
+
+    if is_leader():
+        _start_monitor()
+
+
+def _stop_leadership():
+    """Stop serving forwarded commands and give up leadership."""
+    global _command_server, _leader_election, _remote_controller
+    if _command_server is not None:
+        _command_server.stop()
+        _command_server = None
+    if _leader_election is not None:
+        _leader_election.stop()
+        _leader_election = None
+    _remote_controller = None
+
+
+def stop_services():
+    """Stop background services started by start_services()."""
+    global _services_started
+    _services_started = False
+    _services_stopped.set()
+    for name, stop in (
+        ("monitor", shutdown_monitor),
+        ("rental database", close_async_rental_db),  # Lets pending operations finish
+        ("RS485 controller", stop_hardware),
+        ("leader election", _stop_leadership),
+        ("state sync", _state_sync.stop if _state_sync is not None else lambda: None),
+    ):
+        try:
+            stop()
+        except Exception as e:
+            logger.error(f"Error stopping {name}: {e}")
+
+
+def get_readiness() -> dict:
+    """
+    Get readiness of the services needed to serve requests.
+
+    Ready once the rental database is open and the monitor is running
+    (on the leader; followers have no monitor). The RS485 controller is
+    reported but not required - without it the API runs in demo mode.
+
+    Returns:
+        {"ready": bool, "components": {...}}
+    """
+    def state(name: str, up: bool) -> str:
+        if name in _init_errors:
+            return "error"
+        return "ready" if up else "starting"
+
+    leader = is_leader()
+    if leader:
+        hardware = _hardware_connector.get_status() if _hardware_connector else {"state": "idle"}
+    else:
+        hardware = {"state": "forwarded", "connected": get_lock_controller() is not None}
+
+    components = {
+        "database": state("database", _rental_db is not None),
+        "monitor": state("monitor", _monitor is not None and _monitor.running) if leader else "follower",
+        "hardware": hardware,
+    }
+    ready = components["database"] == "ready" and components["monitor"] in ("ready", "follower")
+    return {"ready": ready, "components": components}
 
 
 def shutdown_monitor():
@@ -130,6 +417,30 @@ def get_auth_token_manager() -> AuthTokenManager:
     """Get authentication token manager instance."""
     global _auth_token_manager
     if _auth_token_manager is None:
-        _auth_token_manager = AuthTokenManager(token_expiry_days=30)
+        _auth_token_manager = AuthTokenManager(
+            token_expiry_days=30,
+            store=create_token_store(
+                settings.AUTH_TOKEN_DB_PATH,
+                cache_size=settings.AUTH_TOKEN_CACHE_SIZE,
+                cache_ttl=settings.AUTH_TOKEN_CACHE_TTL,
+            ),
+            mode=settings.AUTH_TOKEN_MODE,
+            secret_key=settings.SECRET_KEY,
+        )
+        if _auth_token_manager.mode == MODE_SIGNED:
+            # Logouts on one worker revoke the token on every worker
+            get_state_sync().share_revocations(_auth_token_manager.revocations)
         logger.info("Auth token manager initialized")
     return _auth_token_manager
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get rate limiter instance."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = create_rate_limiter(
+            settings.RATE_LIMIT_STORE_PATH,
+            max_keys=settings.RATE_LIMIT_MAX_KEYS,
+        )
+        logger.info("Rate limiter initialized")
+    return _rate_limiter
@@ -0,0 +1,141 @@
+"""
+API Metrics
+===========
+
+HTTP request metrics middleware and collectors for the API server.
+
+Exported from GET /metrics in the Prometheus text format.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import time
+
+from core import get_logger
+from core.metrics import registry
+
+logger = get_logger(__name__)
+
+HTTP_REQUESTS = registry.counter(
+    "cartwise_http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "cartwise_http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ("method", "route"),
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "cartwise_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+HTTP_ERRORS = registry.counter(
+    "cartwise_http_errors_total",
+    "HTTP responses with status >= 400 by router and status code",
+    ("router", "status"),
+)
+
+# Label for requests that did not match any route (keeps label cardinality bounded)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _route_labels(scope: dict):
+    """Get (route template, router name) of a served request."""
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE, UNMATCHED_ROUTE
+    path = getattr(route, "path", UNMATCHED_ROUTE)
+    tags = getattr(route, "tags", None)
+    return path, str(tags[0]) if tags else path
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status codes and in-flight requests.
+
+    Routes are labeled with their template (/carts/{cart_id}), not the raw
+    path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # Reported if the app raises before starting a response
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+
+            method = scope["method"]
+            route, router = _route_labels(scope)
+            status_text = str(status)
+            HTTP_REQUEST_SECONDS.observe(elapsed, method, route)
+            HTTP_REQUESTS.inc(method, route, status_text)
+            if status >= 400:
+                HTTP_ERRORS.inc(router, status_text)
+
+
+def register_collectors():
+    """
+    Register scrape-time collectors for the API singletons.
+
+    Collectors only read existing instances; they never create the OTP or
+    token managers as a side effect of a scrape.
+    """
+    from api import dependencies
+    from api.routers import agent
+    from core.logging import get_logging_stats
+
+    def otp_active():
+        manager = dependencies._otp_manager
+        if manager is not None:
+            yield (), manager.get_stats()["active_otps"]
+
+    def auth_tokens_active():
+        manager = dependencies._auth_token_manager
+        if manager is not None:
+            active = manager.get_stats()["active_tokens"]
+            if active is not None:  # Not tracked for signed tokens
+                yield (), active
+
+    def agent_queue_depths():
+        if dependencies._state_backend is None:
+            return
+        for branch_id, depth in agent.get_queue_depths().items():
+            yield (branch_id,), depth
+
+    def log_queue_depth():
+        yield (), get_logging_stats()["queued"]
+
+    registry.register_collector(
+        "cartwise_log_queue_depth", "Log records waiting for the background writer", log_queue_depth,
+    )
+    registry.register_collector(
+        "cartwise_otp_active", "OTP codes currently stored", otp_active,
+    )
+    registry.register_collector(
+        "cartwise_auth_tokens_active", "Authentication tokens currently stored", auth_tokens_active,
+    )
+    registry.register_collector(
+        "cartwise_agent_queue_depth", "Commands waiting to be polled by each agent",
+        agent_queue_depths, ("branch_id",),
+    )
+
+    logger.debug("API metrics collectors registered")
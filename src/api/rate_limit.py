@@ -0,0 +1,108 @@
+"""
+API Rate Limits
+===============
+
+Per-phone and per-IP rate limit dependencies for the OTP and cart
+assignment endpoints. Rejected requests get 429 with a Retry-After header.
+
+Usage:
+    @router.post("/request-otp", dependencies=[Depends(RateLimited("otp", ...))])
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import math
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
+
+from core import settings, get_logger
+from core.constants import HTTPMessages
+from core.metrics import registry
+from utils.rate_limit import RateLimit, RateLimiter
+from api.dependencies import get_rate_limiter
+
+logger = get_logger(__name__)
+
+RATE_LIMITED = registry.counter(
+    "cartwise_rate_limited_total",
+    "Requests rejected by a rate limit",
+    ("scope",),
+)
+
+
+def client_ip(request: Request) -> str:
+    """
+    Get the client address used as the per-IP key.
+
+    X-Forwarded-For is only trusted when RATE_LIMIT_TRUST_PROXY is set
+    (the server runs behind a reverse proxy); otherwise clients could
+    pick their own key.
+    """
+    if settings.RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",", 1)[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def _body_phone(request: Request) -> Optional[str]:
+    """Get the "phone" field of a JSON body (already read and cached by FastAPI)."""
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    phone = body.get("phone") if isinstance(body, dict) else None
+    return str(phone) if phone else None
+
+
+class RateLimited:
+    """
+    Dependency enforcing a per-IP and a per-phone limit on an endpoint.
+
+    The IP is checked first, so requests from an abusive client do not
+    consume the buckets of the phone numbers it sends.
+    """
+
+    def __init__(self, name: str, per_phone: str, per_ip: str):
+        """
+        Initialize dependency.
+
+        Args:
+            name: Limit name (bucket scope and metric label)
+            per_phone: Limit per phone number (e.g. "3/minute")
+            per_ip: Limit per client IP (e.g. "30/minute")
+        """
+        self.name = name
+        self.per_phone = RateLimit.parse(per_phone)
+        self.per_ip = RateLimit.parse(per_ip)
+
+    async def __call__(self, request: Request, limiter: RateLimiter = Depends(get_rate_limiter)):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        ip = client_ip(request)
+        scope = f"{self.name}:ip"
+        wait = limiter.hit(scope, ip, self.per_ip)
+
+        if not wait:
+            phone = await _body_phone(request)
+            if phone:
+                scope = f"{self.name}:phone"
+                wait = limiter.hit(scope, phone, self.per_phone)
+
+        if wait:
+            RATE_LIMITED.inc(scope)
+            retry_after = max(1, math.ceil(wait))
+            logger.warning(f"Rate limit {scope} exceeded by {ip} (retry after {retry_after}s)")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=HTTPMessages.RATE_LIMITED,
+                headers={"Retry-After": str(retry_after)},
+            )
+
+
+otp_rate_limit = RateLimited("otp", settings.RATE_LIMIT_OTP_PHONE, settings.RATE_LIMIT_OTP_IP)
+verify_rate_limit = RateLimited("verify", settings.RATE_LIMIT_VERIFY_PHONE, settings.RATE_LIMIT_VERIFY_IP)
+assign_rate_limit = RateLimited("assign", settings.RATE_LIMIT_ASSIGN_PHONE, settings.RATE_LIMIT_ASSIGN_IP)
@@ -0,0 +1,101 @@
+"""
+Fast JSON Responses
+===================
+
+JSON encoding for high-volume endpoints.
+
+- FastJSONResponse: JSONResponse rendered with orjson when it is installed
+  (falls back to compact json.dumps). Set app-wide as the default response
+  class by create_app() when FAST_JSON_RESPONSES is enabled.
+- model_response(): serializes pydantic models straight to JSON bytes
+  with a TypeAdapter built once per type (pydantic-core), skipping
+  FastAPI's re-validation of the returned value, the intermediate
+  jsonable dict and the json.dumps pass.
+
+orjson is optional (pip install orjson).
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson (or compact json.dumps).
+
+    Bytes content is taken as already-encoded JSON and sent as is.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """
+    Get the (cached) TypeAdapter of a type.
+
+    Building an adapter compiles its serializer, so it is done once per
+    type, not per request.
+
+    Args:
+        tp: Model or typing type (e.g. List[Rental])
+
+    Returns:
+        TypeAdapter
+    """
+    return TypeAdapter(tp)
+
+
+def dump_json(value: Any, tp: Optional[Any] = None) -> bytes:
+    """
+    Serialize pydantic model(s) to JSON bytes.
+
+    Args:
+        value: Model instance, or a value of type `tp`
+        tp: Type of `value` (default: type(value)) - pass it for
+            containers, e.g. List[Rental]
+
+    Returns:
+        JSON bytes (same output as FastAPI's response_model path)
+    """
+    return type_adapter(tp if tp is not None else type(value)).dump_json(value)
+
+
+def model_response(value: Any, tp: Optional[Any] = None, status_code: int = 200) -> FastJSONResponse:
+    """
+    Build a response from pydantic model(s) without re-validating them.
+
+    Keep `response_model=` on the route for the OpenAPI schema; a returned
+    Response is sent as is.
+
+    Args:
+        value: Model instance, or a value of type `tp`
+        tp: Type of `value` (default: type(value))
+        status_code: HTTP status code
+
+    Returns:
+        JSON response
+    """
+    return FastJSONResponse(dump_json(value, tp), status_code=status_code)
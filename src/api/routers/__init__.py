@@ -13,6 +13,7 @@ from .carts import router as carts_router
 from .health import router as health_router
 from .rentals import router as rentals_router
 from .agent import router as agent_router
+from .events import router as events_router
 
 __all__ = [
     "auth_router",
@@ -20,4 +21,5 @@ __all__ = [
     "health_router",
     "rentals_router",
     "agent_router",
+    "events_router",
 ]
@@ -13,18 +13,20 @@ from typing import Optional, List, Dict
 from pydantic import BaseModel
 from datetime import datetime
 from core import get_logger
+from core.tracing import tracer, get_correlation_id
+from api.dependencies import get_state_backend
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api/agent", tags=["Agent"])
 
 
-# In-memory storage for commands and agent status
-# In production, use Redis or database
-_agent_commands: Dict[str, List[dict]] = {}  # branch_id -> [commands]
-_agent_status: Dict[str, dict] = {}  # branch_id -> status
-_command_results: Dict[str, dict] = {}  # command_id -> result
-_api_keys: Dict[str, str] = {}  # branch_id -> api_key
+# Commands, results, agent status and keys live in the state backend
+# (shared by all workers when STATE_DB_PATH is set)
+COMMAND_QUEUE_PREFIX = "agent:commands:"  # + branch_id -> [commands]
+STATUS_NAMESPACE = "agent:status"  # branch_id -> status
+RESULTS_NAMESPACE = "agent:results"  # command_id -> result
+API_KEYS_NAMESPACE = "agent:keys"  # branch_id -> api_key
 
 
 # Models
@@ -52,6 +54,8 @@ class CommandResultRequest(BaseModel):
     success: bool
     result: dict
     timestamp: str
+    correlation_id: Optional[str] = None  # Echoed from the command
+    spans: Optional[List[dict]] = None    # Timing spans recorded by the agent
 
 
 def verify_api_key(branch_id: str, authorization: str) -> bool:
@@ -61,14 +65,10 @@ def verify_api_key(branch_id: str, authorization: str) -> bool:
 
     api_key = authorization[7:]  # Remove 'Bearer '
 
-    # Check if branch has registered API key
-    if branch_id not in _api_keys:
-        # For demo, accept any key for now
-        # In production, check against database
-        _api_keys[branch_id] = api_key
-        return True
-
-    return _api_keys[branch_id] == api_key
+    # The first key a branch uses becomes its key
+    # For demo, accept any key for now
+    # In production, check against database
+    return get_state_backend().setdefault(API_KEYS_NAMESPACE, branch_id, api_key) == api_key
 
 
 @router.post("/register")
@@ -88,18 +88,14 @@ async def register_agent(
         raise HTTPException(status_code=401, detail="Invalid API key")
 
     # Store agent info
-    _agent_status[branch_id] = {
+    get_state_backend().set(STATUS_NAMESPACE, branch_id, {
         'agent_type': request.agent_type,
         'version': request.version,
         'capabilities': request.capabilities,
         'status': 'online',
         'last_seen': datetime.now().isoformat(),
         'registered_at': datetime.now().isoformat()
-    }
-
-    # Initialize command queue
-    if branch_id not in _agent_commands:
-        _agent_commands[branch_id] = []
+    })
 
     logger.info(f"Agent registered: {branch_id} ({request.agent_type} v{request.version})")
 
@@ -126,16 +122,13 @@ async def agent_heartbeat(
         raise HTTPException(status_code=401, detail="Invalid API key")
 
     # Update agent status
-    if branch_id in _agent_status:
-        _agent_status[branch_id]['status'] = request.status
-        _agent_status[branch_id]['last_seen'] = request.timestamp
-    else:
-        _agent_status[branch_id] = {
-            'status': request.status,
-            'last_seen': request.timestamp
-        }
+    backend = get_state_backend()
+    status = backend.get(STATUS_NAMESPACE, branch_id) or {}
+    status['status'] = request.status
+    status['last_seen'] = request.timestamp
+    backend.set(STATUS_NAMESPACE, branch_id, status)
 
-    logger.debug(f"Heartbeat from {branch_id}: {request.status}")
+    logger.debug("Heartbeat from %s: %s", branch_id, request.status)
 
     return {'success': True}
 
@@ -154,13 +147,26 @@ async def get_commands(
     if not verify_api_key(branch_id, authorization):
         raise HTTPException(status_code=401, detail="Invalid API key")
 
-    # Get commands for this branch
-    commands = _agent_commands.get(branch_id, [])
+    # Get (and clear) commands for this branch
+    commands = get_state_backend().pop_all(COMMAND_QUEUE_PREFIX + branch_id)
 
     if commands:
-        logger.debug(f"Returning {len(commands)} commands to {branch_id}")
-        # Clear commands after sending
-        _agent_commands[branch_id] = []
+        logger.debug("Returning %d commands to %s", len(commands), branch_id)
+
+        # Time spent waiting in the queue, on the trace of the request that queued it
+        now = datetime.now()
+        for command in commands:
+            if command.get('correlation_id'):
+                created_at = datetime.fromisoformat(command['created_at'])
+                tracer.record_span(
+                    "agent.queue_wait",
+                    command['correlation_id'],
+                    start=created_at.timestamp(),
+                    duration_ms=(now - created_at).total_seconds() * 1000,
+                    parent_id=command.get('parent_span_id'),
+                    command_id=command['id'],
+                    branch_id=branch_id,
+                )
         return {'commands': commands}
     else:
         # No commands - return 204 No Content
@@ -180,12 +186,17 @@ async def receive_command_result(
         raise HTTPException(status_code=401, detail="Invalid API key")
 
     # Store result
-    _command_results[request.command_id] = {
+    get_state_backend().set(RESULTS_NAMESPACE, request.command_id, {
         'branch_id': request.branch_id,
         'success': request.success,
         'result': request.result,
-        'timestamp': request.timestamp
-    }
+        'timestamp': request.timestamp,
+        'correlation_id': request.correlation_id
+    })
+
+    # Merge the agent's spans into the originating request's trace
+    if request.spans:
+        tracer.import_spans(request.spans[:100])
 
     logger.info(f"Command result received: {request.command_id} - {'SUCCESS' if request.success else 'FAILED'}")
 
@@ -205,9 +216,12 @@ async def disconnect_agent(
         raise HTTPException(status_code=401, detail="Invalid API key")
 
     # Update status
-    if branch_id in _agent_status:
-        _agent_status[branch_id]['status'] = 'offline'
-        _agent_status[branch_id]['last_seen'] = datetime.now().isoformat()
+    backend = get_state_backend()
+    status = backend.get(STATUS_NAMESPACE, branch_id)
+    if status is not None:
+        status['status'] = 'offline'
+        status['last_seen'] = datetime.now().isoformat()
+        backend.set(STATUS_NAMESPACE, branch_id, status)
 
     logger.info(f"Agent disconnected: {branch_id}")
 
@@ -235,7 +249,8 @@ def send_command_to_agent(branch_id: str, command_type: str, params: dict) -> st
     import uuid
 
     # Check if agent is online
-    if branch_id not in _agent_status or _agent_status[branch_id]['status'] != 'online':
+    status = get_agent_status(branch_id)
+    if status is None or status['status'] != 'online':
         logger.error(f"Agent {branch_id} is not online")
         raise Exception(f"Agent {branch_id} is offline")
 
@@ -245,14 +260,13 @@ def send_command_to_agent(branch_id: str, command_type: str, params: dict) -> st
         'id': command_id,
         'type': command_type,
         'params': params,
-        'created_at': datetime.now().isoformat()
+        'created_at': datetime.now().isoformat(),
+        'correlation_id': get_correlation_id(),
+        'parent_span_id': tracer.current_span_id()
     }
 
     # Add to command queue
-    if branch_id not in _agent_commands:
-        _agent_commands[branch_id] = []
-
-    _agent_commands[branch_id].append(command)
+    get_state_backend().push(COMMAND_QUEUE_PREFIX + branch_id, command)
 
     logger.info(f"Command queued for {branch_id}: {command_type} (ID: {command_id})")
 
@@ -273,20 +287,36 @@ def wait_for_command_result(command_id: str, timeout: float = 10.0) -> Optional[
     import time
 
     start_time = time.time()
+    backend = get_state_backend()
+
+    with tracer.span("agent.wait_result", command_id=command_id) as span:
+        while time.time() - start_time < timeout:
+            result = backend.pop(RESULTS_NAMESPACE, command_id)
+            if result is not None:
+                return result
 
-    while time.time() - start_time < timeout:
-        if command_id in _command_results:
-            result = _command_results[command_id]
-            # Remove from results
-            del _command_results[command_id]
-            return result
+            time.sleep(0.1)  # Check every 100ms
 
-        time.sleep(0.1)  # Check every 100ms
+        if span is not None:
+            span.status = "timeout"
 
     logger.warning(f"Timeout waiting for command result: {command_id}")
     return None
 
 
+def get_queue_depths() -> Dict[str, int]:
+    """
+    Get the number of pending commands per agent.
+
+    Returns:
+        Dictionary of branch_id -> queued commands
+    """
+    return {
+        queue[len(COMMAND_QUEUE_PREFIX):]: depth
+        for queue, depth in get_state_backend().queue_lengths(COMMAND_QUEUE_PREFIX).items()
+    }
+
+
 def get_agent_status(branch_id: str) -> Optional[dict]:
     """
     Get agent status.
@@ -297,7 +327,7 @@ def get_agent_status(branch_id: str) -> Optional[dict]:
     Returns:
         Agent status or None
     """
-    return _agent_status.get(branch_id)
+    return get_state_backend().get(STATUS_NAMESPACE, branch_id)
 
 
 def list_agents() -> List[dict]:
@@ -309,5 +339,5 @@ def list_agents() -> List[dict]:
     """
     return [
         {'branch_id': branch_id, **status}
-        for branch_id, status in _agent_status.items()
+        for branch_id, status in get_state_backend().items(STATUS_NAMESPACE).items()
     ]
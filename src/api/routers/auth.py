@@ -13,15 +13,17 @@ from typing import Optional
 
 from core import get_logger
 from core.constants import HTTPMessages
+from core.tracing import tracer
 from models import OTPRequest, OTPVerifyRequest
 from api.dependencies import get_otp_manager, get_sms_provider, get_auth_token_manager
+from api.rate_limit import otp_rate_limit, verify_rate_limit
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/request-otp")
+@router.post("/request-otp", dependencies=[Depends(otp_rate_limit)])
 async def request_otp(
     request: OTPRequest,
     otp_manager=Depends(get_otp_manager),
@@ -62,7 +64,8 @@ async def request_otp(
     otp_code = otp_manager.generate_otp(request.phone)
 
     # Send SMS
-    sms_response = sms_provider.send_otp(request.phone, otp_code)
+    with tracer.span("sms.send_otp"):
+        sms_response = sms_provider.send_otp(request.phone, otp_code)
 
     if not sms_response.success:
         raise HTTPException(
@@ -80,7 +83,7 @@ async def request_otp(
     }
 
 
-@router.post("/verify-otp")
+@router.post("/verify-otp", dependencies=[Depends(verify_rate_limit)])
 async def verify_otp(
     request: OTPVerifyRequest,
     otp_manager=Depends(get_otp_manager),
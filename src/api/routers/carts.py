@@ -10,10 +10,14 @@ Version: 1.0.0
 
 from typing import List, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, HTTPException, status, Depends, Header
+from functools import partial
+import asyncio
+import contextvars
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Request
 
 from core import get_logger, settings
 from core.constants import HTTPMessages
+from core.tracing import tracer
 from models import (
     Cart,
     CartStatus,
@@ -28,9 +32,15 @@ from api.dependencies import (
     get_sms_provider,
     get_lock_controller,
     get_carts_db,
-    get_rental_db,
+    get_async_rental_db,
     get_auth_token_manager,
+    get_event_bus,
+    get_state_sync,
 )
+from api.cache import response_cache
+from api.responses import dump_json
+from api.rate_limit import assign_rate_limit
+from utils.events import Event, TOPIC_CART, TOPIC_LOCKER, TOPIC_CART_RETURNED, publish_cart, publish_rental
 
 logger = get_logger(__name__)
 
@@ -40,17 +50,57 @@ router = APIRouter(prefix="/carts", tags=["Carts"])
 DEFAULT_RENTAL_DURATION = 120
 
 
+async def run_blocking(func, *args):
+    """
+    Run a blocking call on a worker thread.
+
+    Lock controller calls block on the serial port - or, on a follower
+    worker, until the leader has run the forwarded command - and cart
+    claims write the shared state, so neither runs on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context (trace spans) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(None, partial(context.run, func, *args))
+
+
 @router.get("", response_model=List[Cart])
-async def get_carts(carts_db=Depends(get_carts_db)):
-    """Get all carts with their current status."""
-    return list(carts_db.values())
+async def get_carts(
+    request: Request,
+    carts_db=Depends(get_carts_db),
+    event_bus=Depends(get_event_bus),
+):
+    """
+    Get all carts with their current status.
+
+    Every cart change publishes a cart event, so the cart topic version is
+    the fleet version: the body is serialized once per version and clients
+    sending If-None-Match with the current ETag get 304.
+    """
+    return response_cache.response(
+        request,
+        "carts",
+        event_bus.version(TOPIC_CART),
+        lambda: dump_json(list(carts_db.values()), List[Cart]),
+    )
 
 
 @router.get("/available", response_model=List[Cart])
-async def get_available_carts(carts_db=Depends(get_carts_db)):
-    """Get available carts."""
-    available = [cart for cart in carts_db.values() if cart.status == CartStatus.AVAILABLE]
-    return available
+async def get_available_carts(
+    request: Request,
+    carts_db=Depends(get_carts_db),
+    event_bus=Depends(get_event_bus),
+):
+    """Get available carts (cached per fleet version, like GET /carts)."""
+    return response_cache.response(
+        request,
+        "carts_available",
+        event_bus.version(TOPIC_CART),
+        lambda: dump_json(
+            [cart for cart in carts_db.values() if cart.status == CartStatus.AVAILABLE],
+            List[Cart],
+        ),
+    )
 
 
 @router.get("/{cart_id}", response_model=Cart)
@@ -61,15 +111,17 @@ async def get_cart(cart_id: int, carts_db=Depends(get_carts_db)):
     return carts_db[cart_id]
 
 
-@router.post("/assign")
+@router.post("/assign", dependencies=[Depends(assign_rate_limit)])
 async def assign_cart(
     request: CartAssignmentRequest,
     otp_manager=Depends(get_otp_manager),
     sms_provider=Depends(get_sms_provider),
     lock_controller=Depends(get_lock_controller),
     carts_db=Depends(get_carts_db),
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
     auth_token_manager=Depends(get_auth_token_manager),
+    event_bus=Depends(get_event_bus),
+    state_sync=Depends(get_state_sync),
     authorization: Optional[str] = Header(None),
 ):
     """
@@ -98,19 +150,26 @@ async def assign_cart(
             )
 
     # Check if user already has an active rental
-    active_rental = rental_db.get_active_rental_by_phone(request.phone)
+    active_rental = await rental_db.get_active_rental_by_phone(request.phone)
     if active_rental:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"יש לך כבר עגלה פעילה (מספר {active_rental.cart_id}). החזר אותה לפני שאתה לוקח עגלה חדשה."
         )
 
-    # Find available cart
+    # Find and claim an available cart (other workers may claim the same one)
     available_cart = None
-    for cart in carts_db.values():
-        if cart.status == CartStatus.AVAILABLE:
+    for cart in list(carts_db.values()):
+        if cart.status != CartStatus.AVAILABLE:
+            continue
+        before = cart.model_dump(mode="json")
+        cart.assign(request.phone)
+        # Published only once the rental exists - invalidate GET /carts now
+        event_bus.bump(TOPIC_CART)
+        if await run_blocking(state_sync.claim_cart, cart, before):
             available_cart = cart
             break
+        event_bus.bump(TOPIC_CART)  # Local copy replaced with the shared state
 
     if not available_cart:
         raise HTTPException(
@@ -120,8 +179,12 @@ async def assign_cart(
 
     # Unlock the cart
     if lock_controller:
-        success = lock_controller.unlock_cart(available_cart.locker_id)
+        with tracer.span("rs485.unlock_cart", locker_id=available_cart.locker_id):
+            success = await run_blocking(lock_controller.unlock_cart, available_cart.locker_id)
         if not success:
+            # Release the claim
+            carts_db[available_cart.cart_id] = Cart.model_validate(before)
+            publish_cart(event_bus, carts_db[available_cart.cart_id])
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=HTTPMessages.LOCK_ERROR,
@@ -129,9 +192,6 @@ async def assign_cart(
     else:
         logger.warning("Running in demo mode - skipping actual unlock")
 
-    # Assign cart
-    available_cart.assign(request.phone)
-
     # Create rental record
     start_time = datetime.now()
     expected_return = start_time + timedelta(minutes=DEFAULT_RENTAL_DURATION)
@@ -144,11 +204,16 @@ async def assign_cart(
         expected_return=expected_return
     )
 
-    rental_id = rental_db.create_rental(rental)
+    rental_id = await rental_db.create_rental(rental)
+    rental.rental_id = rental_id
     logger.info(f"Created rental record {rental_id} for cart {available_cart.cart_id}")
 
+    publish_cart(event_bus, available_cart)
+    publish_rental(event_bus, rental, "created")
+
     # Send confirmation SMS with return time
-    sms_provider.send_confirmation(request.phone, available_cart.cart_id)
+    with tracer.span("sms.send_confirmation"):
+        sms_provider.send_confirmation(request.phone, available_cart.cart_id)
 
     logger.info(f"Cart {available_cart.cart_id} assigned to {request.phone} (rental {rental_id})")
 
@@ -167,6 +232,7 @@ async def return_cart(
     request: CartReturnRequest,
     lock_controller=Depends(get_lock_controller),
     carts_db=Depends(get_carts_db),
+    event_bus=Depends(get_event_bus),
 ):
     """Return a cart. Locks the cart and marks it as available."""
     logger.info(f"Cart {cart_id} return requested by {request.phone}")
@@ -185,7 +251,7 @@ async def return_cart(
 
     # Lock the cart
     if lock_controller:
-        success = lock_controller.lock_cart(cart.locker_id)
+        success = await run_blocking(lock_controller.lock_cart, cart.locker_id)
         if not success:
             logger.warning(f"Failed to lock cart {cart_id}, but marking as returned anyway")
     else:
@@ -194,6 +260,7 @@ async def return_cart(
     # Mark as returned
     cart.return_cart()
     cart.mark_available()
+    publish_cart(event_bus, cart)
 
     logger.info(f"Cart {cart_id} returned and now available")
 
@@ -205,6 +272,7 @@ async def check_cart_return(
     cart_id: int,
     lock_controller=Depends(get_lock_controller),
     carts_db=Depends(get_carts_db),
+    event_bus=Depends(get_event_bus),
 ):
     """Check if cart was physically returned (micro-switch)."""
     if cart_id not in carts_db:
@@ -213,13 +281,14 @@ async def check_cart_return(
     cart = carts_db[cart_id]
 
     if lock_controller:
-        is_returned = lock_controller.check_cart_returned(cart.locker_id)
+        is_returned = await run_blocking(lock_controller.check_cart_returned, cart.locker_id)
 
         if is_returned and cart.status == CartStatus.IN_USE:
             # Auto-lock and mark as returned
-            lock_controller.auto_lock_on_return(cart.locker_id)
+            await run_blocking(lock_controller.auto_lock_on_return, cart.locker_id)
             cart.return_cart()
             cart.mark_available()
+            publish_cart(event_bus, cart)
 
             logger.info(f"Cart {cart_id} auto-returned (micro-switch detected)")
 
@@ -233,7 +302,7 @@ async def initiate_cart_return(
     request: CartReturnInitRequest,
     lock_controller=Depends(get_lock_controller),
     carts_db=Depends(get_carts_db),
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
 ):
     """
     Initiate cart return process.
@@ -252,7 +321,7 @@ async def initiate_cart_return(
     logger.info(f"Cart return initiated by {request.phone}")
 
     # Check if user has an active rental (use rental_db as source of truth)
-    active_rental = rental_db.get_active_rental_by_phone(request.phone)
+    active_rental = await rental_db.get_active_rental_by_phone(request.phone)
 
     if not active_rental:
         raise HTTPException(
@@ -305,7 +374,8 @@ async def complete_cart_return(
     request: CartReturnRequest,
     lock_controller=Depends(get_lock_controller),
     carts_db=Depends(get_carts_db),
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
+    event_bus=Depends(get_event_bus),
 ):
     """
     Complete cart return after physical placement detected.
@@ -319,7 +389,7 @@ async def complete_cart_return(
     logger.info(f"Checking return completion for {request.phone}")
 
     # Get active rental (source of truth)
-    active_rental = rental_db.get_active_rental_by_phone(request.phone)
+    active_rental = await rental_db.get_active_rental_by_phone(request.phone)
 
     if not active_rental:
         raise HTTPException(
@@ -338,16 +408,19 @@ async def complete_cart_return(
 
     # Check if cart was returned using lock controller
     if lock_controller:
-        is_returned = lock_controller.check_cart_returned(user_cart.locker_id)
+        is_returned = await run_blocking(lock_controller.check_cart_returned, user_cart.locker_id)
 
         if is_returned:
             # Cart detected - complete return process
             user_cart.return_cart()
             user_cart.mark_available()
+            event_bus.bump(TOPIC_CART)
 
             # CRITICAL: Update rental in database
             active_rental.mark_returned()
-            rental_db.update_rental(active_rental)
+            await rental_db.update_rental(active_rental)
+            publish_cart(event_bus, user_cart)
+            publish_rental(event_bus, active_rental, "returned")
 
             logger.info(f"Cart return completed successfully for {request.phone} (rental {active_rental.rental_id})")
 
@@ -370,7 +443,9 @@ async def complete_cart_return(
 
         # CRITICAL: Update rental in database
         active_rental.mark_returned()
-        rental_db.update_rental(active_rental)
+        await rental_db.update_rental(active_rental)
+        publish_cart(event_bus, user_cart)
+        publish_rental(event_bus, active_rental, "returned")
 
         logger.info(f"Cart return completed in demo mode for {request.phone} (rental {active_rental.rental_id})")
 
@@ -379,3 +454,97 @@ async def complete_cart_return(
             "message": "העגלה הוחזרה בהצלחה (Demo mode)",
             "returned": True,
         }
+
+
+def _is_return_event(event: Event, rental: Rental, cart: Cart) -> bool:
+    """Check whether an event shows the rental's cart back in its locker."""
+    if event.topic == TOPIC_CART_RETURNED:
+        return event.data["rental_id"] == rental.rental_id
+    return (
+        event.key == str(cart.locker_id)
+        and event.data["closed"]
+        and event.data["cart_inside"]
+    )
+
+
+@router.post("/wait-return")
+async def wait_cart_return(
+    request: CartReturnRequest,
+    timeout: float = Query(25.0, ge=1.0, le=60.0, description="Seconds to wait for the return"),
+    lock_controller=Depends(get_lock_controller),
+    carts_db=Depends(get_carts_db),
+    rental_db=Depends(get_async_rental_db),
+    event_bus=Depends(get_event_bus),
+):
+    """
+    Wait (long-poll) until the user's cart is back in its locker.
+
+    Resolves as soon as the CU16 monitor reports the cart's locker closed
+    with a cart inside, or after `timeout` seconds with returned=False (the
+    kiosk then simply calls again). Waiting clients cause no RS485 traffic:
+    they only listen to the monitor's locker events.
+
+    Returns:
+        Status of return completion (same shape as /complete-return)
+    """
+    if not lock_controller:
+        # Demo mode - complete-return auto-completes
+        return await complete_cart_return(request, lock_controller, carts_db, rental_db, event_bus)
+
+    # Overdue rentals can be returned too
+    active_rental = await rental_db.get_open_rental_by_phone(request.phone)
+    if not active_rental:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="לא נמצאה עגלה פעילה (No active cart found)",
+        )
+
+    user_cart = carts_db.get(active_rental.cart_id)
+    if not user_cart:
+        logger.error(f"Cart {active_rental.cart_id} not found in carts_db but has active rental!")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="שגיאה פנימית - עגלה לא נמצאה (Internal error - cart not found)",
+        )
+
+    logger.info(f"Waiting up to {timeout:g}s for cart {user_cart.cart_id} return (locker {user_cart.locker_id})")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    # Subscribe before looking at the last known state, so no change is missed
+    with event_bus.subscribe(TOPIC_LOCKER, TOPIC_CART_RETURNED) as subscription:
+        event = event_bus.latest(TOPIC_LOCKER, str(user_cart.locker_id))
+        if event is not None and event.timestamp < active_rental.start_time.timestamp():
+            # Retained from before this rental (e.g. the cart sitting in the
+            # locker before it was unlocked) - wait for a newer state
+            event = None
+        while event is None or not _is_return_event(event, active_rental, user_cart):
+            remaining = deadline - loop.time()
+            event = await subscription.get(remaining) if remaining > 0 else None
+            if event is None:
+                return {
+                    "success": False,
+                    "message": "העגלה עדיין לא זוהתה במנעול (Cart not yet detected in lock)",
+                    "returned": False,
+                }
+
+    if event.topic == TOPIC_LOCKER:
+        # The monitor records returns of active rentals itself (before it
+        # publishes locker events); record the rest (e.g. overdue) here
+        rental = await rental_db.get_open_rental_by_phone(request.phone)
+        if rental and rental.rental_id == active_rental.rental_id:
+            user_cart.return_cart()
+            user_cart.mark_available()
+            rental.mark_returned()
+            await rental_db.update_rental(rental)
+            publish_cart(event_bus, user_cart)
+            publish_rental(event_bus, rental, "returned")
+
+    logger.info(f"Cart return completed for {request.phone} (rental {active_rental.rental_id})")
+
+    return {
+        "success": True,
+        "message": "העגלה הוחזרה בהצלחה! (Cart returned successfully!)",
+        "returned": True,
+    }
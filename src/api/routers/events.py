@@ -0,0 +1,196 @@
+"""
+Events Router
+=============
+
+Server-Sent Events stream of fleet state for dashboards.
+
+A client receives one "snapshot" event (carts, lockers, open rentals,
+counts) followed by deltas as they happen: cart, rental, locker and
+cart_returned events from the in-process event bus. Nothing is polled
+per client; every event is serialized once and shared by all streams.
+
+Each client has a bounded buffer. A client that falls behind gets an
+"overflow" event and is disconnected - it reconnects and starts over
+from a fresh snapshot instead of silently missing deltas.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import json
+import time
+from typing import Callable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from core import get_logger, settings
+from core.metrics import registry
+from models import CartStatus
+from api.dependencies import get_event_bus, get_carts_db, get_async_rental_db
+from utils.events import ALL_TOPICS, TOPIC_LOCKER
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+SSE_CLIENTS = registry.gauge(
+    "cartwise_sse_clients",
+    "Connected Server-Sent Events clients",
+)
+SSE_DISCONNECTED_SLOW = registry.counter(
+    "cartwise_sse_slow_clients_total",
+    "SSE clients disconnected because their buffer overflowed",
+)
+
+# Open rentals of the last snapshot: (bus event count when read, rentals)
+_rentals_cache: Optional[tuple] = None
+
+_connected = 0
+
+
+class _EventStreamResponse(StreamingResponse):
+    """
+    Streaming response that runs `on_close` when the response ends.
+
+    A stream cancelled by a client disconnect leaves its generator
+    suspended (it is only finalized when garbage collected), so the
+    subscription is released here instead.
+    """
+
+    def __init__(self, content, on_close: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self._on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._on_close()
+
+
+def _sse(event: str, data: dict) -> bytes:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+
+
+async def _open_rentals(event_bus, rental_db) -> list:
+    """
+    Get open rentals for a snapshot.
+
+    Reused while no event was published since it was read, so a burst of
+    (re)connecting dashboards costs one database read.
+    """
+    global _rentals_cache
+    published = event_bus.published
+    if _rentals_cache is not None and _rentals_cache[0] == published:
+        return _rentals_cache[1]
+
+    rentals = [rental.model_dump(mode="json") for rental in await rental_db.get_open_rentals()]
+    _rentals_cache = (published, rentals)
+    return rentals
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    topics: Optional[str] = Query(
+        None, description="Comma-separated topics (default: cart,rental,locker,cart_returned)"
+    ),
+    event_bus=Depends(get_event_bus),
+    carts_db=Depends(get_carts_db),
+    rental_db=Depends(get_async_rental_db),
+):
+    """
+    Stream fleet state as Server-Sent Events.
+
+    Event types: snapshot, cart, rental, locker, cart_returned, overflow.
+    A comment line is sent every EVENTS_KEEPALIVE_SECONDS while idle.
+
+    Returns:
+        text/event-stream response
+    """
+    global _connected
+
+    selected = tuple(t.strip() for t in topics.split(",")) if topics else ALL_TOPICS
+    unknown = [t for t in selected if t not in ALL_TOPICS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown topics: {', '.join(unknown)}",
+        )
+
+    if _connected >= settings.EVENTS_MAX_CLIENTS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event stream clients",
+        )
+
+    # Subscribe before reading the snapshot, so no delta falls in between
+    # (a delta already contained in the snapshot is harmless - events carry full state)
+    subscription = event_bus.subscribe(*selected, max_queue=settings.EVENTS_CLIENT_BUFFER)
+    try:
+        carts = list(carts_db.values())
+        snapshot = {
+            "timestamp": time.time(),
+            "carts": [cart.model_dump(mode="json") for cart in carts],
+            "lockers": [event.data for event in event_bus.snapshot(TOPIC_LOCKER)],
+            "rentals": await _open_rentals(event_bus, rental_db),
+            "counts": {
+                "total_carts": len(carts),
+                "available": sum(1 for c in carts if c.status == CartStatus.AVAILABLE),
+                "in_use": sum(1 for c in carts if c.status == CartStatus.IN_USE),
+                "maintenance": sum(1 for c in carts if c.status == CartStatus.MAINTENANCE),
+            },
+        }
+    except BaseException:
+        subscription.close()
+        raise
+
+    _connected += 1
+    SSE_CLIENTS.inc()
+    client = request.client.host if request.client else "unknown"
+    logger.debug("SSE client %s connected (%d clients)", client, _connected)
+
+    closed = False
+
+    def close():
+        global _connected
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        subscription.close()
+        _connected -= 1
+        SSE_CLIENTS.dec()
+        logger.debug("SSE client %s disconnected", client)
+
+    async def stream():
+        try:
+            yield _sse("snapshot", snapshot)
+
+            while True:
+                event = await subscription.get(settings.EVENTS_KEEPALIVE_SECONDS)
+
+                if subscription.overflowed:
+                    SSE_DISCONNECTED_SLOW.inc()
+                    logger.warning(f"SSE client {client} too slow - dropped {subscription.dropped} events, disconnecting")
+                    yield _sse("overflow", {"dropped": subscription.dropped})
+                    return
+
+                if event is None:
+                    if await request.is_disconnected():
+                        return
+                    yield b": keepalive\n\n"
+                    continue
+
+                yield event.sse
+        finally:
+            close()
+
+    return _EventStreamResponse(
+        stream(),
+        on_close=close,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
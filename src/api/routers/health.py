@@ -9,13 +9,15 @@ Version: 1.0.0
 """
 
 from datetime import datetime
-from fastapi import APIRouter, Depends
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse, Response
 import os
 
 from core import get_logger, settings
+from core.metrics import registry, CONTENT_TYPE_LATEST
+from core.tracing import tracer
 from models import HealthResponse, CartStatus
-from api.dependencies import get_otp_manager, get_lock_controller, get_carts_db
+from api.dependencies import get_otp_manager, get_lock_controller, get_carts_db, get_readiness
 
 logger = get_logger(__name__)
 
@@ -50,18 +52,41 @@ async def health_check(
     return HealthResponse(
         status="healthy",
         timestamp=datetime.now(),
-        rs485_connected=(
-            lock_controller is not None
-            and lock_controller.serial
-            and lock_controller.serial.is_open
-            if lock_controller
-            else False
-        ),
+        rs485_connected=lock_controller is not None and lock_controller.is_connected,
         sms_configured=bool(settings.INFORU_USERNAME and settings.INFORU_PASSWORD),
         active_carts=active_carts,
     )
 
 
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness probe.
+
+    Answers as soon as the process serves HTTP; touches no services.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe.
+
+    200 once the rental database is open and the monitor is running,
+    503 while they are starting (or failed). The RS485 connection is
+    reported but not required (without it the API runs in demo mode).
+
+    Returns:
+        Readiness and component states
+    """
+    result = get_readiness()
+    return JSONResponse(
+        result,
+        status_code=200 if result["ready"] else 503,
+    )
+
+
 @router.get("/stats")
 async def get_stats(otp_manager=Depends(get_otp_manager), carts_db=Depends(get_carts_db)):
     """
@@ -83,3 +108,68 @@ async def get_stats(otp_manager=Depends(get_otp_manager), carts_db=Depends(get_c
         "otp_stats": otp_manager.get_stats(),
         "timestamp": datetime.now(),
     }
+
+
+@router.get("/hardware/metrics")
+async def get_hardware_metrics(lock_controller=Depends(get_lock_controller)):
+    """
+    Get RS485 command latency histograms and counters.
+
+    Enabled with RS485_METRICS_ENABLED=true. Durations are per command
+    type and phase (build, write, turnaround, read, parse, reset, total).
+
+    Returns:
+        RS485 metrics snapshot
+    """
+    if not lock_controller:
+        return {"enabled": False, "connected": False, "message": "RS485 controller not available"}
+
+    return {
+        "connected": lock_controller.is_connected,
+        **lock_controller.get_metrics(),
+        "timestamp": datetime.now(),
+    }
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint.
+
+    Returns:
+        All process metrics in the Prometheus text exposition format
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+@router.get("/traces")
+async def get_traces(limit: int = Query(50, ge=1, le=500)):
+    """
+    Get the most recent request traces.
+
+    Each trace groups the spans of one correlation ID (HTTP request,
+    database operations, RS485 commands, agent queue wait and agent
+    execution), newest first.
+
+    Returns:
+        Recent traces
+    """
+    traces = tracer.export(limit=limit)
+    return {"count": len(traces), "traces": traces}
+
+
+@router.get("/traces/{correlation_id}")
+async def get_trace(correlation_id: str):
+    """
+    Get all spans of one request.
+
+    Args:
+        correlation_id: Value of the X-Correlation-ID response header
+
+    Returns:
+        Spans ordered by start time
+    """
+    spans = tracer.get_trace(correlation_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"correlation_id": correlation_id, "spans": spans}
@@ -9,11 +9,13 @@ Version: 1.0.0
 """
 
 from typing import List, Optional
+from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 
 from core import get_logger
 from models import Rental, RentalHistoryResponse
-from api.dependencies import get_rental_db, get_monitor
+from api.dependencies import get_async_rental_db, get_monitor, get_carts_db
+from api.responses import model_response
 
 logger = get_logger(__name__)
 
@@ -24,7 +26,7 @@ router = APIRouter(prefix="/rentals", tags=["Rentals"])
 async def get_rental_history(
     phone: Optional[str] = Query(None, description="Filter by phone number"),
     limit: int = Query(100, description="Maximum number of records"),
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
 ):
     """
     Get rental history.
@@ -38,20 +40,20 @@ async def get_rental_history(
     """
     logger.info(f"Rental history requested (phone={phone}, limit={limit})")
 
-    rentals = rental_db.get_rental_history(phone=phone, limit=limit)
-    stats = rental_db.get_statistics()
+    rentals = await rental_db.get_rental_history(phone=phone, limit=limit)
+    stats = await rental_db.get_statistics()
 
-    return RentalHistoryResponse(
+    return model_response(RentalHistoryResponse(
         rentals=rentals,
         total_count=stats.get("total_rentals", 0),
         active_count=stats.get("active_rentals", 0),
         late_count=stats.get("overdue_rentals", 0) + stats.get("late_returns", 0),
-    )
+    ))
 
 
 @router.get("/active", response_model=List[Rental])
 async def get_active_rentals(
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
 ):
     """
     Get all currently active rentals.
@@ -61,15 +63,15 @@ async def get_active_rentals(
     """
     logger.info("Active rentals requested")
 
-    all_rentals = rental_db.get_rental_history(limit=1000)
-    active_rentals = [r for r in all_rentals if r.status.value == "active"]
+    open_rentals = await rental_db.get_open_rentals()
+    active_rentals = [r for r in open_rentals if r.status.value == "active"]
 
-    return active_rentals
+    return model_response(active_rentals, List[Rental])
 
 
 @router.get("/overdue", response_model=List[Rental])
 async def get_overdue_rentals(
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
 ):
     """
     Get all overdue rentals.
@@ -79,15 +81,15 @@ async def get_overdue_rentals(
     """
     logger.info("Overdue rentals requested")
 
-    overdue = rental_db.get_overdue_rentals()
+    overdue = await rental_db.get_overdue_rentals()
 
-    return overdue
+    return model_response(overdue, List[Rental])
 
 
 @router.get("/my-rental")
 async def get_my_rental(
     phone: str = Query(..., description="Phone number"),
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
 ):
     """
     Get current active rental for a user.
@@ -100,7 +102,7 @@ async def get_my_rental(
     """
     logger.info(f"Rental lookup for {phone}")
 
-    rental = rental_db.get_active_rental_by_phone(phone)
+    rental = await rental_db.get_active_rental_by_phone(phone)
 
     if not rental:
         raise HTTPException(
@@ -119,7 +121,7 @@ async def get_my_rental(
 @router.get("/{rental_id}", response_model=Rental)
 async def get_rental(
     rental_id: int,
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
 ):
     """
     Get rental by ID.
@@ -132,7 +134,7 @@ async def get_rental(
     """
     logger.info(f"Rental {rental_id} requested")
 
-    rental = rental_db.get_rental(rental_id)
+    rental = await rental_db.get_rental(rental_id)
 
     if not rental:
         raise HTTPException(
@@ -145,7 +147,7 @@ async def get_rental(
 
 @router.get("/stats/summary")
 async def get_rental_stats(
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
 ):
     """
     Get rental statistics summary.
@@ -155,11 +157,57 @@ async def get_rental_stats(
     """
     logger.info("Rental statistics requested")
 
-    stats = rental_db.get_statistics()
+    stats = await rental_db.get_statistics()
 
     return stats
 
 
+@router.get("/stats/timeseries")
+async def get_rental_timeseries(
+    granularity: str = Query("hour", description="Bucket size: hour or day"),
+    start: Optional[datetime] = Query(None, description="Range start (default: 24 buckets ago)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    cart_id: Optional[int] = Query(None, description="Filter by cart"),
+    branch_id: Optional[str] = Query(None, description="Branch (default: this server's branch)"),
+    rental_db=Depends(get_async_rental_db),
+    carts_db=Depends(get_carts_db),
+):
+    """
+    Get rental analytics over time.
+
+    Answered from the pre-aggregated rollups (utilization, average rental
+    duration and late-return rate per bucket), never from the rentals table.
+
+    Returns:
+        Time series of buckets
+    """
+    logger.info(f"Rental timeseries requested (granularity={granularity}, cart_id={cart_id})")
+
+    if granularity not in ("hour", "day"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="granularity must be 'hour' or 'day'"
+        )
+
+    end = end or datetime.now()
+    if start is None:
+        start = end - (timedelta(hours=24) if granularity == "hour" else timedelta(days=30))
+
+    capacity = 1 if cart_id is not None else len(carts_db)
+    series = await rental_db.get_timeseries(
+        granularity, start, end, cart_id=cart_id, branch_id=branch_id, capacity=capacity
+    )
+
+    return {
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "cart_id": cart_id,
+        "branch_id": branch_id or rental_db.branch_id,
+        "buckets": series,
+    }
+
+
 @router.get("/monitor/status")
 async def get_monitor_status(
     monitor=Depends(get_monitor),
@@ -184,7 +232,7 @@ async def get_monitor_status(
 @router.post("/force-complete/{rental_id}")
 async def force_complete_rental(
     rental_id: int,
-    rental_db=Depends(get_rental_db),
+    rental_db=Depends(get_async_rental_db),
 ):
     """
     Force complete a rental (admin/debug use).
@@ -197,7 +245,7 @@ async def force_complete_rental(
     """
     logger.warning(f"Force completing rental {rental_id}")
 
-    rental = rental_db.get_rental(rental_id)
+    rental = await rental_db.get_rental(rental_id)
 
     if not rental:
         raise HTTPException(
@@ -206,7 +254,7 @@ async def force_complete_rental(
         )
 
     rental.mark_returned()
-    rental_db.update_rental(rental)
+    await rental_db.update_rental(rental)
 
     return {
         "success": True,
@@ -0,0 +1,70 @@
+"""
+API Tracing
+===========
+
+ASGI middleware assigning a correlation ID to every request.
+
+The ID is taken from the X-Correlation-ID request header (so a caller can
+tie its own logs to ours) or generated, returned in the response header
+and active for everything the request does (see core.tracing).
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+from core.tracing import CORRELATION_HEADER, correlation_context, new_correlation_id, tracer
+
+_HEADER_KEY = CORRELATION_HEADER.lower().encode("latin-1")
+
+# Incoming IDs longer than this are replaced (they end up in memory and logs)
+MAX_CORRELATION_ID_LENGTH = 64
+
+# High-frequency polling/scrape paths that would flush real traces out of the buffer
+UNTRACED_PATH_PREFIXES = (
+    "/api/agent/commands/",
+    "/api/agent/heartbeat/",
+    "/events/stream",  # Long-lived; a root span would stay open for hours
+    "/health/",        # Liveness/readiness probes
+    "/metrics",
+    "/traces",
+    "/static/",
+)
+
+
+def _incoming_correlation_id(scope: dict):
+    """Get a usable correlation ID from the request headers."""
+    for key, value in scope.get("headers", ()):
+        if key == _HEADER_KEY:
+            correlation_id = value.decode("latin-1").strip()
+            if 0 < len(correlation_id) <= MAX_CORRELATION_ID_LENGTH and correlation_id.isprintable():
+                return correlation_id
+    return None
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(UNTRACED_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = _incoming_correlation_id(scope) or new_correlation_id()
+        header = (_HEADER_KEY, correlation_id.encode("latin-1"))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+                if root is not None:
+                    root.attributes["status"] = message["status"]
+            await send(message)
+
+        with correlation_context(correlation_id):
+            with tracer.span(f"HTTP {scope['method']}", path=scope["path"]) as root:
+                await self.app(scope, receive, send_wrapper)
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"HTTP {scope['method']} {route.path}"
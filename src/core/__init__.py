@@ -9,15 +9,28 @@ Version: 1.0.0
 """
 
 from .config import settings
-from .logging import setup_logging, get_logger, log_function_call, log_function_exit
+from .logging import (
+    setup_logging,
+    stop_logging,
+    get_logger,
+    log_function_call,
+    log_function_exit,
+    LazyHex,
+    LazyCall,
+    RateLimitFilter,
+)
 from .constants import ProtocolBytes, OTPConfig, SMSTemplates, HTTPMessages
 
 __all__ = [
     "settings",
     "setup_logging",
+    "stop_logging",
     "get_logger",
     "log_function_call",
     "log_function_exit",
+    "LazyHex",
+    "LazyCall",
+    "RateLimitFilter",
     "ProtocolBytes",
     "OTPConfig",
     "SMSTemplates",
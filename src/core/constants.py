@@ -78,3 +78,4 @@ class HTTPMessages:
     LOCK_ERROR = "שגיאה בפתיחת המנעול"
     SMS_ERROR = "שגיאה בשליחת SMS"
     INVALID_PHONE = "מספר טלפון לא תקין"
+    RATE_LIMITED = "יותר מדי ניסיונות, נסה שוב בעוד מספר דקות"
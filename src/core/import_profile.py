@@ -0,0 +1,103 @@
+"""
+Import Time Profile
+===================
+
+Parses the output of `python -X importtime` into a tree and renders
+the imports that dominate startup.
+
+Usage:
+    python run_server.py --profile-startup [--min-ms 2]
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+# "import time:       320 |     828035 |   api.app"
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+@dataclass
+class ImportNode:
+    """One imported module."""
+
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: List["ImportNode"] = field(default_factory=list)
+
+
+def parse_importtime(lines: Iterable[str]) -> List[ImportNode]:
+    """
+    Build the import tree from `-X importtime` output.
+
+    Python prints a module after everything it imported, indented one
+    level deeper than its importer, so children are collected until their
+    parent's line appears.
+
+    Args:
+        lines: stderr lines of a `python -X importtime` run (other lines
+               are ignored)
+
+    Returns:
+        Top-level imports, in import order
+    """
+    pending: Dict[int, List[ImportNode]] = {}
+    for line in lines:
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        node = ImportNode(name, int(self_us), int(cumulative_us), pending.pop(depth + 1, []))
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def format_tree(roots: List[ImportNode], min_ms: float = 2.0) -> str:
+    """
+    Render imports of at least `min_ms` cumulative time, costliest first.
+
+    Args:
+        roots: Top-level imports (parse_importtime)
+        min_ms: Hide subtrees cheaper than this
+
+    Returns:
+        Text tree: cumulative ms, self ms, module
+    """
+    out = [f"{'cumul ms':>9} {'self ms':>8}  module"]
+
+    def walk(nodes: List[ImportNode], depth: int):
+        for node in sorted(nodes, key=lambda n: n.cumulative_us, reverse=True):
+            if node.cumulative_us / 1000 < min_ms:
+                continue
+            out.append(
+                f"{node.cumulative_us / 1000:>9.1f} {node.self_us / 1000:>8.1f}  {'  ' * depth}{node.name}"
+            )
+            walk(node.children, depth + 1)
+
+    walk(roots, 0)
+    return "\n".join(out)
+
+
+def top_self_time(roots: List[ImportNode], count: int = 15) -> List[ImportNode]:
+    """
+    Get the modules with the highest own (non-cumulative) import time.
+
+    Args:
+        roots: Top-level imports
+        count: Number of modules
+
+    Returns:
+        Modules, costliest first
+    """
+    nodes: List[ImportNode] = []
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.children)
+    return sorted(nodes, key=lambda n: n.self_us, reverse=True)[:count]
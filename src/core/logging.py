@@ -9,18 +9,60 @@ Features:
 - Rotating file handler to prevent large log files
 - Colored console output for better readability
 - Full coverage across all modules
+- Non-blocking: log calls only enqueue the record, a background thread
+  does the formatting and the console/file I/O
+- Bounded queue: when the writer falls behind, records are dropped (and
+  counted) instead of stalling request handlers
+- Optional structured JSON output (LOG_JSON=true)
+- Lazy formatting helpers for hot paths (LazyHex, LazyCall)
+- Rate limiting of repeating warnings/errors per call site, with
+  "N similar messages suppressed" summaries (e.g. an unplugged RS485
+  adapter logging the same error every monitor tick)
+
+Hot-path logging convention: pass arguments instead of building the
+message, so nothing is formatted when the level is disabled:
+
+    logger.debug("Sent: %s", LazyHex(frame))       # not f"Sent: {frame.hex()}"
+
+Guard blocks that log several debug lines (or compute values only for
+the log) with logger.isEnabledFor(logging.DEBUG); the logger caches the
+answer until the level configuration changes.
 
 Author: CartWise Team
 Version: 1.0.0
 """
 
+import atexit
+import json
 import logging
+import queue
 import sys
 import os
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from typing import Callable, List, Optional
 from datetime import datetime
 from .config import settings
+from .metrics import registry
+from .tracing import get_correlation_id
+
+LOG_RECORDS_DROPPED = registry.counter(
+    "cartwise_log_records_dropped_total",
+    "Log records dropped because the logging queue was full",
+)
+
+LOG_RECORDS_SUPPRESSED = registry.counter(
+    "cartwise_log_records_suppressed_total",
+    "Repeating log records suppressed by the rate limit filter",
+)
+
+# Running queue listener (replaced when setup_logging is called again)
+_listener: Optional["_QueueListener"] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+# Effective arguments of the running configuration (see setup_logging)
+_configured: Optional[tuple] = None
 
 
 # ANSI color codes for terminal output
@@ -75,12 +117,275 @@ class ColoredFormatter(logging.Formatter):
         return result
 
 
+class JsonFormatter(logging.Formatter):
+    """
+    Structured formatter: one JSON object per line.
+
+    Fields: timestamp, level, logger, message, correlation_id, thread and
+    exception (when present).
+    """
+
+    def format(self, record):
+        """
+        Format log record as JSON.
+
+        Args:
+            record: LogRecord instance
+
+        Returns:
+            JSON string
+        """
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _Bucket:
+    """Token bucket of one log call site."""
+
+    __slots__ = ("tokens", "updated", "suppressed", "last_suppressed", "sample")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.suppressed = 0
+        self.last_suppressed = 0.0
+        self.sample = ""
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Rate-limits repeating log records per call site.
+
+    Each call site (logger, level, file, line) gets a token bucket of
+    `burst` records refilled at one record per `period` seconds. Records
+    beyond that are dropped and counted. The count is reported:
+    - appended to the next record of that call site that gets through, or
+    - as a separate summary record once the call site has been quiet for
+      a period (sent to `sink`)
+
+    Only records at `min_level` and above are limited. The number of
+    tracked call sites is LRU-bounded.
+    """
+
+    def __init__(
+        self,
+        burst: int = 10,
+        period: float = 6.0,
+        min_level: int = logging.WARNING,
+        max_keys: int = 1024,
+        sink: Optional[Callable[[logging.LogRecord], None]] = None,
+    ):
+        """
+        Initialize filter.
+
+        Args:
+            burst: Records let through before limiting starts
+            period: Seconds per refilled record (burst=10, period=6 -> 10/min)
+            min_level: Lowest level that is rate-limited (default: WARNING)
+            max_keys: Maximum number of tracked call sites
+            sink: Receives summary records of call sites that went quiet
+        """
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.min_level = min_level
+        self.max_keys = max_keys
+        self.sink = sink
+        self.suppressed_total = 0
+        self._buckets: "OrderedDict[tuple, _Bucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Decide whether a record is emitted.
+
+        Args:
+            record: LogRecord instance
+
+        Returns:
+            True to emit the record, False to suppress it
+        """
+        if record.levelno < self.min_level:
+            return True
+
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(self.burst, now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) / self.period)
+                bucket.updated = now
+
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                suppressed, bucket.suppressed = bucket.suppressed, 0
+                allowed = True
+            else:
+                bucket.suppressed += 1
+                bucket.last_suppressed = now
+                bucket.sample = str(record.msg)[:200]
+                self.suppressed_total += 1
+                suppressed = 0
+                allowed = False
+
+            summaries = self._collect_summaries(now) if now - self._last_sweep >= self.period else []
+
+        if allowed and suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        if not allowed:
+            LOG_RECORDS_SUPPRESSED.inc()
+        if self.sink is not None:
+            for summary in summaries:
+                self.sink(summary)
+
+        return allowed
+
+    def _collect_summaries(self, now: float) -> List[logging.LogRecord]:
+        """Build summary records for call sites quiet for a period (lock held)."""
+        self._last_sweep = now
+        summaries = []
+        for (name, levelno, pathname, lineno), bucket in self._buckets.items():
+            if bucket.suppressed and now - bucket.last_suppressed >= self.period:
+                summaries.append(logging.makeLogRecord({
+                    "name": name,
+                    "levelno": levelno,
+                    "levelname": logging.getLevelName(levelno),
+                    "pathname": pathname,
+                    "lineno": lineno,
+                    "msg": "%d similar messages suppressed: %s",
+                    "args": (bucket.suppressed, bucket.sample),
+                }))
+                bucket.suppressed = 0
+        return summaries
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller.
+
+    When the queue is full the record is dropped and counted; the next
+    record that fits is preceded by a warning with the number of dropped
+    records.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        """
+        Prepare a record for the queue without formatting it.
+
+        The listener thread does the formatting. Only the message is merged
+        with its arguments here, since the arguments may change after the
+        call returns, and the correlation ID is attached because it lives
+        in the caller's context.
+        """
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.correlation_id = get_correlation_id()
+        return record
+
+    def enqueue(self, record):
+        """Put a record on the queue, dropping it if the queue is full."""
+        if self._unreported:
+            with self._lock:
+                unreported, self._unreported = self._unreported, 0
+            if unreported:
+                try:
+                    self.queue.put_nowait(logging.makeLogRecord({
+                        "name": __name__,
+                        "levelno": logging.WARNING,
+                        "levelname": "WARNING",
+                        "msg": f"Logging queue full - dropped {unreported} log records",
+                        "correlation_id": None,
+                    }))
+                except queue.Full:
+                    with self._lock:
+                        self._unreported += unreported
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._unreported += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
+class _QueueListener(QueueListener):
+    """Queue listener whose stop() waits for room instead of failing on a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def stop_logging():
+    """Flush pending log records and stop the background writer thread."""
+    global _listener, _queue_handler, _configured
+    if _listener is not None:
+        _listener.stop()  # Processes everything still queued
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    _queue_handler = None
+    _configured = None
+
+
+def get_logging_stats() -> dict:
+    """
+    Get logging pipeline statistics.
+
+    Returns:
+        Queue size, capacity and dropped record count
+    """
+    if _queue_handler is None:
+        return {"queued": 0, "capacity": 0, "dropped": 0, "suppressed": 0}
+    suppressed = sum(
+        f.suppressed_total for f in _queue_handler.filters if isinstance(f, RateLimitFilter)
+    )
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "capacity": _queue_handler.queue.maxsize,
+        "dropped": _queue_handler.dropped,
+        "suppressed": suppressed,
+    }
+
+
+atexit.register(stop_logging)
+
+
 def setup_logging(
     level: Optional[str] = None,
     log_dir: str = "logs",
     log_file: str = "cartwise.log",
     max_bytes: int = 10 * 1024 * 1024,  # 10 MB
     backup_count: int = 5,
+    json_format: Optional[bool] = None,
+    queue_size: Optional[int] = None,
+    rate_limit_burst: Optional[int] = None,
+    force: bool = False,
 ) -> None:
     """
     Configure logging for the entire application.
@@ -89,6 +394,13 @@ def setup_logging(
     1. Console output with colors
     2. Rotating file output
 
+    Both outputs are written by a background thread: the root logger only
+    has a queue handler, so a log call costs an enqueue.
+
+    Idempotent: calling it again with the same effective arguments keeps
+    the running configuration. Different arguments (or force=True)
+    replace it.
+
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
                If not provided, uses LOG_LEVEL from settings
@@ -96,6 +408,14 @@ def setup_logging(
         log_file: Log file name
         max_bytes: Max size of log file before rotation (default: 10MB)
         backup_count: Number of backup files to keep (default: 5)
+        json_format: One JSON object per line instead of text
+                     If not provided, uses LOG_JSON from settings
+        queue_size: Maximum queued records before dropping
+                    If not provided, uses LOG_QUEUE_SIZE from settings
+        rate_limit_burst: Repeats of one warning/error call site let through
+                          before rate limiting (0 disables the limit)
+                          If not provided, uses LOG_RATE_LIMIT_BURST from settings
+        force: Reconfigure even if already configured with these arguments
 
     Example:
         >>> setup_logging()
@@ -103,7 +423,20 @@ def setup_logging(
         >>> logger.info("Application started")
         >>> logger.error("An error occurred", exc_info=True)
     """
+    global _listener, _queue_handler, _configured
+
     log_level = level or settings.LOG_LEVEL
+    json_format = settings.LOG_JSON if json_format is None else json_format
+    queue_size = queue_size or settings.LOG_QUEUE_SIZE
+    if rate_limit_burst is None:
+        rate_limit_burst = settings.LOG_RATE_LIMIT_BURST
+
+    configuration = (
+        log_level.upper(), log_dir, log_file, max_bytes, backup_count,
+        json_format, queue_size, rate_limit_burst,
+    )
+    if not force and _listener is not None and configuration == _configured:
+        return
 
     # Create logs directory if it doesn't exist
     if not os.path.exists(log_dir):
@@ -119,15 +452,18 @@ def setup_logging(
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, log_level.upper()))
 
-    # Clear existing handlers
+    # Clear existing handlers (and flush the previous writer thread)
     root_logger.handlers.clear()
+    stop_logging()
 
     # 1. Console Handler (with colors)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(getattr(logging, log_level.upper()))
-    console_formatter = ColoredFormatter(log_format, datefmt=date_format)
+    if json_format:
+        console_formatter = JsonFormatter()
+    else:
+        console_formatter = ColoredFormatter(log_format, datefmt=date_format)
     console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
 
     # 2. File Handler (rotating, without colors)
     file_handler = RotatingFileHandler(
@@ -137,19 +473,77 @@ def setup_logging(
         encoding="utf-8"
     )
     file_handler.setLevel(getattr(logging, log_level.upper()))
-    file_formatter = logging.Formatter(log_format, datefmt=date_format)
+    if json_format:
+        file_formatter = JsonFormatter()
+    else:
+        file_formatter = logging.Formatter(log_format, datefmt=date_format)
     file_handler.setFormatter(file_formatter)
-    root_logger.addHandler(file_handler)
+
+    # 3. Queue: callers enqueue, the listener thread formats and writes
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    if rate_limit_burst > 0:
+        _queue_handler.addFilter(RateLimitFilter(
+            burst=rate_limit_burst,
+            period=settings.LOG_RATE_LIMIT_PERIOD,
+            sink=_queue_handler.emit,
+        ))
+    root_logger.addHandler(_queue_handler)
+    _listener = _QueueListener(
+        _queue_handler.queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _listener.start()
+    _configured = configuration
 
     # Log the initialization
     root_logger.info("=" * 80)
     root_logger.info(f"Logging system initialized - Level: {log_level.upper()}")
-    root_logger.info(f"Console output: Enabled (colored)")
+    root_logger.info(f"Console output: Enabled ({'JSON' if json_format else 'colored'})")
     root_logger.info(f"File output: {log_path}")
     root_logger.info(f"Max file size: {max_bytes / 1024 / 1024:.1f}MB, Backups: {backup_count}")
+    root_logger.info(f"Queued writer: {queue_size} records max (drop when full)")
+    if rate_limit_burst > 0:
+        root_logger.info(
+            f"Repeating warnings/errors limited to {rate_limit_burst} per call site, "
+            f"then 1 per {settings.LOG_RATE_LIMIT_PERIOD:g}s"
+        )
     root_logger.info("=" * 80)
 
 
+class LazyHex:
+    """
+    Hex dump of a byte string, rendered only if the record is emitted.
+
+    Example:
+        >>> logger.debug(">> Sent: %s", LazyHex(message))
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Optional[bytes]):
+        self.data = data
+
+    def __str__(self) -> str:
+        return self.data.hex().upper() if self.data else "None"
+
+
+class LazyCall:
+    """
+    Deferred function call for expensive log arguments.
+
+    Example:
+        >>> logger.debug("State: %s", LazyCall(controller.describe, locker_id))
+    """
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args))
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the given name.
@@ -182,8 +576,10 @@ def log_function_call(logger: logging.Logger, func_name: str, **kwargs):
         >>> logger = get_logger(__name__)
         >>> log_function_call(logger, "assign_cart", user_id=123, cart_id=5)
     """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     params = ", ".join(f"{k}={v}" for k, v in kwargs.items())
-    logger.debug(f">> Entering {func_name}({params})")
+    logger.debug(">> Entering %s(%s)", func_name, params)
 
 
 def log_function_exit(logger: logging.Logger, func_name: str, result=None):
@@ -200,6 +596,6 @@ def log_function_exit(logger: logging.Logger, func_name: str, result=None):
         >>> log_function_exit(logger, "assign_cart", result={"cart_id": 5})
     """
     if result is not None:
-        logger.debug(f"<< Exiting {func_name}, result: {result}")
+        logger.debug("<< Exiting %s, result: %s", func_name, result)
     else:
-        logger.debug(f"<< Exiting {func_name}")
+        logger.debug("<< Exiting %s", func_name)
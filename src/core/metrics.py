@@ -0,0 +1,308 @@
+"""
+Metrics Module
+==============
+
+In-process metrics registry exported in the Prometheus text format.
+
+Features:
+- Counters, gauges and histograms with label values
+- Collectors: callbacks sampled at scrape time (queue sizes, store sizes)
+- Lock-free hot path: every thread updates its own shard, shards are
+  only merged when /metrics is scraped
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+# Collector callback: returns (label values, value) samples
+CollectorFunc = Callable[[], Iterable[Tuple[LabelValues, float]]]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    """Format a {name="value",...} label set."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value (integers without a trailing .0)."""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _ShardedMetric:
+    """
+    Base class for metrics with per-thread shards.
+
+    A thread registers its shard once (under a lock) and afterwards only
+    writes to its own dict, so updates never contend.
+    """
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        """Get the calling thread's shard."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self) -> List[dict]:
+        """Copy every shard (dict.copy() is atomic under the GIL)."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+        raise NotImplementedError
+
+
+class Counter(_ShardedMetric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        """
+        Increment the counter.
+
+        Args:
+            *labelvalues: One value per label name
+            amount: Increment (default: 1)
+        """
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        """Get merged values per label set."""
+        merged: Dict[LabelValues, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down (e.g. requests in flight)."""
+
+    metric_type = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1):
+        """
+        Decrement the gauge.
+
+        Args:
+            *labelvalues: One value per label name
+            amount: Decrement (default: 1)
+        """
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(_ShardedMetric):
+    """Latency histogram with fixed buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str):
+        """
+        Record one observation.
+
+        Args:
+            value: Observed value (seconds for latencies)
+            *labelvalues: One value per label name
+        """
+        shard = self._shard()
+        # [bucket counts..., +Inf count, sum]
+        data = shard.get(labelvalues)
+        if data is None:
+            data = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def render(self) -> List[str]:
+        merged: Dict[LabelValues, list] = {}
+        for shard in self._snapshots():
+            for labels, data in shard.items():
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = list(data)
+                else:
+                    for i, value in enumerate(data):
+                        total[i] += value
+
+        lines = []
+        for labels, data in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += data[len(self.buckets)]
+            le = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_set = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_set} {_format_value(data[-1])}")
+            lines.append(f"{self.name}_count{label_set} {cumulative}")
+        return lines
+
+
+class _Collector:
+    """Gauge whose samples are produced by a callback at scrape time."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], func: CollectorFunc):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.func = func
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self.func()
+        ]
+
+
+class MetricsRegistry:
+    """
+    Registry of all metrics of the process.
+
+    Metrics are created once at import time (module-level constants) and
+    updated from any thread without locking.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.metric_type}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """Create (or get) a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        """Create (or get) a gauge."""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create (or get) a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(
+        self,
+        name: str,
+        documentation: str,
+        func: CollectorFunc,
+        labelnames: Tuple[str, ...] = (),
+    ):
+        """
+        Register a gauge sampled at scrape time.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            func: Callback returning (label values, value) samples
+            labelnames: Label names of the samples
+        """
+        with self._lock:
+            self._metrics[name] = _Collector(name, documentation, labelnames, func)
+
+    def get(self, name: str) -> Optional[object]:
+        """Get a registered metric by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Export all metrics in the Prometheus text exposition format (0.0.4).
+
+        A failing collector is skipped, it never breaks the scrape.
+
+        Returns:
+            Metrics text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.render()
+            except Exception as e:
+                lines.append(f"# collector {metric.name} failed: {type(e).__name__}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry
+registry = MetricsRegistry()
+
+# Content type of the text exposition format
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
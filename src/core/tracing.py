@@ -0,0 +1,259 @@
+"""
+Tracing Module
+==============
+
+Lightweight request tracing: correlation IDs and timing spans.
+
+A correlation ID is created for every API request (or taken from the
+X-Correlation-ID header) and travels with the work it triggers: database
+operations, RS485 commands, agent commands and the agent's result report.
+Spans are kept in a bounded in-memory ring buffer and exported as JSON.
+
+Spans are only recorded while a correlation ID is active, so background
+loops (monitor ticks) cost nothing and do not flood the buffer.
+
+Standard library only, so the local agent can use it as well.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterator, List, Optional
+
+# HTTP header carrying the correlation ID
+CORRELATION_HEADER = "X-Correlation-ID"
+
+_correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+
+
+def new_correlation_id() -> str:
+    """Generate a new correlation ID."""
+    return uuid.uuid4().hex[:16]
+
+
+def get_correlation_id() -> Optional[str]:
+    """Get the correlation ID of the current context (None outside a traced request)."""
+    return _correlation_id.get()
+
+
+@contextmanager
+def correlation_context(
+    correlation_id: Optional[str],
+    parent_span_id: Optional[str] = None,
+) -> Iterator[Optional[str]]:
+    """
+    Run a block under a correlation ID.
+
+    Args:
+        correlation_id: ID to activate (None leaves tracing off for the block)
+        parent_span_id: Remote span the block's spans hang under (e.g. the API
+                        span that queued an agent command)
+
+    Yields:
+        The active correlation ID
+    """
+    token = _correlation_id.set(correlation_id)
+    span_token = _current_span_id.set(parent_span_id)
+    try:
+        yield correlation_id
+    finally:
+        _current_span_id.reset(span_token)
+        _correlation_id.reset(token)
+
+
+@dataclass
+class Span:
+    """One timed operation of a trace."""
+
+    correlation_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    service: str
+    start: float                      # Wall clock (epoch seconds)
+    duration_ms: float = 0.0
+    status: str = "ok"
+    attributes: Dict[str, object] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """Convert span to a JSON-serializable dictionary."""
+        return asdict(self)
+
+
+class Tracer:
+    """
+    Records spans into a ring buffer.
+
+    Thread-safe; the buffer keeps the most recent `capacity` spans.
+    """
+
+    def __init__(self, service: str = "api", capacity: int = 2048):
+        """
+        Initialize tracer.
+
+        Args:
+            service: Name recorded on every span (e.g. "api", "agent:branch_001")
+            capacity: Maximum number of spans kept
+        """
+        self.service = service
+        self._spans: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """
+        Time a block as a span of the current trace.
+
+        Does nothing (yields None) when no correlation ID is active.
+
+        Args:
+            name: Span name (e.g. "db.create_rental", "rs485.unlock_cart")
+            **attributes: Extra attributes stored on the span
+
+        Yields:
+            The span (attributes may be added inside the block) or None
+        """
+        correlation_id = _correlation_id.get()
+        if correlation_id is None:
+            yield None
+            return
+
+        span = Span(
+            correlation_id=correlation_id,
+            span_id=uuid.uuid4().hex[:8],
+            parent_id=_current_span_id.get(),
+            name=name,
+            service=self.service,
+            start=time.time(),
+            attributes=attributes,
+        )
+        token = _current_span_id.set(span.span_id)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            _current_span_id.reset(token)
+            with self._lock:
+                self._spans.append(span)
+
+    def record_span(
+        self,
+        name: str,
+        correlation_id: str,
+        start: float,
+        duration_ms: float,
+        parent_id: Optional[str] = None,
+        **attributes,
+    ):
+        """
+        Record a span measured outside a `with span()` block (e.g. queue wait).
+
+        Args:
+            name: Span name
+            correlation_id: Trace the span belongs to
+            start: Start time (epoch seconds)
+            duration_ms: Duration in milliseconds
+            parent_id: Parent span ID
+            **attributes: Extra attributes stored on the span
+        """
+        span = Span(
+            correlation_id=correlation_id,
+            span_id=uuid.uuid4().hex[:8],
+            parent_id=parent_id,
+            name=name,
+            service=self.service,
+            start=start,
+            duration_ms=round(duration_ms, 3),
+            attributes=attributes,
+        )
+        with self._lock:
+            self._spans.append(span)
+
+    def current_span_id(self) -> Optional[str]:
+        """Get the ID of the innermost open span."""
+        return _current_span_id.get()
+
+    def import_spans(self, spans: List[dict]):
+        """
+        Add spans recorded by another process (e.g. the local agent).
+
+        Args:
+            spans: Span dictionaries as produced by Span.to_dict()
+        """
+        imported = []
+        for data in spans:
+            try:
+                imported.append(Span(**data))
+            except TypeError:
+                continue
+        with self._lock:
+            self._spans.extend(imported)
+
+    def get_trace(self, correlation_id: str) -> List[dict]:
+        """
+        Get all spans of one trace ordered by start time.
+
+        Args:
+            correlation_id: Trace correlation ID
+
+        Returns:
+            List of span dictionaries
+        """
+        with self._lock:
+            spans = [s for s in self._spans if s.correlation_id == correlation_id]
+        return [s.to_dict() for s in sorted(spans, key=lambda s: s.start)]
+
+    def export(self, limit: int = 50) -> List[dict]:
+        """
+        Export the most recent traces.
+
+        Args:
+            limit: Maximum number of traces
+
+        Returns:
+            List of traces, newest first, each with its spans ordered by start
+        """
+        with self._lock:
+            spans = list(self._spans)
+
+        traces: Dict[str, List[Span]] = {}
+        for span in spans:
+            traces.setdefault(span.correlation_id, []).append(span)
+
+        result = []
+        for correlation_id, trace_spans in traces.items():
+            trace_spans.sort(key=lambda s: s.start)
+            start = trace_spans[0].start
+            end = max(s.start + s.duration_ms / 1000 for s in trace_spans)
+            result.append({
+                "correlation_id": correlation_id,
+                "start": start,
+                "duration_ms": round((end - start) * 1000, 3),
+                "span_count": len(trace_spans),
+                "spans": [s.to_dict() for s in trace_spans],
+            })
+
+        result.sort(key=lambda t: t["start"], reverse=True)
+        return result[:limit]
+
+    def clear(self):
+        """Drop all recorded spans."""
+        with self._lock:
+            self._spans.clear()
+
+
+# Process-wide tracer of the API server
+tracer = Tracer()
@@ -9,9 +9,24 @@ Version: 1.0.0
 """
 
 from .rs485 import RS485Controller, LockStatus, Command
+from .instrumentation import RS485Metrics
+from .connector import HardwareConnector
+from .forwarding import RemoteLockController, HardwareCommandServer
+from .ipc import HardwareClient
+from .daemon import HardwareDaemon
+from .discovery import Calibration, calibrate_controller, discover_controller
 
 __all__ = [
     "RS485Controller",
     "LockStatus",
     "Command",
+    "RS485Metrics",
+    "HardwareConnector",
+    "RemoteLockController",
+    "HardwareCommandServer",
+    "HardwareClient",
+    "HardwareDaemon",
+    "Calibration",
+    "calibrate_controller",
+    "discover_controller",
 ]
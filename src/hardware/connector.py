@@ -0,0 +1,147 @@
+"""
+Background Hardware Connector
+=============================
+
+Opens the RS485 controller in a background thread, so server startup
+never waits on the serial port.
+
+A missing or failing port is retried with exponential backoff (1s, 2s,
+4s, ... up to `max_delay`) until it connects or the connector is stopped.
+The controller is handed to `on_connect` only once it is connected;
+until then the API runs in demo mode. An optional `calibrate` hook runs
+before each attempt (see hardware/discovery.py). An owner that sees the
+port close later (USB unplugged) calls `reconnect()` to start over.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import threading
+from typing import Callable, Optional
+
+from core import get_logger
+from .rs485 import RS485Controller
+
+logger = get_logger(__name__)
+
+# Connector states
+STATE_IDLE = "idle"
+STATE_CONNECTING = "connecting"
+STATE_CONNECTED = "connected"
+STATE_STOPPED = "stopped"
+
+
+class HardwareConnector:
+    """
+    Connects an RS485 controller in the background with retry backoff.
+
+    Example:
+        connector = HardwareConnector(controller, on_connect=set_lock_controller)
+        connector.start()
+        ...
+        connector.stop()
+    """
+
+    def __init__(
+        self,
+        controller: RS485Controller,
+        on_connect: Callable[[RS485Controller], None],
+        initial_delay: float = 1.0,
+        max_delay: float = 60.0,
+        calibrate: Optional[Callable[[RS485Controller], object]] = None,
+    ):
+        """
+        Initialize connector.
+
+        Args:
+            controller: Controller to connect (not connected yet)
+            on_connect: Called from the connector thread once connected
+            initial_delay: Seconds before the first retry
+            max_delay: Maximum seconds between retries
+            calibrate: Called with the controller before each attempt
+                       (may change its port and baud rate)
+        """
+        self.controller = controller
+        self.on_connect = on_connect
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.calibrate = calibrate
+        self.state = STATE_IDLE
+        self.attempts = 0
+        self.next_retry_in: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start connecting in a background thread."""
+        if self._thread is not None:
+            return
+        self.state = STATE_CONNECTING
+        self._thread = threading.Thread(target=self._run, name="rs485-connect", daemon=True)
+        self._thread.start()
+
+    def reconnect(self):
+        """
+        Connect again after the controller's port closed.
+
+        No-op while an attempt is already running or after stop().
+        """
+        if self._stop.is_set() or (self._thread is not None and self._thread.is_alive()):
+            return
+        logger.warning(f"RS485 port {self.controller.port} closed - reconnecting")
+        self.state = STATE_CONNECTING
+        self._thread = threading.Thread(target=self._run, name="rs485-connect", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Stop retrying.
+
+        Args:
+            timeout: Seconds to wait for an attempt in progress
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.state != STATE_CONNECTED:
+            self.state = STATE_STOPPED
+
+    def _run(self):
+        delay = min(self.initial_delay, self.max_delay)
+
+        while not self._stop.is_set():
+            self.attempts += 1
+            if self.calibrate is not None:
+                try:
+                    self.calibrate(self.controller)
+                except Exception as e:
+                    logger.error(f"RS485 calibration failed: {e}")
+            if self.controller.connect():
+                if self._stop.is_set():
+                    # Stopped during the attempt - do not hand out the port
+                    self.controller.disconnect()
+                    return
+                self.state = STATE_CONNECTED
+                self.next_retry_in = None
+                logger.info(f"RS485 controller connected (attempt {self.attempts})")
+                self.on_connect(self.controller)
+                return
+
+            if self.attempts == 1:
+                logger.warning(
+                    f"RS485 controller not available on {self.controller.port} - "
+                    f"running in demo mode, retrying in the background"
+                )
+            self.next_retry_in = delay
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_delay)
+
+    def get_status(self) -> dict:
+        """Get connector status."""
+        return {
+            "state": self.state,
+            "port": self.controller.port,
+            "baudrate": getattr(self.controller, "baudrate", None),
+            "attempts": self.attempts,
+            "next_retry_in": self.next_retry_in,
+        }
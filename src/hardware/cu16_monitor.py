@@ -10,6 +10,9 @@ This service:
 - Detects when carts are returned (lock closed + cart inside)
 - Updates rental status automatically
 - Marks overdue rentals
+- Periodically reconciles rental statistics counters
+- Publishes locker state changes and detected returns on an EventBus
+  (API handlers wait on these instead of polling the RS485 bus)
 
 Author: CartWise Team
 Version: 1.0.0
@@ -18,16 +21,128 @@ Version: 1.0.0
 import asyncio
 import time
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 
 from core import get_logger
+from core.metrics import registry
 from hardware.rs485 import RS485Controller, LockStateData
-from utils.database import RentalDatabase
+from providers.storage.base import RentalStore
 from models import Cart, CartStatus
-from models.rental import RentalStatus
+from models.rental import Rental, RentalStatus
+from utils.events import EventBus, TOPIC_LOCKER, TOPIC_CART_RETURNED, publish_cart, publish_rental
 
 logger = get_logger(__name__)
 
+MONITOR_TICK_SECONDS = registry.histogram(
+    "cartwise_monitor_tick_seconds",
+    "Duration of one CU16 monitor check (lock poll + rental updates)",
+)
+
+# Lockers of one CU16 board
+LOCKER_COUNT = 16
+
+
+def publish_lock_changes(
+    event_bus: Optional[EventBus],
+    previous: Optional[LockStateData],
+    current: LockStateData,
+):
+    """
+    Publish a locker event for every locker whose state changed.
+
+    Every locker is published on the first poll (previous is None).
+
+    Args:
+        event_bus: Bus to publish on (nothing is done if None)
+        previous: Lock states of the previous poll
+        current: Lock states of this poll
+    """
+    if event_bus is None or current == previous:
+        return
+
+    for locker_id in range(LOCKER_COUNT):
+        closed = current.is_lock_closed(locker_id)
+        cart_inside = current.has_cart_inside(locker_id)
+        if (
+            previous is not None
+            and previous.is_lock_closed(locker_id) == closed
+            and previous.has_cart_inside(locker_id) == cart_inside
+        ):
+            continue
+        event_bus.publish(
+            TOPIC_LOCKER,
+            {"locker_id": locker_id, "closed": closed, "cart_inside": cart_inside},
+            key=str(locker_id),
+        )
+
+
+def publish_cart_returned(event_bus: Optional[EventBus], rental, cart: Cart):
+    """Publish a detected (and recorded) cart return."""
+    if event_bus is None:
+        return
+    event_bus.publish(TOPIC_CART_RETURNED, {
+        "rental_id": rental.rental_id,
+        "cart_id": cart.cart_id,
+        "locker_id": cart.locker_id,
+        "late": rental.status == RentalStatus.RETURNED_LATE,
+    })
+
+
+def apply_tick_cart_changes(
+    returns: List[Tuple[Rental, Cart]],
+    overdue: List[Tuple[Rental, Optional[Cart]]],
+):
+    """
+    Update the carts of everything one monitor tick recorded.
+
+    Called after the tick's commit, so a rolled-back tick leaves the
+    shared carts untouched (and retries next tick).
+
+    Args:
+        returns: (rental, cart) of returns recorded in the tick
+        overdue: (rental, cart) of rentals marked overdue in the tick
+    """
+    for _, cart in returns:
+        cart.return_cart()
+        cart.mark_available()
+
+    for _, cart in overdue:
+        if cart is not None:
+            cart.status = CartStatus.IN_USE  # Still in use but overdue
+
+
+def publish_tick_events(
+    event_bus: Optional[EventBus],
+    returns: List[Tuple[Rental, Cart]],
+    overdue: List[Tuple[Rental, Optional[Cart]]],
+    previous: Optional[LockStateData],
+    current: LockStateData,
+):
+    """
+    Publish everything one monitor tick recorded (after its commit).
+
+    Args:
+        event_bus: Bus to publish on (nothing is done if None)
+        returns: (rental, cart) of returns recorded in the tick
+        overdue: (rental, cart) of rentals marked overdue in the tick
+        previous: Lock states of the previous poll
+        current: Lock states of this poll
+    """
+    if event_bus is None:
+        return
+
+    for rental, cart in returns:
+        publish_cart_returned(event_bus, rental, cart)
+        publish_cart(event_bus, cart)
+        publish_rental(event_bus, rental, "returned")
+
+    for rental, cart in overdue:
+        publish_rental(event_bus, rental, "overdue")
+        if cart is not None:
+            publish_cart(event_bus, cart)
+
+    publish_lock_changes(event_bus, previous, current)
+
 
 class CU16Monitor:
     """
@@ -42,9 +157,11 @@ class CU16Monitor:
     def __init__(
         self,
         lock_controller: Optional[RS485Controller],
-        rental_db: RentalDatabase,
+        rental_db: RentalStore,
         carts_db: Dict[int, Cart],
-        check_interval: int = 5
+        check_interval: int = 5,
+        reconcile_interval: int = 3600,
+        event_bus: Optional[EventBus] = None,
     ):
         """
         Initialize monitor service.
@@ -54,12 +171,20 @@ class CU16Monitor:
             rental_db: Rental database instance
             carts_db: In-memory carts database
             check_interval: Check interval in seconds (default: 5)
+            reconcile_interval: Statistics reconciliation interval in seconds (default: 3600)
+            event_bus: Bus for locker state changes and returns (optional)
         """
         self.lock_controller = lock_controller
         self.rental_db = rental_db
         self.carts_db = carts_db
         self.check_interval = check_interval
+        self.reconcile_interval = reconcile_interval
+        self.event_bus = event_bus
         self.running = False
+        self._last_reconcile = time.monotonic()
+        self._last_lock_states: Optional[LockStateData] = None
+        self._returns: List[Tuple[Rental, Cart]] = []            # Recorded in the current tick
+        self._overdue: List[Tuple[Rental, Optional[Cart]]] = []  # Marked in the current tick
         self._task: Optional[asyncio.Task] = None
 
         logger.info(f"CU16 Monitor initialized (check interval: {check_interval}s)")
@@ -99,21 +224,39 @@ class CU16Monitor:
 
         while self.running:
             try:
+                self._reconcile_statistics_if_due()
+
                 # Check if controller is available
                 if not self.lock_controller:
                     logger.debug("No lock controller available - skipping check")
                     await asyncio.sleep(self.check_interval)
                     continue
 
+                tick_started = time.perf_counter()
+                self._returns.clear()
+                self._overdue.clear()
+
                 # Get current lock states
                 lock_states = self._get_all_lock_states()
 
                 if lock_states:
-                    # Check each cart for return
-                    await self._check_cart_returns(lock_states)
+                    # One database commit for everything found in this tick
+                    with self.rental_db.transaction():
+                        # Check each cart for return
+                        await self._check_cart_returns(lock_states)
+
+                        # Check for overdue rentals
+                        await self._check_overdue_rentals()
+
+                    # After the commit, so waiters see the returns recorded
+                    apply_tick_cart_changes(self._returns, self._overdue)
+                    publish_tick_events(
+                        self.event_bus, self._returns, self._overdue,
+                        self._last_lock_states, lock_states,
+                    )
+                    self._last_lock_states = lock_states
 
-                    # Check for overdue rentals
-                    await self._check_overdue_rentals()
+                MONITOR_TICK_SECONDS.observe(time.perf_counter() - tick_started)
 
                 # Wait before next check
                 await asyncio.sleep(self.check_interval)
@@ -148,7 +291,7 @@ class CU16Monitor:
         """
         # Get all active rentals from database
         active_rentals = [
-            rental for rental in self.rental_db.get_rental_history(limit=1000)
+            rental for rental in self.rental_db.get_open_rentals()
             if rental.status == RentalStatus.ACTIVE
         ]
 
@@ -170,6 +313,8 @@ class CU16Monitor:
                     logger.info(f"🎉 Cart {cart.cart_id} returned detected (locker {locker_id})")
                     await self._process_cart_return(rental, cart)
 
+            except self.rental_db.DatabaseError:
+                raise  # Roll back the tick's unit of work (retried next tick)
             except Exception as e:
                 logger.error(f"Error checking cart {rental.cart_id} return: {e}")
 
@@ -185,9 +330,8 @@ class CU16Monitor:
         rental.mark_returned()
         self.rental_db.update_rental(rental)
 
-        # Update cart status
-        cart.return_cart()
-        cart.mark_available()
+        # Cart status is updated after the tick commits
+        self._returns.append((rental, cart))
 
         # Log the return
         duration = rental.duration
@@ -208,28 +352,35 @@ class CU16Monitor:
     async def _check_overdue_rentals(self):
         """Check for overdue rentals and mark them."""
         try:
-            overdue_rentals = self.rental_db.get_overdue_rentals()
+            # Single UPDATE for all newly overdue rentals
+            overdue_rentals = self.rental_db.mark_overdue_bulk()
 
             for rental in overdue_rentals:
-                if rental.status != RentalStatus.OVERDUE:
-                    # Mark as overdue
-                    rental.mark_overdue()
-                    self.rental_db.update_rental(rental)
-
-                    # Update cart status
-                    cart = self.carts_db.get(rental.cart_id)
-                    if cart:
-                        cart.status = CartStatus.IN_USE  # Still in use but overdue
-
-                    overdue_time = datetime.now() - rental.expected_return
-                    logger.warning(
-                        f"⏰ Cart {rental.cart_id} is OVERDUE by {overdue_time} "
-                        f"(user: {rental.user_phone})"
-                    )
+                # Cart status is updated after the tick commits
+                self._overdue.append((rental, self.carts_db.get(rental.cart_id)))
+
+                overdue_time = datetime.now() - rental.expected_return
+                logger.warning(
+                    f"⏰ Cart {rental.cart_id} is OVERDUE by {overdue_time} "
+                    f"(user: {rental.user_phone})"
+                )
 
+        except self.rental_db.DatabaseError:
+            raise  # Roll back the tick's unit of work (retried next tick)
         except Exception as e:
             logger.error(f"Error checking overdue rentals: {e}")
 
+    def _reconcile_statistics_if_due(self):
+        """Verify rental statistics counters once every reconcile_interval."""
+        if time.monotonic() - self._last_reconcile < self.reconcile_interval:
+            return
+
+        self._last_reconcile = time.monotonic()
+        try:
+            self.rental_db.reconcile_statistics()
+        except Exception as e:
+            logger.error(f"Error reconciling rental statistics: {e}")
+
     def get_monitoring_status(self) -> dict:
         """
         Get current monitoring status.
@@ -241,7 +392,8 @@ class CU16Monitor:
             "running": self.running,
             "check_interval": self.check_interval,
             "controller_connected": self.lock_controller is not None,
-            "database_path": self.rental_db.db_path
+            "database_path": self.rental_db.db_path,
+            "rs485_metrics": self.lock_controller.get_metrics() if self.lock_controller else None
         }
 
 
@@ -256,9 +408,11 @@ class CU16MonitorSync:
     def __init__(
         self,
         lock_controller: Optional[RS485Controller],
-        rental_db: RentalDatabase,
+        rental_db: RentalStore,
         carts_db: Dict[int, Cart],
-        check_interval: int = 5
+        check_interval: int = 5,
+        reconcile_interval: int = 3600,
+        event_bus: Optional[EventBus] = None,
     ):
         """
         Initialize synchronous monitor service.
@@ -268,12 +422,20 @@ class CU16MonitorSync:
             rental_db: Rental database instance
             carts_db: In-memory carts database
             check_interval: Check interval in seconds
+            reconcile_interval: Statistics reconciliation interval in seconds
+            event_bus: Bus for locker state changes and returns (optional)
         """
         self.lock_controller = lock_controller
         self.rental_db = rental_db
         self.carts_db = carts_db
         self.check_interval = check_interval
+        self.reconcile_interval = reconcile_interval
+        self.event_bus = event_bus
         self.running = False
+        self._last_reconcile = time.monotonic()
+        self._last_lock_states: Optional[LockStateData] = None
+        self._returns: List[Tuple[Rental, Cart]] = []            # Recorded in the current tick
+        self._overdue: List[Tuple[Rental, Optional[Cart]]] = []  # Marked in the current tick
 
         logger.info(f"CU16 Monitor (Sync) initialized (check interval: {check_interval}s)")
 
@@ -306,16 +468,33 @@ class CU16MonitorSync:
 
         while self.running:
             try:
+                self._reconcile_statistics_if_due()
+
                 if not self.lock_controller:
                     logger.debug("No lock controller available - skipping check")
                     time.sleep(self.check_interval)
                     continue
 
+                tick_started = time.perf_counter()
+                self._returns.clear()
+                self._overdue.clear()
                 lock_states = self._get_all_lock_states()
 
                 if lock_states:
-                    self._check_cart_returns(lock_states)
-                    self._check_overdue_rentals()
+                    # One database commit for everything found in this tick
+                    with self.rental_db.transaction():
+                        self._check_cart_returns(lock_states)
+                        self._check_overdue_rentals()
+
+                    # After the commit, so waiters see the returns recorded
+                    apply_tick_cart_changes(self._returns, self._overdue)
+                    publish_tick_events(
+                        self.event_bus, self._returns, self._overdue,
+                        self._last_lock_states, lock_states,
+                    )
+                    self._last_lock_states = lock_states
+
+                MONITOR_TICK_SECONDS.observe(time.perf_counter() - tick_started)
 
                 time.sleep(self.check_interval)
 
@@ -337,7 +516,7 @@ class CU16MonitorSync:
     def _check_cart_returns(self, lock_states: LockStateData):
         """Check each active cart for return detection."""
         active_rentals = [
-            rental for rental in self.rental_db.get_rental_history(limit=1000)
+            rental for rental in self.rental_db.get_open_rentals()
             if rental.status == RentalStatus.ACTIVE
         ]
 
@@ -355,6 +534,8 @@ class CU16MonitorSync:
                     logger.info(f"🎉 Cart {cart.cart_id} returned detected (locker {locker_id})")
                     self._process_cart_return(rental, cart)
 
+            except self.rental_db.DatabaseError:
+                raise  # Roll back the tick's unit of work (retried next tick)
             except Exception as e:
                 logger.error(f"Error checking cart {rental.cart_id} return: {e}")
 
@@ -363,8 +544,7 @@ class CU16MonitorSync:
         rental.mark_returned()
         self.rental_db.update_rental(rental)
 
-        cart.return_cart()
-        cart.mark_available()
+        self._returns.append((rental, cart))
 
         duration = rental.duration
         is_late = rental.status == RentalStatus.RETURNED_LATE
@@ -381,22 +561,44 @@ class CU16MonitorSync:
     def _check_overdue_rentals(self):
         """Check for overdue rentals and mark them."""
         try:
-            overdue_rentals = self.rental_db.get_overdue_rentals()
+            overdue_rentals = self.rental_db.mark_overdue_bulk()
 
             for rental in overdue_rentals:
-                if rental.status != RentalStatus.OVERDUE:
-                    rental.mark_overdue()
-                    self.rental_db.update_rental(rental)
-
-                    cart = self.carts_db.get(rental.cart_id)
-                    if cart:
-                        cart.status = CartStatus.IN_USE
-
-                    overdue_time = datetime.now() - rental.expected_return
-                    logger.warning(
-                        f"⏰ Cart {rental.cart_id} is OVERDUE by {overdue_time} "
-                        f"(user: {rental.user_phone})"
-                    )
+                self._overdue.append((rental, self.carts_db.get(rental.cart_id)))
+
+                overdue_time = datetime.now() - rental.expected_return
+                logger.warning(
+                    f"⏰ Cart {rental.cart_id} is OVERDUE by {overdue_time} "
+                    f"(user: {rental.user_phone})"
+                )
 
+        except self.rental_db.DatabaseError:
+            raise  # Roll back the tick's unit of work (retried next tick)
         except Exception as e:
             logger.error(f"Error checking overdue rentals: {e}")
+
+    def _reconcile_statistics_if_due(self):
+        """Verify rental statistics counters once every reconcile_interval."""
+        if time.monotonic() - self._last_reconcile < self.reconcile_interval:
+            return
+
+        self._last_reconcile = time.monotonic()
+        try:
+            self.rental_db.reconcile_statistics()
+        except Exception as e:
+            logger.error(f"Error reconciling rental statistics: {e}")
+
+    def get_monitoring_status(self) -> dict:
+        """
+        Get current monitoring status.
+
+        Returns:
+            Dictionary with monitoring info
+        """
+        return {
+            "running": self.running,
+            "check_interval": self.check_interval,
+            "controller_connected": self.lock_controller is not None,
+            "database_path": self.rental_db.db_path,
+            "rs485_metrics": self.lock_controller.get_metrics() if self.lock_controller else None
+        }
@@ -0,0 +1,322 @@
+"""
+Hardware Daemon
+===============
+
+Standalone process that owns the RS485 serial port.
+
+The API server and the Raspberry Pi agent talk to it through a Unix
+domain socket (protocol and client in hardware/ipc.py), so a wedged
+serial read or a frozen USB driver stalls only this process - callers
+time out after HARDWARE_RPC_TIMEOUT seconds and keep serving.
+
+The daemon:
+- Connects the controller in the background, retrying with backoff, and
+  again whenever the port closes (USB unplugged, failed port reset)
+- Polls the lock states every `poll_interval` seconds (the hardware side
+  of the CU16 monitor; the monitor's rental bookkeeping reads the polled
+  states through the client)
+- Runs one command at a time on the bus (RS485 is half-duplex), and
+  drops a command (or a retry) it could not finish before the caller's
+  deadline (so an unlock never runs after the API already reported it
+  as failed)
+
+Usage:
+    python run_hardware_daemon.py [--socket data/hardware.sock]
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from core import get_logger
+from .connector import HardwareConnector
+from .discovery import calibrate_controller
+from .ipc import (
+    LOCKER,
+    LOCKER_COMMANDS,
+    OP_ALL_LOCKS_STATE,
+    OP_LOCK_STATE,
+    OP_METRICS,
+    OP_PING,
+    OP_STATUS,
+    STATUS_BAD_REQUEST,
+    STATUS_ERROR,
+    STATUS_NOT_CONNECTED,
+    STATUS_OK,
+    IPCError,
+    encode_frame,
+    encode_lock_state,
+    read_frame,
+)
+from .rs485 import LockStateData, RS485Controller, command_deadline
+
+logger = get_logger(__name__)
+
+# Seconds a request waits for the bus before failing (a wedged read holds
+# it) - below the client's HARDWARE_RPC_TIMEOUT
+BUS_WAIT_SECONDS = 2.0
+
+# Seconds of a request's deadline kept for the command itself - one
+# attempt of a controller without `attempt_seconds` (RS485Controller runs
+# further retries only while they fit before the deadline)
+COMMAND_SECONDS = 1.5
+
+
+class HardwareDaemon:
+    """
+    Serves an RS485 controller on a Unix domain socket.
+
+    Example:
+        daemon = HardwareDaemon(RS485Controller("/dev/ttyUSB0"), "data/hardware.sock")
+        daemon.start()
+        ...
+        daemon.stop()
+    """
+
+    def __init__(
+        self,
+        controller: RS485Controller,
+        socket_path: str,
+        poll_interval: float = 1.0,
+        retry_max_delay: float = 60.0,
+        calibrate: Optional[Callable[[RS485Controller], object]] = None,
+    ):
+        """
+        Initialize daemon.
+
+        Args:
+            controller: Controller to own (not connected yet)
+            socket_path: Unix socket to listen on
+            poll_interval: Seconds between lock state polls
+            retry_max_delay: Maximum seconds between connection attempts
+            calibrate: Called before each connection attempt (see
+                       hardware/discovery.py)
+        """
+        self.controller = controller
+        self.socket_path = socket_path
+        self.poll_interval = poll_interval
+        self.connector = HardwareConnector(
+            controller, on_connect=self._on_connect, max_delay=retry_max_delay, calibrate=calibrate
+        )
+        self.requests = 0
+        self.clients = 0
+        self._connected = False
+        self._bus_lock = threading.Lock()
+        self._states: Optional[Tuple[float, Optional[LockStateData]]] = None  # (polled at, states)
+        self._stop = threading.Event()
+        self._server: Optional[socket.socket] = None
+        self._threads = []
+
+    def _on_connect(self, controller: RS485Controller):
+        self._connected = True
+
+    @property
+    def connected(self) -> bool:
+        return self._connected and self.controller.is_connected
+
+    def start(self):
+        """Listen on the socket and start connecting and polling."""
+        path = Path(self.socket_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            # Left behind by a daemon that did not shut down cleanly
+            path.unlink()
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self._server.listen(16)
+
+        self.connector.start()
+        for target, name in ((self._accept_loop, "hardware-accept"), (self._poll_loop, "hardware-poll")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Hardware daemon listening on {self.socket_path} (port {self.controller.port})")
+
+    def stop(self):
+        """Stop serving and close the serial port."""
+        self._stop.set()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+        self.connector.stop()
+        self.controller.disconnect()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+        logger.info("Hardware daemon stopped")
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return  # Socket closed by stop()
+            threading.Thread(target=self._serve_client, args=(conn,), name="hardware-client", daemon=True).start()
+
+    def _serve_client(self, conn: socket.socket):
+        """Answer one client's requests until it disconnects."""
+        self.clients += 1
+        try:
+            with conn:
+                while not self._stop.is_set():
+                    try:
+                        request_id, opcode, _, payload, deadline = read_frame(conn)
+                        status, response = self.handle(opcode, payload, deadline)
+                        conn.sendall(encode_frame(request_id, opcode, status, response))
+                    except (OSError, IPCError):
+                        return  # Client gone (or timed out and reconnected)
+        finally:
+            self.clients -= 1
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            if not self._connected or not self._bus_lock.acquire(timeout=BUS_WAIT_SECONDS):
+                continue
+            try:
+                if not self.controller.is_connected:
+                    # Checked under the bus lock - a command's port reset closes it briefly
+                    self._connected = False
+                    self.connector.reconnect()
+                    continue
+                states = self.controller.get_all_locks_state()
+                self._states = (time.monotonic(), states)
+            except Exception as e:
+                logger.error(f"Lock state poll failed: {e}")
+            finally:
+                self._bus_lock.release()
+
+    def polled_states(self) -> Optional[LockStateData]:
+        """
+        Get the last polled lock states.
+
+        Raises:
+            IPCError: No poll within the last three intervals (bus wedged)
+        """
+        if self._states is None:
+            raise IPCError("lock states not polled yet")
+        polled_at, states = self._states
+        if time.monotonic() - polled_at > max(3 * self.poll_interval, 5.0):
+            raise IPCError("lock states stale")
+        return states
+
+    def handle(self, opcode: int, payload: bytes, deadline: float = 0.0) -> Tuple[int, bytes]:
+        """
+        Execute one request.
+
+        Args:
+            opcode: Request opcode
+            payload: Request payload
+            deadline: Unix time the caller gives up at (0 for none)
+
+        Returns:
+            (status, response payload)
+        """
+        self.requests += 1
+        if opcode == OP_PING:
+            return STATUS_OK, b""
+        if opcode == OP_STATUS:
+            return STATUS_OK, json.dumps(self.get_status()).encode()
+        if opcode == OP_METRICS:
+            return STATUS_OK, json.dumps(self.controller.get_metrics(), default=str).encode()
+
+        if not self.connected:
+            return STATUS_NOT_CONNECTED, b"RS485 controller not connected"
+
+        try:
+            if opcode == OP_ALL_LOCKS_STATE:
+                return STATUS_OK, encode_lock_state(self.polled_states())
+            if opcode in LOCKER_COMMANDS or opcode == OP_LOCK_STATE:
+                if len(payload) != LOCKER.size:
+                    return STATUS_BAD_REQUEST, b"locker ID expected"
+                (locker_id,) = LOCKER.unpack(payload)
+                bus_wait = BUS_WAIT_SECONDS
+                if deadline:
+                    # Only start a command that can finish before the caller gives up
+                    command_seconds = getattr(self.controller, "attempt_seconds", COMMAND_SECONDS)
+                    bus_wait = min(bus_wait, deadline - command_seconds - time.time())
+                    if bus_wait <= 0:
+                        return STATUS_ERROR, b"request expired"
+                if not self._bus_lock.acquire(timeout=bus_wait):
+                    return STATUS_ERROR, b"RS485 bus busy"
+                try:
+                    with command_deadline(deadline or None):
+                        if opcode == OP_LOCK_STATE:
+                            return STATUS_OK, encode_lock_state(self.controller.get_lock_state(locker_id))
+                        result = getattr(self.controller, LOCKER_COMMANDS[opcode])(locker_id)
+                finally:
+                    self._bus_lock.release()
+                return STATUS_OK, b"\x01" if result else b"\x00"
+        except Exception as e:
+            logger.error(f"Hardware request {opcode} failed: {e}")
+            return STATUS_ERROR, str(e).encode()
+
+        return STATUS_BAD_REQUEST, f"unknown opcode {opcode}".encode()
+
+    def get_status(self) -> dict:
+        """Get daemon status."""
+        return {
+            "connected": self.connected,
+            "port": self.controller.port,
+            "baudrate": self.controller.baudrate,
+            "connector": self.connector.get_status(),
+            "clients": self.clients,
+            "requests": self.requests,
+            "polled_ago": round(time.monotonic() - self._states[0], 3) if self._states else None,
+        }
+
+
+def main():
+    """Run the daemon until SIGINT/SIGTERM."""
+    import argparse
+    import signal
+
+    from core import settings, setup_logging
+
+    parser = argparse.ArgumentParser(description="CartWise hardware daemon (owns the RS485 port)")
+    parser.add_argument("--socket", default=settings.HARDWARE_SOCKET or "data/hardware.sock",
+                        help="Unix socket to listen on")
+    parser.add_argument("--serial-port", default=settings.SERIAL_PORT, help="RS485 serial port")
+    parser.add_argument("--baudrate", type=int, default=settings.BAUD_RATE, help="RS485 baud rate")
+    parser.add_argument("--poll-interval", type=float, default=settings.HARDWARE_POLL_INTERVAL,
+                        help="Seconds between lock state polls")
+    args = parser.parse_args()
+
+    setup_logging()
+    controller = RS485Controller(
+        port=args.serial_port,
+        baudrate=args.baudrate,
+        enable_metrics=settings.RS485_METRICS_ENABLED,
+    )
+    daemon = HardwareDaemon(
+        controller,
+        args.socket,
+        poll_interval=args.poll_interval,
+        retry_max_delay=settings.RS485_RETRY_MAX_SECONDS,
+        calibrate=(
+            (lambda c: calibrate_controller(c, settings.RS485_CALIBRATION_PATH))
+            if settings.RS485_DISCOVERY else None
+        ),
+    )
+
+    stop_requested = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_requested.set())
+    daemon.start()
+    try:
+        stop_requested.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
@@ -0,0 +1,278 @@
+"""
+RS485 Discovery and Calibration
+===============================
+
+Finds the serial port and baud rate the KR-CU16 answers on, and caches
+the result so later boots skip probing.
+
+- Candidate ports: the configured port first, then USB serial adapters
+  reported by the OS
+- Ports are probed in parallel (one thread per port); on each port the
+  baud rates are tried in order with one short status query each - no
+  settle sleeps, no retries with port resets
+- The first valid status frame wins; its port, baud rate, adapter and
+  measured turnaround (query written to full response read) are saved
+  as JSON in the calibration file
+
+Delete the calibration file (or run `python test_baud_rates.py
+--recalibrate`) after moving the adapter or changing the board's baud rate.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import serial
+
+from core import get_logger
+from .rs485 import Command, RS485Controller
+
+logger = get_logger(__name__)
+
+# KR-CU16 factory default first
+BAUD_RATES = (19200, 9600, 38400, 115200)
+
+# Status response: STX ADDR CMD hooks1-8 hooks9-16 ir1-8 ir9-16 ETX SUM
+STATUS_FRAME_LENGTH = 9
+
+# Seconds for an RS232-to-RS485 adapter to switch to transmit
+ADAPTER_SWITCH_SECONDS = 0.01
+
+
+@dataclass
+class Calibration:
+    """Serial settings the controller answered on."""
+
+    port: str
+    baudrate: int
+    turnaround_ms: float     # Status query written -> full response read
+    adapter: str = ""        # Adapter description reported by the OS
+    calibrated_at: str = ""  # ISO timestamp
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def status_query(lock_id: int = 0) -> bytes:
+    """Build a GET_STATUS frame for one lock."""
+    body = bytes([RS485Controller.STX, lock_id, Command.GET_STATUS.value, RS485Controller.ETX])
+    return body + bytes([sum(body) & 0xFF])
+
+
+def is_status_frame(frame: bytes) -> bool:
+    """True if `frame` is a complete status response with a valid checksum."""
+    return (
+        len(frame) >= STATUS_FRAME_LENGTH
+        and frame[0] == RS485Controller.STX
+        and frame[-2] == RS485Controller.ETX
+        and frame[-1] == sum(frame[:-1]) & 0xFF
+    )
+
+
+def list_serial_ports() -> Dict[str, str]:
+    """
+    Get the USB serial adapters reported by the OS.
+
+    Returns:
+        Dictionary of device -> description
+    """
+    from serial.tools import list_ports
+
+    return {
+        port.device: port.description or ""
+        for port in list_ports.comports()
+        if port.vid is not None  # USB adapters only (not built-in UARTs)
+    }
+
+
+def _set_line(setter, value: bool):
+    """Set DTR/RTS if the adapter has modem control lines (many do not)."""
+    try:
+        setter(value)
+    except (serial.SerialException, OSError):
+        pass
+
+
+def probe(port: str, baudrate: int, lock_id: int = 0, timeout: float = 0.15) -> Optional[float]:
+    """
+    Send one status query and time the response.
+
+    Args:
+        port: Serial port
+        baudrate: Baud rate to try
+        lock_id: Lock to query
+        timeout: Seconds to wait for the response
+
+    Returns:
+        Turnaround in milliseconds, or None if there was no valid response
+    """
+    try:
+        connection = serial.Serial(
+            port=port,
+            baudrate=baudrate,
+            bytesize=serial.EIGHTBITS,
+            parity=serial.PARITY_NONE,
+            stopbits=serial.STOPBITS_ONE,
+            timeout=timeout,
+            # RS232-to-RS485 adapter support
+            rtscts=False,
+            dsrdtr=False,
+            xonxoff=False,
+        )
+    except (serial.SerialException, OSError) as e:
+        logger.debug("Cannot open %s: %s", port, e)
+        return None
+
+    try:
+        _set_line(connection.setDTR, True)
+        connection.reset_input_buffer()
+
+        # Transmit mode for the adapter, then back to receive
+        _set_line(connection.setRTS, True)
+        time.sleep(ADAPTER_SWITCH_SECONDS)
+        connection.write(status_query(lock_id))
+        connection.flush()
+        _set_line(connection.setRTS, False)
+
+        started = time.perf_counter()
+        response = connection.read(STATUS_FRAME_LENGTH)
+        turnaround = (time.perf_counter() - started) * 1000
+    except (serial.SerialException, OSError) as e:
+        logger.debug("Probe of %s @ %s failed: %s", port, baudrate, e)
+        return None
+    finally:
+        connection.close()
+
+    if not is_status_frame(response):
+        logger.debug("No status frame from %s @ %s (%d bytes)", port, baudrate, len(response))
+        return None
+    return turnaround
+
+
+def discover_controller(
+    ports: Sequence[str],
+    baudrates: Sequence[int] = BAUD_RATES,
+    lock_id: int = 0,
+    timeout: float = 0.15,
+    adapters: Optional[Dict[str, str]] = None,
+) -> Optional[Calibration]:
+    """
+    Probe ports in parallel for a controller.
+
+    Args:
+        ports: Ports to probe (in parallel; the first answer stops the others)
+        baudrates: Baud rates to try on each port, in order
+        lock_id: Lock to query
+        timeout: Seconds to wait for each response
+        adapters: Port descriptions (from list_serial_ports())
+
+    Returns:
+        Calibration of the first port that answered, or None
+    """
+    ports = list(dict.fromkeys(ports))  # Unique, in order
+    if not ports:
+        return None
+
+    found = threading.Event()
+    started = time.perf_counter()
+
+    def scan(port: str) -> Optional[Calibration]:
+        for baudrate in baudrates:
+            if found.is_set():
+                return None
+            turnaround = probe(port, baudrate, lock_id, timeout)
+            if turnaround is not None:
+                found.set()
+                return Calibration(
+                    port=port,
+                    baudrate=baudrate,
+                    turnaround_ms=round(turnaround, 2),
+                    adapter=(adapters or {}).get(port, ""),
+                    calibrated_at=datetime.now().isoformat(timespec="seconds"),
+                )
+        return None
+
+    with ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="rs485-probe") as pool:
+        results: List[Optional[Calibration]] = list(pool.map(scan, ports))
+
+    elapsed = (time.perf_counter() - started) * 1000
+    calibration = next((result for result in results if result is not None), None)
+    if calibration is None:
+        logger.warning(f"No KR-CU16 controller found on {', '.join(ports)} ({elapsed:.0f} ms)")
+    else:
+        logger.info(
+            f"Found KR-CU16 controller on {calibration.port} @ {calibration.baudrate} baud "
+            f"(turnaround {calibration.turnaround_ms:.1f} ms, discovery {elapsed:.0f} ms)"
+        )
+    return calibration
+
+
+def load_calibration(path: str) -> Optional[Calibration]:
+    """Load a saved calibration (None if missing or unreadable)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return Calibration(**json.load(f))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring invalid RS485 calibration {path}: {e}")
+        return None
+
+
+def save_calibration(path: str, calibration: Calibration):
+    """Save a calibration (atomically - a crash never leaves half a file)."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(calibration.to_dict(), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def calibrate_controller(
+    controller: RS485Controller,
+    path: str = "",
+    force: bool = False,
+) -> Optional[Calibration]:
+    """
+    Point a (not yet connected) controller at the port and baud rate the
+    board answers on.
+
+    Uses the saved calibration while its port exists; otherwise probes
+    the controller's port and the USB serial adapters (the controller's
+    baud rate first) and saves the result.
+
+    Args:
+        controller: Controller to configure
+        path: Calibration file ("" probes on every call)
+        force: Probe even if a calibration is saved
+
+    Returns:
+        Calibration applied, or None (the controller keeps its settings)
+    """
+    adapters = list_serial_ports()
+    calibration = None if force or not path else load_calibration(path)
+
+    if calibration is not None and not (calibration.port in adapters or os.path.exists(calibration.port)):
+        logger.info(f"Calibrated port {calibration.port} is gone - probing again")
+        calibration = None
+
+    if calibration is None:
+        baudrates = [controller.baudrate] + [rate for rate in BAUD_RATES if rate != controller.baudrate]
+        calibration = discover_controller([controller.port, *adapters], baudrates, adapters=adapters)
+        if calibration is None:
+            return None
+        if path:
+            save_calibration(path, calibration)
+
+    controller.port = calibration.port
+    controller.baudrate = calibration.baudrate
+    return calibration
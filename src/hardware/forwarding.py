@@ -0,0 +1,234 @@
+"""
+Hardware Command Forwarding
+===========================
+
+With several worker processes only the leader owns the serial port.
+Followers send lock commands to it through the shared StateBackend:
+
+- RemoteLockController (followers): same methods as RS485Controller for
+  the commands the API uses; each call is queued and waits for the result
+- HardwareCommandServer (leader): executes queued commands on the real
+  controller, stores results, and publishes whether the hardware is
+  connected (followers fall back to demo mode when it is not)
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from core import get_logger
+from core.metrics import registry
+from utils.state_backend import StateBackend
+from .rs485 import RS485Controller, command_deadline
+
+logger = get_logger(__name__)
+
+COMMAND_QUEUE = "hardware:commands"
+RESULTS_NAMESPACE = "hardware:results"
+STATUS_NAMESPACE = "hardware:status"
+
+# Controller methods followers may call (all take a locker ID and return a bool)
+FORWARDED_METHODS = ("unlock_cart", "lock_cart", "check_cart_returned", "auto_lock_on_return")
+
+# Seconds of a command's deadline kept for storing its result and the
+# follower picking it up
+RESULT_SECONDS = 0.2
+
+FORWARDED_COMMANDS = registry.counter(
+    "cartwise_hardware_forwarded_total",
+    "Hardware commands forwarded to the leader worker, by result",
+    ("method", "result"),
+)
+
+
+class RemoteLockController:
+    """
+    Lock controller proxy of a follower worker.
+
+    Calls block (like RS485Controller calls do) until the leader has
+    executed the command or `timeout` passes. Like the real controller,
+    a command that cannot be executed returns False.
+    """
+
+    def __init__(self, backend: StateBackend, timeout: float = 5.0, poll_interval: float = 0.02):
+        """
+        Initialize proxy.
+
+        Args:
+            backend: Shared state backend
+            timeout: Seconds to wait for a result
+            poll_interval: Seconds between result checks
+        """
+        self.backend = backend
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._status_cache: Optional[tuple] = None  # (read at, status)
+
+    def _leader_status(self) -> dict:
+        """Hardware status published by the leader (cached for 1s)."""
+        now = time.monotonic()
+        if self._status_cache is None or now - self._status_cache[0] > 1.0:
+            status = self.backend.get(STATUS_NAMESPACE, "leader") or {}
+            self._status_cache = (now, status)
+        return self._status_cache[1]
+
+    @property
+    def is_connected(self) -> bool:
+        """True if the leader's controller is connected (and its status is fresh)."""
+        status = self._leader_status()
+        return bool(status.get("connected")) and time.time() - status.get("updated", 0) < 10.0
+
+    @property
+    def port(self) -> Optional[str]:
+        return self._leader_status().get("port")
+
+    def get_metrics(self) -> dict:
+        """Get the leader's RS485 metrics (as last published)."""
+        return self._leader_status().get("metrics") or {"enabled": False}
+
+    def _call(self, method: str, *args: Any) -> bool:
+        """Queue a command for the leader and wait for its result."""
+        command_id = uuid.uuid4().hex
+        deadline = time.time() + self.timeout
+        self.backend.push(COMMAND_QUEUE, {"id": command_id, "method": method, "args": list(args), "deadline": deadline})
+
+        while time.time() < deadline:
+            result = self.backend.pop(RESULTS_NAMESPACE, command_id)
+            if result is not None:
+                if "error" in result:
+                    FORWARDED_COMMANDS.inc(method, "error")
+                    logger.error(f"Forwarded {method}{tuple(args)} failed on leader: {result['error']}")
+                    return False
+                FORWARDED_COMMANDS.inc(method, "ok")
+                return result["value"]
+            time.sleep(self.poll_interval)
+
+        FORWARDED_COMMANDS.inc(method, "timeout")
+        logger.error(f"Leader did not answer {method}{tuple(args)} within {self.timeout:g}s")
+        return False
+
+    def unlock_cart(self, locker_id: int) -> bool:
+        return self._call("unlock_cart", locker_id)
+
+    def lock_cart(self, locker_id: int) -> bool:
+        return self._call("lock_cart", locker_id)
+
+    def check_cart_returned(self, locker_id: int) -> bool:
+        return self._call("check_cart_returned", locker_id)
+
+    def auto_lock_on_return(self, locker_id: int) -> bool:
+        return self._call("auto_lock_on_return", locker_id)
+
+    def disconnect(self):
+        """Nothing to close (the leader owns the port)."""
+
+
+class HardwareCommandServer:
+    """Executes forwarded hardware commands on the leader."""
+
+    def __init__(
+        self,
+        backend: StateBackend,
+        get_controller: Callable[[], Optional[RS485Controller]],
+        poll_interval: float = 0.02,
+        status_interval: float = 2.0,
+    ):
+        """
+        Initialize server.
+
+        Args:
+            backend: Shared state backend
+            get_controller: Returns the connected controller (None while
+                            not connected)
+            poll_interval: Seconds between checks of the command queue
+            status_interval: Seconds between hardware status updates
+        """
+        self.backend = backend
+        self.get_controller = get_controller
+        self.poll_interval = poll_interval
+        self.status_interval = status_interval
+        self.executed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start serving in a background thread."""
+        if self._thread is not None:
+            return
+        # Commands queued for a previous leader have timed out by now
+        self.backend.pop_all(COMMAND_QUEUE)
+        self._thread = threading.Thread(target=self._run, name="hardware-commands", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and mark the hardware as unavailable."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.backend.set(STATUS_NAMESPACE, "leader", {"connected": False, "updated": time.time()})
+
+    def _run(self):
+        last_status = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - last_status >= self.status_interval:
+                    self.publish_status()
+                    self._purge_results()
+                    last_status = time.monotonic()
+                for command in self.backend.pop_all(COMMAND_QUEUE):
+                    self.execute(command)
+            except Exception as e:
+                logger.error(f"Hardware command server error: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def publish_status(self):
+        """Publish whether the controller is connected."""
+        controller = self.get_controller()
+        self.backend.set(STATUS_NAMESPACE, "leader", {
+            "connected": controller is not None and controller.is_connected,
+            "port": controller.port if controller is not None else None,
+            "metrics": controller.get_metrics() if controller is not None else None,
+            "updated": time.time(),
+        })
+
+    def _purge_results(self, max_age: float = 60.0):
+        """Drop results nobody collected (the follower timed out)."""
+        cutoff = time.time() - max_age
+        for command_id, result in self.backend.items(RESULTS_NAMESPACE).items():
+            if result.get("at", 0) < cutoff:
+                self.backend.pop(RESULTS_NAMESPACE, command_id)
+
+    def execute(self, command: dict):
+        """
+        Run one forwarded command and store its result.
+
+        A command is only started if one worst-case attempt of the
+        controller fits before the follower gives up, and its retries are
+        bounded by the same deadline (a HardwareClient's daemon keeps that
+        margin itself).
+        """
+        controller = self.get_controller()
+        deadline = command["deadline"] - RESULT_SECONDS
+        if time.time() + getattr(controller, "attempt_seconds", 0.0) > deadline:
+            logger.warning(f"Dropping expired forwarded command {command['method']} ({command['id']})")
+            return
+
+        if command["method"] not in FORWARDED_METHODS:
+            result = {"error": f"method not allowed: {command['method']}"}
+        elif controller is None:
+            result = {"error": "RS485 controller not connected"}
+        else:
+            try:
+                with command_deadline(deadline):
+                    result = {"value": getattr(controller, command["method"])(*command["args"])}
+            except Exception as e:
+                result = {"error": str(e)}
+
+        self.executed += 1
+        result["at"] = time.time()
+        self.backend.set(RESULTS_NAMESPACE, command["id"], result)
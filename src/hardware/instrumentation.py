@@ -0,0 +1,190 @@
+"""
+RS485 Instrumentation
+=====================
+
+Latency histograms and counters for RS485 command round-trips.
+
+Each command sent by RS485Controller is split into phases:
+- build: frame construction and checksum
+- write: RTS switch to TX, write, flush, RTS switch back to RX
+- turnaround: wait for the controller to process the command
+- read: reading the response from the port
+- parse: frame/checksum validation of the response
+- reset: port close/reopen between retries
+- total: the whole _send_command call (all attempts)
+
+Standard library only, so the local agent can use it without the API
+dependencies.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Tuple
+
+# Histogram bucket upper bounds in seconds (last bucket is +Inf)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+PHASES = ("build", "write", "turnaround", "read", "parse", "reset", "total")
+
+# Per-command counters
+COUNTERS = (
+    "commands",           # _send_command calls
+    "retries",            # attempts after the first one
+    "port_resets",        # port close/reopen between retries
+    "failures",           # commands without a response after all retries
+    "serial_errors",      # SerialException raised during an attempt
+    "checksum_failures",  # responses with a bad checksum
+    "frame_errors",       # responses with bad length or STX/ETX markers
+    "bytes_tx",
+    "bytes_rx",
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (cumulative counts computed on export)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        """Record one duration."""
+        index = 0
+        for bound in self.buckets:
+            if seconds <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile from the buckets.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Upper bound of the bucket holding the quantile (max for +Inf)
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(self.buckets):
+                    return min(self.buckets[index], self.max)
+                return self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        """Export histogram as a dictionary (durations in milliseconds)."""
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "sum_seconds": self.total,
+            "buckets": {
+                **{str(bound): n for bound, n in zip(self.buckets, self.counts)},
+                "+Inf": self.counts[-1],
+            },
+        }
+
+
+class RS485Metrics:
+    """
+    Per-command-type phase histograms and counters.
+
+    Thread-safe: the API handlers and the monitor thread share one
+    controller. Only touched when metrics are enabled on the controller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self.started_at = datetime.now()
+
+    def observe(self, command: str, phase: str, seconds: float):
+        """
+        Record the duration of a command phase.
+
+        Args:
+            command: Command name (e.g. "UNLOCK")
+            phase: One of PHASES
+            seconds: Duration in seconds
+        """
+        key = (command, phase)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def increment(self, command: str, counter: str, amount: int = 1):
+        """
+        Increment a per-command counter.
+
+        Args:
+            command: Command name (e.g. "UNLOCK")
+            counter: One of COUNTERS
+            amount: Increment (default: 1)
+        """
+        with self._lock:
+            counters = self._counters.get(command)
+            if counters is None:
+                counters = self._counters[command] = dict.fromkeys(COUNTERS, 0)
+            counters[counter] += amount
+
+    def reset(self):
+        """Clear all recorded data."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = datetime.now()
+
+    def snapshot(self) -> dict:
+        """
+        Export all metrics.
+
+        Returns:
+            Dictionary with per-command phases/counters and overall totals
+        """
+        with self._lock:
+            commands: Dict[str, dict] = {}
+            for command, counters in self._counters.items():
+                commands[command] = {"counters": dict(counters), "phases": {}}
+            for (command, phase), histogram in self._histograms.items():
+                entry = commands.setdefault(
+                    command, {"counters": dict.fromkeys(COUNTERS, 0), "phases": {}}
+                )
+                entry["phases"][phase] = histogram.snapshot()
+
+        totals = dict.fromkeys(COUNTERS, 0)
+        for entry in commands.values():
+            for counter, value in entry["counters"].items():
+                totals[counter] += value
+
+        return {
+            "enabled": True,
+            "since": self.started_at.isoformat(),
+            "totals": totals,
+            "commands": commands,
+        }
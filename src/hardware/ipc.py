@@ -0,0 +1,310 @@
+"""
+Hardware Daemon IPC
+===================
+
+Binary protocol and client of the hardware daemon (hardware/daemon.py).
+
+Frames (requests and responses) on a Unix domain socket:
+
+    request id (u32) | opcode (u8) | status (u8) | payload length (u16) |
+    deadline (f64) | payload
+
+- Requests carry status 0 and the caller's deadline (Unix time, 0 for
+  none) - the daemon drops a command it could not finish before the
+  caller gives up; a locker command's payload is the locker ID (u16)
+- Responses echo the request id and opcode; command results are one byte
+  (0/1), lock states four bytes (LockStateData fields), status and metrics
+  JSON, errors a UTF-8 message
+
+HardwareClient has the RS485Controller methods the API, the monitor and
+the Raspberry Pi agent use, so it is a drop-in replacement for a local
+controller. A daemon that does not answer within `timeout` counts as a
+failed command (False/None) - a wedged serial port (or a call stuck
+ahead of this one) never blocks callers for longer than that.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import json
+import socket
+import struct
+import threading
+import time
+from typing import Optional
+
+from core import get_logger
+from .rs485 import LockStateData, current_deadline
+
+logger = get_logger(__name__)
+
+# request id, opcode, status, payload length, deadline
+HEADER = struct.Struct("!IBBHd")
+LOCKER = struct.Struct("!H")
+LOCK_STATE = struct.Struct("!BBBB")
+
+# Opcodes
+OP_PING = 0
+OP_STATUS = 1
+OP_UNLOCK = 2
+OP_LOCK = 3
+OP_CHECK_RETURNED = 4
+OP_AUTO_LOCK = 5
+OP_LOCK_STATE = 6
+OP_ALL_LOCKS_STATE = 7
+OP_METRICS = 8
+
+# Locker commands returning a bool, by opcode
+LOCKER_COMMANDS = {
+    OP_UNLOCK: "unlock_cart",
+    OP_LOCK: "lock_cart",
+    OP_CHECK_RETURNED: "check_cart_returned",
+    OP_AUTO_LOCK: "auto_lock_on_return",
+}
+
+# Response status
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_NOT_CONNECTED = 2
+STATUS_BAD_REQUEST = 3
+
+
+class IPCError(Exception):
+    """Raised when the daemon cannot be reached or sends an invalid frame."""
+
+
+def encode_frame(
+    request_id: int, opcode: int, status: int = STATUS_OK, payload: bytes = b"", deadline: float = 0.0
+) -> bytes:
+    """Build one frame."""
+    return HEADER.pack(request_id, opcode, status, len(payload), deadline) + payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    """Read exactly `size` bytes (IPCError if the peer closes first)."""
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise IPCError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(sock: socket.socket) -> tuple:
+    """
+    Read one frame.
+
+    Returns:
+        (request id, opcode, status, payload, deadline)
+    """
+    request_id, opcode, status, length, deadline = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    payload = _recv_exactly(sock, length) if length else b""
+    return request_id, opcode, status, payload, deadline
+
+
+def encode_lock_state(state: Optional[LockStateData]) -> bytes:
+    """Pack lock states (empty payload for None)."""
+    if state is None:
+        return b""
+    return LOCK_STATE.pack(state.lock_hooks_1_8, state.lock_hooks_9_16, state.infrared_1_8, state.infrared_9_16)
+
+
+def decode_lock_state(payload: bytes) -> Optional[LockStateData]:
+    """Unpack lock states packed by encode_lock_state()."""
+    if not payload:
+        return None
+    return LockStateData(*LOCK_STATE.unpack(payload))
+
+
+class HardwareClient:
+    """
+    RS485 controller proxy talking to the hardware daemon.
+
+    Thread-safe: calls share one connection and run one at a time (the
+    daemon serializes bus access anyway); waiting for the connection
+    counts against a call's timeout.
+
+    Example:
+        controller = HardwareClient("/run/cartwise/hardware.sock")
+        if controller.connect():
+            controller.unlock_cart(0)
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 3.0):
+        """
+        Initialize client.
+
+        Args:
+            socket_path: Daemon's Unix socket
+            timeout: Seconds a call may take in total
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._request_id = 0
+        self._lock = threading.Lock()
+        self._status_cache: Optional[tuple] = None  # (read at, status)
+
+    def _connect_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise IPCError(f"cannot connect to {self.socket_path}: {e}") from e
+        return sock
+
+    def _close_socket(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def call(self, opcode: int, payload: bytes = b"") -> bytes:
+        """
+        Send one request and wait for its response.
+
+        Waits at most `timeout` seconds, or until the deadline set with
+        rs485.command_deadline() if that comes first.
+
+        Args:
+            opcode: Request opcode
+            payload: Request payload
+
+        Returns:
+            Response payload
+
+        Raises:
+            IPCError: Daemon unreachable, busy, timed out or returned an error
+        """
+        started = time.monotonic()
+        timeout = self.timeout
+        deadline = current_deadline()
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.time())
+            if timeout <= 0:
+                raise IPCError(f"hardware daemon request {opcode} failed: timed out")
+        if not self._lock.acquire(timeout=timeout):
+            raise IPCError(f"hardware daemon request {opcode} failed: previous request still pending")
+        try:
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                raise IPCError(f"hardware daemon request {opcode} failed: timed out")
+            self._request_id = (self._request_id + 1) & 0xFFFFFFFF
+            request_id = self._request_id
+            try:
+                if self._sock is None:
+                    self._sock = self._connect_socket()
+                self._sock.settimeout(remaining)
+                frame = encode_frame(request_id, opcode, payload=payload, deadline=time.time() + remaining)
+                self._sock.sendall(frame)
+                response_id, _, status, response, _ = read_frame(self._sock)
+            except (OSError, IPCError) as e:
+                # Unknown stream position (e.g. a late response) - reconnect next call
+                self._close_socket()
+                raise IPCError(f"hardware daemon request {opcode} failed: {e}") from e
+
+            if response_id != request_id:
+                self._close_socket()
+                raise IPCError(f"response {response_id} does not match request {request_id}")
+        finally:
+            self._lock.release()
+
+        if status != STATUS_OK:
+            raise IPCError(response.decode("utf-8", "replace") or f"status {status}")
+        return response
+
+    def _status(self) -> dict:
+        """Daemon status (cached for 1s - is_connected is read per request)."""
+        now = time.monotonic()
+        if self._status_cache is None or now - self._status_cache[0] > 1.0:
+            try:
+                status = json.loads(self.call(OP_STATUS))
+            except IPCError:
+                status = {}
+            self._status_cache = (now, status)
+        return self._status_cache[1]
+
+    # RS485Controller interface
+
+    @property
+    def port(self) -> Optional[str]:
+        return self._status().get("port") or self.socket_path
+
+    @property
+    def is_connected(self) -> bool:
+        """True if the daemon is reachable and its serial port is open."""
+        return bool(self._status().get("connected"))
+
+    def connect(self) -> bool:
+        """
+        Check that the daemon is up and its controller connected.
+
+        Returns:
+            True if hardware commands can be sent
+        """
+        self._status_cache = None
+        return self.is_connected
+
+    def disconnect(self):
+        """Close the connection to the daemon (the daemon keeps the port)."""
+        if self._lock.acquire(timeout=self.timeout):
+            try:
+                self._close_socket()
+            finally:
+                self._lock.release()
+
+    def get_metrics(self) -> dict:
+        """Get the daemon's RS485 metrics."""
+        try:
+            return json.loads(self.call(OP_METRICS))
+        except IPCError as e:
+            logger.error(f"Hardware daemon metrics failed: {e}")
+            return {"enabled": False}
+
+    def _locker_command(self, opcode: int, locker_id: int) -> bool:
+        try:
+            return self.call(opcode, LOCKER.pack(locker_id)) == b"\x01"
+        except IPCError as e:
+            logger.error(f"{LOCKER_COMMANDS[opcode]}({locker_id}) failed: {e}")
+            return False
+
+    def unlock_cart(self, locker_id: int) -> bool:
+        return self._locker_command(OP_UNLOCK, locker_id)
+
+    def lock_cart(self, locker_id: int) -> bool:
+        return self._locker_command(OP_LOCK, locker_id)
+
+    def check_cart_returned(self, locker_id: int) -> bool:
+        return self._locker_command(OP_CHECK_RETURNED, locker_id)
+
+    def auto_lock_on_return(self, locker_id: int) -> bool:
+        return self._locker_command(OP_AUTO_LOCK, locker_id)
+
+    def get_lock_state(self, locker_id: int) -> Optional[LockStateData]:
+        try:
+            return decode_lock_state(self.call(OP_LOCK_STATE, LOCKER.pack(locker_id)))
+        except IPCError as e:
+            logger.error(f"get_lock_state({locker_id}) failed: {e}")
+            return None
+
+    def get_all_locks_state(self) -> Optional[LockStateData]:
+        """Get the lock states last polled by the daemon."""
+        try:
+            return decode_lock_state(self.call(OP_ALL_LOCKS_STATE))
+        except IPCError as e:
+            logger.error(f"get_all_locks_state failed: {e}")
+            return None
+
+    def ping(self) -> float:
+        """
+        Measure one round trip.
+
+        Returns:
+            Round trip in milliseconds
+        """
+        start = time.perf_counter()
+        self.call(OP_PING)
+        return (time.perf_counter() - start) * 1000
@@ -22,17 +22,48 @@ Version: 2.2.0 (RS232-to-RS485 Adapter Support Added)
 """
 
 import serial
+import threading
+from contextlib import contextmanager
 from typing import Optional, Dict, Tuple, List
 from enum import Enum
 from dataclasses import dataclass
 import time # Added for sleep functionality
 
+from core.logging import LazyHex
+from hardware.instrumentation import RS485Metrics
+
 # Assuming 'core' and 'get_logger' are defined elsewhere
 # from core import get_logger
 import logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO) # Set default logging level for demonstration
 
+_deadline = threading.local()
+
+
+@contextmanager
+def command_deadline(deadline: Optional[float]):
+    """
+    Bound the RS485 commands this thread runs to a caller's deadline.
+
+    An attempt (or retry) is started only if it can finish before
+    `deadline`, so a command never outlives a caller that gave up.
+
+    Args:
+        deadline: Unix time the caller gives up at (None for no limit)
+    """
+    previous = getattr(_deadline, "value", None)
+    _deadline.value = deadline
+    try:
+        yield
+    finally:
+        _deadline.value = previous
+
+
+def current_deadline() -> Optional[float]:
+    """Deadline set by command_deadline() on this thread (None if unset)."""
+    return getattr(_deadline, "value", None)
+
 
 class Command(Enum):
     """KR-CU16 Lock controller commands."""
@@ -48,6 +79,17 @@ class Command(Enum):
     DELAYED_UNLOCK = 0x39      # Set delayed unlock
 
 
+# Command byte -> name (for metrics labels)
+COMMAND_NAMES = {command.value: command.name for command in Command}
+
+
+def _command_name(frame: Optional[bytes]) -> str:
+    """Get the command name from a request/response frame (byte 2)."""
+    if frame and len(frame) > 2:
+        return COMMAND_NAMES.get(frame[2], "UNKNOWN")
+    return "UNKNOWN"
+
+
 @dataclass
 class LockStateData:
     """Lock state data from CU16."""
@@ -119,7 +161,18 @@ class RS485Controller:
     ETX = 0x03
     BROADCAST_ADDR = 0xF0  # For querying all CU16 on bus
 
-    def __init__(self, port: str = "/dev/ttyUSB0", baudrate: int = 19200, timeout: float = 1.0):
+    # Worst-case seconds of one attempt on top of the read timeout (port
+    # reopen, TX switch, response delay) and of the port reset before a retry
+    ATTEMPT_OVERHEAD_SECONDS = 0.5
+    PORT_RESET_SECONDS = 0.5
+
+    def __init__(
+        self,
+        port: str = "/dev/ttyUSB0",
+        baudrate: int = 19200,
+        timeout: float = 1.0,
+        enable_metrics: bool = False,
+    ):
         """
         Initialize KR-CU16 RS485 controller.
 
@@ -127,6 +180,7 @@ class RS485Controller:
             port: Serial port path
             baudrate: Communication speed (default 19200 for KR-CU16)
             timeout: Read timeout in seconds
+            enable_metrics: Record per-phase latency histograms and counters
         """
         self.port = port
         self.baudrate = baudrate
@@ -134,6 +188,9 @@ class RS485Controller:
         self.serial: Optional[serial.Serial] = None
         self.cu_address = 0x00  # Default CU16 board address
 
+        # None when disabled - the hot path only pays one attribute check
+        self.metrics: Optional[RS485Metrics] = RS485Metrics() if enable_metrics else None
+
         logger.info(f"Initializing KR-CU16 RS485 Controller on {port} @ {baudrate} baud")
 
     def connect(self) -> bool:
@@ -175,9 +232,11 @@ class RS485Controller:
 
     def test_baudrates(self, test_lock_id: int = 0) -> Optional[int]:
         """
-        Test different baud rates to find the correct one.
+        Find the baud rate the controller answers on (this port only).
 
-        Tries common baud rates: 9600, 19200, 38400, 115200
+        Tries the current rate first, then 19200, 9600, 38400, 115200 with
+        one short status query each (see hardware/discovery.py). The port
+        is reopened at the working rate (or the original one).
 
         Args:
             test_lock_id: Lock ID to test with (default: 0)
@@ -185,62 +244,18 @@ class RS485Controller:
         Returns:
             Working baud rate or None if none work
         """
-        common_baudrates = [19200, 9600, 38400, 115200]
-
-        logger.info("Testing different baud rates...")
-
-        original_baudrate = self.baudrate
-
-        for baudrate in common_baudrates:
-            logger.info(f"Testing baud rate: {baudrate}")
-
-            try:
-                # Close existing connection if open
-                if self.serial and self.serial.is_open:
-                    self.serial.close()
-                    time.sleep(0.2)
+        from hardware.discovery import BAUD_RATES, discover_controller
 
-                # Try to connect with this baud rate
-                self.baudrate = baudrate
-                self.serial = serial.Serial(
-                    port=self.port,
-                    baudrate=baudrate,
-                    bytesize=serial.EIGHTBITS,
-                    parity=serial.PARITY_NONE,
-                    stopbits=serial.STOPBITS_ONE,
-                    timeout=self.timeout,
-                    # RS232-to-RS485 adapter support
-                    rtscts=False,
-                    dsrdtr=False,
-                    xonxoff=False,
-                )
+        self.disconnect()
+        baudrates = [self.baudrate] + [rate for rate in BAUD_RATES if rate != self.baudrate]
+        calibration = discover_controller([self.port], baudrates, lock_id=test_lock_id)
 
-                # Set DTR and RTS for RS232-to-RS485 adapter
-                self.serial.setDTR(True)
-                self.serial.setRTS(False)
-
-                time.sleep(0.3)  # Give port time to stabilize
-
-                # Try to send a simple status query
-                message = self._build_message(self.cu_address, test_lock_id, Command.GET_STATUS)
-                response = self._send_command(message, expected_response_len=9, retry_count=1)
-
-                if response and len(response) >= 5:
-                    # Check if response looks valid (has correct frame markers)
-                    if response[0] == self.STX and response[-2] == self.ETX:
-                        logger.info(f"✅ Found working baud rate: {baudrate}")
-                        return baudrate
-
-                logger.warning(f"Baud rate {baudrate} - no valid response")
-
-            except Exception as e:
-                logger.error(f"Error testing baud rate {baudrate}: {e}")
-                continue
-
-        # Restore original baud rate
-        self.baudrate = original_baudrate
-        logger.warning("No working baud rate found - keeping original setting")
-        return None
+        if calibration is None:
+            logger.warning("No working baud rate found - keeping original setting")
+        else:
+            self.baudrate = calibration.baudrate
+        self.connect()
+        return calibration.baudrate if calibration else None
 
     def ensure_port_ready(self):
         """
@@ -285,6 +300,34 @@ class RS485Controller:
         except Exception as e:
             logger.error(f"Failed to ensure/reopen RS485 port {self.port}: {e}")
 
+    def get_metrics(self) -> dict:
+        """
+        Get RS485 latency histograms and counters.
+
+        Returns:
+            Metrics snapshot, or {"enabled": False} if metrics are disabled
+        """
+        if self.metrics is None:
+            return {"enabled": False}
+        return self.metrics.snapshot()
+
+    @property
+    def attempt_seconds(self) -> float:
+        """Worst-case seconds of one command attempt."""
+        return self.timeout + self.ATTEMPT_OVERHEAD_SECONDS
+
+    def _can_retry(self, deadline: Optional[float], pause: float) -> bool:
+        """True if a pause plus another attempt finish before the deadline."""
+        if deadline is None or time.time() + pause + self.attempt_seconds <= deadline:
+            return True
+        logger.warning("Not retrying - the attempt could not finish before the caller's deadline")
+        return False
+
+    @property
+    def is_connected(self) -> bool:
+        """True if the serial port is open."""
+        return self.serial is not None and self.serial.is_open
+
     def disconnect(self):
         """Close the serial connection."""
         if self.serial and self.serial.is_open:
@@ -302,6 +345,10 @@ class RS485Controller:
         """
         Build a KR-CU16 protocol message.
         """
+        metrics = self.metrics
+        if metrics is not None:
+            started = time.perf_counter()
+
         # ADDR byte: for single CU, lock_num 0-15 maps to ADDR 0x00-0x0F
         addr_byte = lock_num
 
@@ -319,13 +366,19 @@ class RS485Controller:
         # Complete message
         message = message_body + bytes([checksum])
 
-        logger.debug(f"Built KR-CU16 message: {message.hex().upper()} (Lock={lock_num}, CMD={command.name})")
+        if metrics is not None:
+            metrics.observe(command.name, "build", time.perf_counter() - started)
+
+        logger.debug("Built KR-CU16 message: %s (Lock=%s, CMD=%s)", LazyHex(message), lock_num, command.name)
         return message
 
     def _send_command(self, message: bytes, expected_response_len: int = 9, retry_count: int = 3) -> Optional[bytes]:
         """
         Send command and wait for response with automatic retry and port reset.
 
+        Under command_deadline() only the attempts that can finish before
+        the deadline are made.
+
         Args:
             message: Message to send
             expected_response_len: Expected length of response
@@ -334,14 +387,62 @@ class RS485Controller:
         Returns:
             Response bytes or None if all retries failed
         """
+        metrics = self.metrics
+        if metrics is None:
+            return self._send_command_attempts(message, expected_response_len, retry_count, None, "")
+
+        command = _command_name(message)
+        metrics.increment(command, "commands")
+        started = time.perf_counter()
+        try:
+            response = self._send_command_attempts(
+                message, expected_response_len, retry_count, metrics, command
+            )
+        finally:
+            metrics.observe(command, "total", time.perf_counter() - started)
+
+        if response is None:
+            metrics.increment(command, "failures")
+        return response
+
+    def _send_command_attempts(
+        self,
+        message: bytes,
+        expected_response_len: int,
+        retry_count: int,
+        metrics: Optional[RS485Metrics],
+        command: str,
+    ) -> Optional[bytes]:
+        """
+        Retry loop of _send_command.
+
+        Args:
+            message: Message to send
+            expected_response_len: Expected length of response
+            retry_count: Number of attempts
+            metrics: Metrics to record into (None when disabled)
+            command: Command name label for the metrics
+
+        Returns:
+            Response bytes or None if all retries failed
+        """
+        debug = logger.isEnabledFor(logging.DEBUG)
+        deadline = current_deadline()
+        if deadline is not None and time.time() + self.attempt_seconds > deadline:
+            logger.warning("Command not sent - it could not finish before the caller's deadline")
+            return None
+
         for attempt in range(retry_count):
+            if metrics is not None and attempt > 0:
+                metrics.increment(command, "retries")
+
             try:
                 # Ensure port is ready before each attempt
                 self.ensure_port_ready()
 
                 if not self.serial or not self.serial.is_open:
                     logger.error("Serial port not connected after port check")
-                    if attempt < retry_count - 1:
+                    if attempt < retry_count - 1 and self._can_retry(deadline, 0.2):
                         time.sleep(0.2)
                         continue
                     return None
@@ -349,7 +450,11 @@ class RS485Controller:
                 # Clear any stale data in input/output buffers
                 self.serial.reset_input_buffer()
                 self.serial.reset_output_buffer()
-                logger.debug(f"Buffers cleared (attempt {attempt + 1}/{retry_count})")
+                if debug:
+                    logger.debug("Buffers cleared (attempt %d/%d)", attempt + 1, retry_count)
+
+                if metrics is not None:
+                    phase_started = time.perf_counter()
 
                 # For RS232-to-RS485: Enable transmit mode
                 if hasattr(self.serial, 'setRTS'):
@@ -359,27 +464,47 @@ class RS485Controller:
                 # Send message
                 self.serial.write(message)
                 self.serial.flush()
-                logger.debug(f">> Sent: {message.hex().upper()}")
+                if debug:
+                    logger.debug(">> Sent: %s", LazyHex(message))
 
                 # For RS232-to-RS485: Switch to receive mode
                 if hasattr(self.serial, 'setRTS'):
                     self.serial.setRTS(False)  # Switch to RX mode
 
+                if metrics is not None:
+                    now = time.perf_counter()
+                    metrics.observe(command, "write", now - phase_started)
+                    metrics.increment(command, "bytes_tx", len(message))
+                    phase_started = now
+
                 # Wait for controller to process (increase delay on retries)
                 delay = 0.1 + (attempt * 0.05)  # 0.1s, 0.15s, 0.2s
                 time.sleep(delay)
 
+                if metrics is not None:
+                    now = time.perf_counter()
+                    metrics.observe(command, "turnaround", now - phase_started)
+                    phase_started = now
+
                 # Wait for response
                 response = self.serial.read(expected_response_len)
-                logger.debug(f"<< Received: {response.hex().upper() if response else 'None'}")
+
+                if metrics is not None:
+                    metrics.observe(command, "read", time.perf_counter() - phase_started)
+                    metrics.increment(command, "bytes_rx", len(response) if response else 0)
+                if debug:
+                    logger.debug("<< Received: %s", LazyHex(response))
 
                 # Validate we got something
                 if not response or len(response) == 0:
                     logger.warning(f"No response received from controller (attempt {attempt + 1}/{retry_count})")
 
-                    if attempt < retry_count - 1:
+                    if attempt < retry_count - 1 and self._can_retry(deadline, self.PORT_RESET_SECONDS):
                         # Reset port before retry
                         logger.info("Resetting port before retry...")
+                        if metrics is not None:
+                            metrics.increment(command, "port_resets")
+                            phase_started = time.perf_counter()
                         try:
                             self.serial.close()
                             time.sleep(0.3)
@@ -388,6 +513,8 @@ class RS485Controller:
                             logger.info("Port reset complete")
                         except Exception as reset_error:
                             logger.error(f"Port reset failed: {reset_error}")
+                        if metrics is not None:
+                            metrics.observe(command, "reset", time.perf_counter() - phase_started)
                         continue
                     else:
                         # Last attempt failed - return None but don't crash
@@ -398,14 +525,16 @@ class RS485Controller:
                 return response
 
             except serial.SerialException as e:
+                if metrics is not None:
+                    metrics.increment(command, "serial_errors")
                 logger.error(f"Serial communication error (attempt {attempt + 1}/{retry_count}): {e}")
-                if attempt < retry_count - 1:
+                if attempt < retry_count - 1 and self._can_retry(deadline, 0.3):
                     time.sleep(0.3)
                     continue
                 return None
             except Exception as e:
                 logger.error(f"Unexpected error sending command (attempt {attempt + 1}/{retry_count}): {e}")
-                if attempt < retry_count - 1:
+                if attempt < retry_count - 1 and self._can_retry(deadline, 0.3):
                     time.sleep(0.3)
                     continue
                 return None
@@ -416,18 +545,44 @@ class RS485Controller:
         """
         Parse status response from CU16.
         """
+        metrics = self.metrics
+        if metrics is None:
+            return self._parse_status_frame(response, None)
+
+        started = time.perf_counter()
+        state = self._parse_status_frame(response, metrics)
+        metrics.observe(_command_name(response), "parse", time.perf_counter() - started)
+        return state
+
+    def _parse_status_frame(self, response: bytes, metrics: Optional[RS485Metrics]) -> Optional[LockStateData]:
+        """
+        Validate a status frame and extract the lock state.
+
+        Args:
+            response: Response frame
+            metrics: Metrics to count validation failures into (None when disabled)
+
+        Returns:
+            LockStateData or None if the frame is invalid
+        """
         if not response or len(response) < 9:
             logger.error(f"Invalid response length: {len(response) if response else 0}")
+            if metrics is not None:
+                metrics.increment(_command_name(response), "frame_errors")
             return None
 
         if response[0] != self.STX or response[-2] != self.ETX:
             logger.error(f"Invalid frame markers: STX={response[0]:02X}, ETX={response[-2]:02X}")
+            if metrics is not None:
+                metrics.increment(_command_name(response), "frame_errors")
             return None
 
         # Verify checksum
         expected_sum = self._calculate_checksum(response[:-1])
         if response[-1] != expected_sum:
             logger.error(f"Checksum mismatch: expected={expected_sum:02X}, got={response[-1]:02X}")
+            if metrics is not None:
+                metrics.increment(_command_name(response), "checksum_failures")
             return None
 
         # Extract data
@@ -457,6 +612,9 @@ class RS485Controller:
 
         # CRITICAL FIX: Send RESET (0x38) after UNLOCK to clear the CU16's BUSY state.
         try:
+            deadline = current_deadline()
+            if deadline is not None and time.time() + 0.1 + self.attempt_seconds > deadline:
+                raise TimeoutError("no time left before the caller's deadline")
             time.sleep(0.1)
             # The lock_num 0x00 is used for a general board-level command like 0x38
             reset_cmd = self._build_message(self.cu_address, 0x00, Command.RETURN_UNLOCK_TIME)
@@ -499,7 +657,7 @@ class RS485Controller:
         """
         Get complete lock state (lock hook + infrared sensor).
         """
-        logger.debug(f"Querying state of lock {locker_id}")
+        logger.debug("Querying state of lock %s", locker_id)
 
         # ensure_port_ready is called inside _send_command
         message = self._build_message(self.cu_address, locker_id, Command.GET_STATUS)
@@ -530,7 +688,7 @@ class RS485Controller:
         """
         Check if cart was physically returned (micro-switch detected).
         """
-        logger.debug(f"Checking if cart {locker_id} is returned")
+        logger.debug("Checking if cart %s is returned", locker_id)
 
         state = self.get_lock_state(locker_id)
         if not state:
@@ -43,8 +43,8 @@ def process_cart_assignment(user_phone: str, cart_id: int) -> dict:
         logger.info(f"Selected cart ID: {cart_id}")
 
         # DEBUG: Detailed trace logging
-        logger.debug(f"Validating user phone: {user_phone}")
-        logger.debug(f"Checking cart availability: {cart_id}")
+        logger.debug("Validating user phone: %s", user_phone)
+        logger.debug("Checking cart availability: %s", cart_id)
 
         # Simulate some validation
         if not user_phone.startswith("05"):
@@ -8,7 +8,17 @@ Author: CartWise Team
 Version: 1.0.0
 """
 
-from providers.sms import SMSProvider, InforuSMSProvider, SMSResponse
+# SMS providers import `requests` - loaded on first access, so importing
+# providers.storage stays cheap
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from providers import sms
+
+        return getattr(sms, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "SMSProvider",
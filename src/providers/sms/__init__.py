@@ -9,7 +9,16 @@ Version: 1.0.0
 """
 
 from providers.sms.base import SMSProvider, SMSResponse
-from .inforu import InforuSMSProvider
+
+
+def __getattr__(name: str):
+    # InforuSMSProvider imports `requests` - loaded on first access
+    if name == "InforuSMSProvider":
+        from .inforu import InforuSMSProvider
+
+        return InforuSMSProvider
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "SMSProvider",
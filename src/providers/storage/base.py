@@ -0,0 +1,120 @@
+"""
+Base Rental Store
+=================
+
+Abstract storage interface for rental records.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import ContextManager, Iterable, List, Optional
+
+from models.rental import Rental
+
+
+class RentalStore(ABC):
+    """
+    Abstract base class for rental storage backends.
+
+    All rental backends must implement these methods. The API talks to a
+    backend through AsyncRentalDatabase, the monitor calls it directly.
+    """
+
+    # Branch the rentals belong to (used by the analytics rollups)
+    branch_id: str
+
+    # Human-readable location of the data (file path or URL without credentials)
+    db_path: str
+
+    # Exception raised by the backend's driver
+    DatabaseError: type = Exception
+
+    @abstractmethod
+    def transaction(self) -> ContextManager["RentalStore"]:
+        """Unit of work: group several operations into a single commit."""
+        pass
+
+    @abstractmethod
+    def create_rental(self, rental: Rental) -> int:
+        """Create a new rental record and return its ID."""
+        pass
+
+    @abstractmethod
+    def get_rental(self, rental_id: int) -> Optional[Rental]:
+        """Get rental by ID."""
+        pass
+
+    @abstractmethod
+    def get_active_rental_by_phone(self, phone: str) -> Optional[Rental]:
+        """Get active rental for a user."""
+        pass
+
+    @abstractmethod
+    def get_open_rental_by_phone(self, phone: str) -> Optional[Rental]:
+        """Get a user's active or overdue rental."""
+        pass
+
+    @abstractmethod
+    def get_active_rental_by_cart(self, cart_id: int) -> Optional[Rental]:
+        """Get active rental for a cart."""
+        pass
+
+    @abstractmethod
+    def update_rental(self, rental: Rental) -> bool:
+        """Update existing rental."""
+        pass
+
+    @abstractmethod
+    def update_rentals_many(self, rentals: Iterable[Rental]) -> int:
+        """Update several rentals in a single transaction."""
+        pass
+
+    @abstractmethod
+    def mark_overdue_bulk(self, now: Optional[datetime] = None) -> List[Rental]:
+        """Flag every active rental past its expected return as overdue."""
+        pass
+
+    @abstractmethod
+    def get_rental_history(self, phone: Optional[str] = None, limit: int = 100) -> List[Rental]:
+        """Get rental history, newest first."""
+        pass
+
+    @abstractmethod
+    def get_open_rentals(self) -> List[Rental]:
+        """Get every active or overdue rental, newest first."""
+        pass
+
+    @abstractmethod
+    def get_overdue_rentals(self) -> List[Rental]:
+        """Get all active rentals past their expected return."""
+        pass
+
+    @abstractmethod
+    def get_statistics(self) -> dict:
+        """Get rental statistics (total/active/overdue/late)."""
+        pass
+
+    @abstractmethod
+    def reconcile_statistics(self) -> dict:
+        """Verify the statistics counters against the stored rentals."""
+        pass
+
+    @abstractmethod
+    def get_timeseries(
+        self,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        cart_id: Optional[int] = None,
+        branch_id: Optional[str] = None,
+        capacity: int = 1,
+    ) -> List[dict]:
+        """Get rental analytics time series from the rollups."""
+        pass
+
+    def close(self):
+        """Release backend resources."""
+        pass
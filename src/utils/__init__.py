@@ -10,13 +10,32 @@ Version: 1.0.0
 
 from .validation import validate_phone, validate_otp_code
 from .otp import OTPManager
+from .otp_store import OTPStore, MemoryOTPStore, SQLiteOTPStore, create_otp_store
+from .token_store import TokenStore, MemoryTokenStore, SQLiteTokenStore, create_token_store
+from .events import EventBus
+from .state_backend import StateBackend, MemoryStateBackend, SQLiteStateBackend, create_state_backend
 from .messaging import MessageFormatter
 from .database import RentalDatabase
+from .async_database import AsyncRentalDatabase
 
 __all__ = [
     "validate_phone",
     "validate_otp_code",
     "OTPManager",
+    "OTPStore",
+    "MemoryOTPStore",
+    "SQLiteOTPStore",
+    "create_otp_store",
+    "TokenStore",
+    "MemoryTokenStore",
+    "SQLiteTokenStore",
+    "create_token_store",
+    "EventBus",
+    "StateBackend",
+    "MemoryStateBackend",
+    "SQLiteStateBackend",
+    "create_state_backend",
     "MessageFormatter",
     "RentalDatabase",
+    "AsyncRentalDatabase",
 ]
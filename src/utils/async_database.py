@@ -0,0 +1,155 @@
+"""
+Async Database Access
+=====================
+
+Awaitable facade over a RentalStore for FastAPI route handlers.
+
+SQLite calls are blocking disk I/O. Running them directly inside
+`async def` handlers stalls the event loop for every request, so this
+module moves them onto worker threads:
+- one writer thread (SQLite allows a single writer at a time anyway,
+  queuing writes here avoids busy-waiting on the file lock)
+- a pool of reader threads (WAL mode lets them read while the writer
+  commits)
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Iterable, List, Optional
+
+from core import get_logger
+from models.rental import Rental
+from providers.storage.base import RentalStore
+
+logger = get_logger(__name__)
+
+
+class AsyncRentalDatabase:
+    """
+    Async repository for rental records.
+
+    Exposes the RentalStore methods as coroutines with the same names
+    and arguments. Reads run on the reader pool, writes on the single
+    writer thread.
+    """
+
+    def __init__(self, rental_db: RentalStore, readers: int = 4):
+        """
+        Initialize async repository.
+
+        Args:
+            rental_db: Synchronous store doing the actual work
+            readers: Number of reader threads (default: 4)
+        """
+        self.sync = rental_db
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rental-db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="rental-db-reader")
+
+        logger.info(f"Async rental database initialized (1 writer, {readers} readers)")
+
+    @property
+    def db_path(self) -> str:
+        """Path of the underlying database."""
+        return self.sync.db_path
+
+    @property
+    def branch_id(self) -> str:
+        """Branch of the underlying database."""
+        return self.sync.branch_id
+
+    async def _read(self, func, *args, **kwargs):
+        """Run a read operation on the reader pool."""
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (correlation ID) into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._readers, partial(context.run, func, *args, **kwargs))
+
+    async def _write(self, func, *args, **kwargs):
+        """Run a write operation on the writer thread."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._writer, partial(context.run, func, *args, **kwargs))
+
+    # Reads
+
+    async def get_rental(self, rental_id: int) -> Optional[Rental]:
+        """Get rental by ID."""
+        return await self._read(self.sync.get_rental, rental_id)
+
+    async def get_active_rental_by_phone(self, phone: str) -> Optional[Rental]:
+        """Get active rental for a user."""
+        return await self._read(self.sync.get_active_rental_by_phone, phone)
+
+    async def get_open_rental_by_phone(self, phone: str) -> Optional[Rental]:
+        """Get a user's active or overdue rental."""
+        return await self._read(self.sync.get_open_rental_by_phone, phone)
+
+    async def get_active_rental_by_cart(self, cart_id: int) -> Optional[Rental]:
+        """Get active rental for a cart."""
+        return await self._read(self.sync.get_active_rental_by_cart, cart_id)
+
+    async def get_rental_history(self, phone: Optional[str] = None, limit: int = 100) -> List[Rental]:
+        """Get rental history."""
+        return await self._read(self.sync.get_rental_history, phone=phone, limit=limit)
+
+    async def get_open_rentals(self) -> List[Rental]:
+        """Get every active or overdue rental."""
+        return await self._read(self.sync.get_open_rentals)
+
+    async def get_overdue_rentals(self) -> List[Rental]:
+        """Get all overdue rentals."""
+        return await self._read(self.sync.get_overdue_rentals)
+
+    async def get_statistics(self) -> dict:
+        """Get rental statistics."""
+        return await self._read(self.sync.get_statistics)
+
+    async def get_timeseries(
+        self,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        cart_id: Optional[int] = None,
+        branch_id: Optional[str] = None,
+        capacity: int = 1,
+    ) -> List[dict]:
+        """Get rental analytics time series from the rollups."""
+        return await self._read(
+            self.sync.get_timeseries,
+            granularity, start, end,
+            cart_id=cart_id, branch_id=branch_id, capacity=capacity,
+        )
+
+    # Writes
+
+    async def create_rental(self, rental: Rental) -> int:
+        """Create a new rental record."""
+        return await self._write(self.sync.create_rental, rental)
+
+    async def update_rental(self, rental: Rental) -> bool:
+        """Update existing rental."""
+        return await self._write(self.sync.update_rental, rental)
+
+    async def update_rentals_many(self, rentals: Iterable[Rental]) -> int:
+        """Update several rentals in a single transaction."""
+        return await self._write(self.sync.update_rentals_many, list(rentals))
+
+    async def mark_overdue_bulk(self, now: Optional[datetime] = None) -> List[Rental]:
+        """Flag every active rental past its expected return as overdue."""
+        return await self._write(self.sync.mark_overdue_bulk, now)
+
+    async def reconcile_statistics(self) -> dict:
+        """Verify the statistics counters against the rentals table."""
+        return await self._write(self.sync.reconcile_statistics)
+
+    def close(self):
+        """Stop the worker threads after pending operations finish."""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        logger.info("Async rental database closed")
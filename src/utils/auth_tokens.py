@@ -10,10 +10,16 @@ Version: 1.0.0
 
 import secrets
 import time
-from typing import Optional, Dict
+from typing import Optional
 from datetime import datetime, timedelta
 
 from core import get_logger
+from utils.token_store import TokenRecord, TokenStore, MemoryTokenStore
+from utils.signed_tokens import SignedTokenCodec, RevocationList
+
+# Token modes
+MODE_STORE = "store"    # Random tokens kept in a TokenStore
+MODE_SIGNED = "signed"  # Stateless HMAC-signed tokens (utils.signed_tokens)
 
 logger = get_logger(__name__)
 
@@ -24,52 +30,73 @@ class AuthTokenManager:
 
     After a user verifies OTP once, they receive a token that's valid
     for a configurable period (default: 30 days).
+
+    Two modes:
+    - "store": tokens live in a TokenStore; with the SQLite store they
+      survive restarts and are valid on every worker
+    - "signed": tokens carry phone and expiry, signed with SECRET_KEY;
+      validation needs no storage. Revocations are held per process and
+      reach the other workers only through a shared state backend
+      (STATE_DB_PATH, see utils.state_sync.StateSync.share_revocations);
+      get_token_by_phone()/is_authenticated() are not available (a node
+      does not know which tokens were issued)
     """
 
-    def __init__(self, token_expiry_days: int = 30):
+    def __init__(
+        self,
+        token_expiry_days: int = 30,
+        store: Optional[TokenStore] = None,
+        mode: str = MODE_STORE,
+        secret_key: Optional[str] = None,
+    ):
         """
         Initialize token manager.
 
         Args:
             token_expiry_days: How long tokens remain valid (default: 30 days)
-        """
-        self.token_expiry_days = token_expiry_days
+            store: Token store for "store" mode (default: in-process MemoryTokenStore)
+            mode: "store" or "signed"
+            secret_key: HMAC key for "signed" mode
 
-        # Store tokens: {token: {phone: str, expires_at: datetime}}
-        self._tokens: Dict[str, dict] = {}
+        Raises:
+            ValueError: If the mode is unknown or "signed" mode has no key
+        """
+        if mode not in (MODE_STORE, MODE_SIGNED):
+            raise ValueError(f"Unknown auth token mode: {mode}")
 
-        # Store phone to token mapping for quick lookup
-        self._phone_to_token: Dict[str, str] = {}
+        self.token_expiry_days = token_expiry_days
+        self.mode = mode
+        self.store = store if store is not None else MemoryTokenStore()
+        self.codec = SignedTokenCodec(secret_key) if mode == MODE_SIGNED else None
+        self.revocations = RevocationList()
 
-        logger.info(f"Auth Token Manager initialized (expiry: {token_expiry_days} days)")
+        logger.info(f"Auth Token Manager initialized (mode: {mode}, expiry: {token_expiry_days} days)")
 
     def generate_token(self, phone: str) -> str:
         """
         Generate a new authentication token for a phone number.
 
+        Any existing token of the phone is replaced.
+
         Args:
             phone: User phone number
 
         Returns:
             Authentication token (32 character hex string)
         """
-        # Clean up any existing token for this phone
-        if phone in self._phone_to_token:
-            old_token = self._phone_to_token[phone]
-            del self._tokens[old_token]
+        now = datetime.now()
+        expires_at = now + timedelta(days=self.token_expiry_days)
+
+        if self.codec is not None:
+            # Earlier signed tokens of the phone stay valid until they expire
+            token = self.codec.encode(phone, int(expires_at.timestamp()))
+            logger.info(f"Generated signed auth token for {phone} (expires: {expires_at.strftime('%Y-%m-%d %H:%M')})")
+            return token
 
         # Generate secure random token
         token = secrets.token_hex(32)
 
-        expires_at = datetime.now() + timedelta(days=self.token_expiry_days)
-
-        self._tokens[token] = {
-            "phone": phone,
-            "expires_at": expires_at,
-            "created_at": datetime.now()
-        }
-
-        self._phone_to_token[phone] = token
+        self.store.put(TokenRecord(token=token, phone=phone, created_at=now, expires_at=expires_at))
 
         logger.info(f"Generated auth token for {phone} (expires: {expires_at.strftime('%Y-%m-%d %H:%M')})")
 
@@ -85,22 +112,40 @@ class AuthTokenManager:
         Returns:
             Phone number if valid, None if invalid/expired
         """
-        if token not in self._tokens:
-            logger.debug(f"Token not found: {token[:16]}...")
-            return None
+        if self.codec is not None:
+            return self._validate_signed(token)
 
-        token_data = self._tokens[token]
+        record = self.store.get(token)
+        if record is None:
+            logger.debug("Token not found: %.16s...", token)
+            return None
 
         # Check if expired
-        if datetime.now() > token_data["expires_at"]:
-            logger.info(f"Token expired for {token_data['phone']}")
-            self._remove_token(token)
+        if datetime.now() > record.expires_at:
+            logger.info(f"Token expired for {record.phone}")
+            self.store.delete(token)
             return None
 
-        phone = token_data["phone"]
-        logger.debug(f"Token validated for {phone}")
+        logger.debug("Token validated for %s", record.phone)
 
-        return phone
+        return record.phone
+
+    def _validate_signed(self, token: str) -> Optional[str]:
+        """Validate a signed token (no storage access)."""
+        claims = self.codec.decode(token)
+        if claims is None:
+            logger.debug("Invalid token signature: %.16s...", token)
+            return None
+
+        if time.time() > claims.expires_at:
+            logger.info(f"Token expired for {claims.phone}")
+            return None
+
+        if self.revocations.is_revoked(claims):
+            logger.debug("Revoked token for %s", claims.phone)
+            return None
+
+        return claims.phone
 
     def get_token_by_phone(self, phone: str) -> Optional[str]:
         """
@@ -111,17 +156,20 @@ class AuthTokenManager:
 
         Returns:
             Token if exists and valid, None otherwise
+            (always None in "signed" mode)
         """
-        if phone not in self._phone_to_token:
+        if self.codec is not None:
             return None
 
-        token = self._phone_to_token[phone]
+        record = self.store.get_by_phone(phone)
+        if record is None:
+            return None
 
         # Validate token is still valid
-        validated_phone = self.validate_token(token)
+        validated_phone = self.validate_token(record.token)
 
         if validated_phone:
-            return token
+            return record.token
         else:
             return None
 
@@ -147,13 +195,19 @@ class AuthTokenManager:
         Returns:
             True if revoked, False if token not found
         """
-        if token not in self._tokens:
+        if self.codec is not None:
+            claims = self.codec.decode(token)
+            if claims is None or self.revocations.is_revoked(claims):
+                return False
+            self.revocations.revoke_token(claims)
+            logger.info(f"Token revoked for {claims.phone}")
+            return True
+
+        record = self.store.get(token)
+        if record is None or not self.store.delete(token):
             return False
 
-        phone = self._tokens[token]["phone"]
-        self._remove_token(token)
-
-        logger.info(f"Token revoked for {phone}")
+        logger.info(f"Token revoked for {record.phone}")
 
         return True
 
@@ -166,44 +220,37 @@ class AuthTokenManager:
 
         Returns:
             True if revoked, False if no tokens found
+            (always True in "signed" mode)
         """
-        if phone not in self._phone_to_token:
-            return False
+        if self.codec is not None:
+            self.revocations.revoke_phone(phone)
+            logger.info(f"All tokens revoked for {phone}")
+            return True
 
-        token = self._phone_to_token[phone]
-        self._remove_token(token)
+        record = self.store.get_by_phone(phone)
+        if record is None or not self.store.delete(record.token):
+            return False
 
         logger.info(f"All tokens revoked for {phone}")
 
         return True
 
-    def _remove_token(self, token: str):
-        """Remove a token and its phone mapping."""
-        if token in self._tokens:
-            phone = self._tokens[token]["phone"]
-            del self._tokens[token]
-
-            if phone in self._phone_to_token:
-                del self._phone_to_token[phone]
-
     def cleanup_expired(self):
         """
         Clean up expired tokens.
 
-        Should be called periodically to free memory.
+        Only expired tokens are touched (the stores index expiry).
         """
-        now = datetime.now()
-        expired_tokens = []
-
-        for token, data in self._tokens.items():
-            if now > data["expires_at"]:
-                expired_tokens.append(token)
+        if self.codec is not None:
+            removed = self.revocations.purge_expired(self.token_expiry_days * 86400)
+            if removed:
+                logger.info(f"Cleaned up {removed} expired revocations")
+            return
 
-        for token in expired_tokens:
-            self._remove_token(token)
+        removed = self.store.purge_expired()
 
-        if expired_tokens:
-            logger.info(f"Cleaned up {len(expired_tokens)} expired tokens")
+        if removed:
+            logger.info(f"Cleaned up {removed} expired tokens")
 
     def get_stats(self) -> dict:
         """
@@ -214,7 +261,19 @@ class AuthTokenManager:
         """
         self.cleanup_expired()
 
+        if self.codec is not None:
+            # Issued tokens are not tracked
+            return {
+                "mode": self.mode,
+                "active_tokens": None,
+                "authenticated_users": None,
+                "revocations": len(self.revocations),
+            }
+
+        # One token per phone number
+        active = self.store.count()
         return {
-            "active_tokens": len(self._tokens),
-            "authenticated_users": len(self._phone_to_token)
+            "mode": self.mode,
+            "active_tokens": active,
+            "authenticated_users": active
         }
@@ -9,17 +9,151 @@ Version: 1.0.0
 """
 
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from pathlib import Path
 
 from core import get_logger
+from core.metrics import registry
+from core.tracing import tracer
 from models.rental import Rental, RentalStatus
+from providers.storage.base import RentalStore
+from utils.rollups import RentalRollups, GRANULARITIES
+from utils.migrations import RENTALS_TABLE_SQL, needs_epoch_migration, migrate_rentals_to_epoch
 
 logger = get_logger(__name__)
 
+DB_QUERY_SECONDS = registry.histogram(
+    "cartwise_db_query_seconds",
+    "Time spent in rental database operations",
+    ("operation",),
+)
 
-class RentalDatabase:
+# Column order used by every SELECT that hydrates a Rental
+RENTAL_COLUMNS = (
+    "rental_id, cart_id, user_phone, locker_id, "
+    "start_time, expected_return, actual_return, status, notes"
+)
+
+
+class RentalQueries:
+    """
+    SQL statements of the rental store in one driver's parameter style.
+
+    Built once per store class ("?" for sqlite3, "%s" for psycopg), so
+    statements are never rewritten at query time.
+    """
+
+    def __init__(self, param: str = "?", returning: bool = False):
+        """
+        Build the statements.
+
+        Args:
+            param: The driver's parameter placeholder
+            returning: The database supports INSERT/UPDATE ... RETURNING
+                       (PostgreSQL, SQLite 3.35+)
+        """
+        p = self.param = param
+        self.returning = returning
+
+        self.insert_rental = f"""
+            INSERT INTO rentals (
+                cart_id, user_phone, locker_id,
+                start_time, expected_return, actual_return,
+                status, notes
+            ) VALUES ({p}, {p}, {p}, {p}, {p}, {p}, {p}, {p})
+        """ + ("RETURNING rental_id" if returning else "")
+
+        self.get_rental = f"SELECT {RENTAL_COLUMNS} FROM rentals WHERE rental_id = {p}"
+
+        self.get_rental_by_phone = f"""
+            SELECT {RENTAL_COLUMNS} FROM rentals
+            WHERE user_phone = {p} AND status = {p}
+            ORDER BY start_time DESC, rental_id DESC
+            LIMIT 1
+        """
+
+        self.get_open_rental_by_phone = f"""
+            SELECT {RENTAL_COLUMNS} FROM rentals
+            WHERE user_phone = {p} AND status IN ({p}, {p})
+            ORDER BY start_time DESC, rental_id DESC
+            LIMIT 1
+        """
+
+        self.get_rental_by_cart = f"""
+            SELECT {RENTAL_COLUMNS} FROM rentals
+            WHERE cart_id = {p} AND status = {p}
+            ORDER BY start_time DESC, rental_id DESC
+            LIMIT 1
+        """
+
+        self.get_rental_status = f"SELECT status FROM rentals WHERE rental_id = {p}"
+
+        self.update_rental = f"""
+            UPDATE rentals SET
+                cart_id = {p},
+                user_phone = {p},
+                locker_id = {p},
+                start_time = {p},
+                expected_return = {p},
+                actual_return = {p},
+                status = {p},
+                notes = {p}
+            WHERE rental_id = {p}
+        """
+
+        self.get_history_by_phone = f"""
+            SELECT {RENTAL_COLUMNS} FROM rentals
+            WHERE user_phone = {p}
+            ORDER BY start_time DESC, rental_id DESC
+            LIMIT {p}
+        """
+
+        self.get_history = f"""
+            SELECT {RENTAL_COLUMNS} FROM rentals
+            ORDER BY start_time DESC, rental_id DESC
+            LIMIT {p}
+        """
+
+        self.get_rentals_by_statuses = f"""
+            SELECT {RENTAL_COLUMNS} FROM rentals
+            WHERE status IN ({p}, {p})
+            ORDER BY start_time DESC, rental_id DESC
+        """
+
+        self.get_past_due = f"""
+            SELECT {RENTAL_COLUMNS} FROM rentals
+            WHERE status = {p} AND expected_return < {p}
+            ORDER BY expected_return ASC
+        """
+
+        self.flag_past_due = f"""
+            UPDATE rentals SET status = {p}
+            WHERE status = {p} AND expected_return < {p}
+        """ + (f"RETURNING {RENTAL_COLUMNS}" if returning else "")
+
+        self.count_past_due = f"""
+            SELECT COUNT(*) FROM rentals
+            WHERE status = {p} AND expected_return < {p}
+        """
+
+        self.insert_status_count = f"INSERT INTO rental_status_counts (status, count) VALUES ({p}, {p})"
+
+
+def to_epoch(moment: Optional[datetime]) -> Optional[int]:
+    """Convert a datetime to the epoch seconds stored in the database."""
+    return int(moment.timestamp()) if moment else None
+
+
+def from_epoch(value: Optional[int]) -> Optional[datetime]:
+    """Convert stored epoch seconds back to a (naive, local) datetime."""
+    return datetime.fromtimestamp(value) if value is not None else None
+
+
+class RentalDatabase(RentalStore):
     """
     SQLite database manager for rental records.
 
@@ -28,16 +162,34 @@ class RentalDatabase:
     - Querying rental history
     - Updating rental status
     - Finding late/overdue rentals
+    - Rolling closed rentals up into hourly/daily analytics buckets
+    - Batched writes and a unit-of-work transaction()
     """
 
-    def __init__(self, db_path: str = "data/rentals.db"):
+    # Statuses of rentals whose cart has not come back yet
+    OPEN_STATUSES = (RentalStatus.ACTIVE.value, RentalStatus.OVERDUE.value)
+
+    # Statuses of rentals whose cart was returned
+    CLOSED_STATUSES = (RentalStatus.RETURNED.value, RentalStatus.RETURNED_LATE.value)
+
+    # Exception raised by the database driver
+    DatabaseError = sqlite3.Error
+
+    # Statements in the driver's parameter style
+    SQL = RentalQueries("?", returning=sqlite3.sqlite_version_info >= (3, 35, 0))
+
+    def __init__(self, db_path: str = "data/rentals.db", branch_id: str = "default"):
         """
         Initialize database connection.
 
         Args:
             db_path: Path to SQLite database file
+            branch_id: Branch the rentals belong to (used by the analytics rollups)
         """
         self.db_path = db_path
+        self.branch_id = branch_id
+        self.rollups = RentalRollups(self.SQL.param)
+        self._local = threading.local()  # Per-thread unit-of-work connection
         self._ensure_data_directory()
         self._init_database()
 
@@ -45,27 +197,112 @@ class RentalDatabase:
         """Ensure data directory exists."""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
 
+    def _open_connection(self):
+        """Open a new database connection."""
+        return sqlite3.connect(self.db_path)
+
+    def _close_connection(self, conn):
+        """Release a connection returned by _open_connection()."""
+        conn.close()
+
+    def _last_insert_id(self, cursor) -> int:
+        """Get the rental_id generated by the SQL.insert_rental just executed."""
+        if self.SQL.returning:
+            return cursor.fetchone()[0]
+        return cursor.lastrowid
+
+    def _in_transaction(self) -> bool:
+        """True inside this thread's transaction() block."""
+        return getattr(self._local, "conn", None) is not None
+
+    @contextmanager
+    def _connect(self, operation: str = "query"):
+        """
+        Get a connection for one database operation.
+
+        Inside transaction() the thread's unit-of-work connection is reused
+        and committed when the unit of work ends. Otherwise a short-lived
+        connection is opened, committed and closed.
+
+        Args:
+            operation: Operation name for the query time metric
+
+        Yields:
+            sqlite3.Connection
+        """
+        started = time.perf_counter()
+
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            try:
+                with tracer.span(f"db.{operation}"):
+                    yield conn
+            finally:
+                DB_QUERY_SECONDS.observe(time.perf_counter() - started, operation)
+            return
+
+        with tracer.span(f"db.{operation}"):
+            conn = self._open_connection()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._close_connection(conn)
+                DB_QUERY_SECONDS.observe(time.perf_counter() - started, operation)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work: group several operations into a single commit.
+
+        Every RentalDatabase call made by this thread inside the block shares
+        one connection and is committed once at the end (or rolled back if
+        the block raises). Nested transaction() blocks join the outer one.
+
+        Example:
+            >>> with rental_db.transaction():
+            ...     rental_db.update_rental(first)
+            ...     rental_db.update_rental(second)
+
+        Yields:
+            This RentalDatabase
+        """
+        if getattr(self._local, "conn", None) is not None:
+            yield self
+            return
+
+        conn = self._open_connection()
+        self._local.conn = conn
+        try:
+            yield self
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._close_connection(conn)
+
     def _init_database(self):
         """Initialize database schema."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect("init_schema") as conn:
                 cursor = conn.cursor()
 
+                # WAL lets readers proceed while a writer commits (persistent setting);
+                # read the result row so no statement stays open during a migration
+                cursor.execute("PRAGMA journal_mode=WAL").fetchone()
+
+                # Upgrade databases still using ISO TEXT timestamps
+                if needs_epoch_migration(conn):
+                    logger.warning(f"Migrating {self.db_path} to epoch timestamp schema...")
+                    migrate_rentals_to_epoch(conn)
+
                 # Create rentals table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS rentals (
-                        rental_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        cart_id INTEGER NOT NULL,
-                        user_phone TEXT NOT NULL,
-                        locker_id INTEGER NOT NULL,
-                        start_time TEXT NOT NULL,
-                        expected_return TEXT NOT NULL,
-                        actual_return TEXT,
-                        status TEXT NOT NULL,
-                        notes TEXT,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
+                cursor.execute(RENTALS_TABLE_SQL)
 
                 # Create indexes for faster queries
                 cursor.execute("""
@@ -83,13 +320,75 @@ class RentalDatabase:
                     ON rentals(cart_id)
                 """)
 
-                conn.commit()
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_status_expected_return
+                    ON rentals(status, expected_return)
+                """)
+
+                self._init_statistics(cursor)
+                self.rollups.init_schema(cursor)
+
                 logger.info(f"Database initialized at {self.db_path}")
 
-        except sqlite3.Error as e:
+        except self.DatabaseError as e:
             logger.error(f"Database initialization error: {e}")
             raise
 
+    def _init_statistics(self, cursor: sqlite3.Cursor):
+        """
+        Create the per-status counters table and the triggers maintaining it.
+
+        The triggers run inside the same transaction as the INSERT/UPDATE/DELETE
+        that fires them, so the counters can never drift from a committed write.
+
+        Args:
+            cursor: Cursor of the schema initialization transaction
+        """
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'rental_status_counts'
+        """)
+        counters_existed = cursor.fetchone() is not None
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rental_status_counts (
+                status TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_rental_counts_insert
+            AFTER INSERT ON rentals
+            BEGIN
+                INSERT INTO rental_status_counts (status, count) VALUES (NEW.status, 1)
+                ON CONFLICT(status) DO UPDATE SET count = count + 1;
+            END
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_rental_counts_update
+            AFTER UPDATE OF status ON rentals
+            WHEN OLD.status != NEW.status
+            BEGIN
+                UPDATE rental_status_counts SET count = count - 1 WHERE status = OLD.status;
+                INSERT INTO rental_status_counts (status, count) VALUES (NEW.status, 1)
+                ON CONFLICT(status) DO UPDATE SET count = count + 1;
+            END
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_rental_counts_delete
+            AFTER DELETE ON rentals
+            BEGIN
+                UPDATE rental_status_counts SET count = count - 1 WHERE status = OLD.status;
+            END
+        """)
+
+        if not counters_existed:
+            # Existing database from before the counters - seed them once
+            self._write_status_counts(cursor, self._count_by_status(cursor))
+
     def create_rental(self, rental: Rental) -> int:
         """
         Create a new rental record.
@@ -101,36 +400,29 @@ class RentalDatabase:
             rental_id: ID of created rental
 
         Raises:
-            sqlite3.Error: If database operation fails
+            DatabaseError: If database operation fails
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect("create_rental") as conn:
                 cursor = conn.cursor()
 
-                cursor.execute("""
-                    INSERT INTO rentals (
-                        cart_id, user_phone, locker_id,
-                        start_time, expected_return, actual_return,
-                        status, notes
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+                cursor.execute(self.SQL.insert_rental, (
                     rental.cart_id,
                     rental.user_phone,
                     rental.locker_id,
-                    rental.start_time.isoformat(),
-                    rental.expected_return.isoformat(),
-                    rental.actual_return.isoformat() if rental.actual_return else None,
+                    to_epoch(rental.start_time),
+                    to_epoch(rental.expected_return),
+                    to_epoch(rental.actual_return),
                     rental.status.value,
                     rental.notes
                 ))
 
-                rental_id = cursor.lastrowid
-                conn.commit()
+                rental_id = self._last_insert_id(cursor)
 
                 logger.info(f"Created rental {rental_id} for cart {rental.cart_id} by {rental.user_phone}")
                 return rental_id
 
-        except sqlite3.Error as e:
+        except self.DatabaseError as e:
             logger.error(f"Error creating rental: {e}")
             raise
 
@@ -145,18 +437,17 @@ class RentalDatabase:
             Rental object or None if not found
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect("get_rental") as conn:
                 cursor = conn.cursor()
 
-                cursor.execute("SELECT * FROM rentals WHERE rental_id = ?", (rental_id,))
+                cursor.execute(self.SQL.get_rental, (rental_id,))
                 row = cursor.fetchone()
 
                 if row:
                     return self._row_to_rental(row)
                 return None
 
-        except sqlite3.Error as e:
+        except self.DatabaseError as e:
             logger.error(f"Error getting rental {rental_id}: {e}")
             return None
 
@@ -171,16 +462,10 @@ class RentalDatabase:
             Active rental or None if not found
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect("get_active_rental_by_phone") as conn:
                 cursor = conn.cursor()
 
-                cursor.execute("""
-                    SELECT * FROM rentals
-                    WHERE user_phone = ? AND status = ?
-                    ORDER BY start_time DESC
-                    LIMIT 1
-                """, (phone, RentalStatus.ACTIVE.value))
+                cursor.execute(self.SQL.get_rental_by_phone, (phone, RentalStatus.ACTIVE.value))
 
                 row = cursor.fetchone()
 
@@ -188,10 +473,36 @@ class RentalDatabase:
                     return self._row_to_rental(row)
                 return None
 
-        except sqlite3.Error as e:
+        except self.DatabaseError as e:
             logger.error(f"Error getting active rental for {phone}: {e}")
             return None
 
+    def get_open_rental_by_phone(self, phone: str) -> Optional[Rental]:
+        """
+        Get a user's rental whose cart has not come back yet (active or overdue).
+
+        Args:
+            phone: User phone number
+
+        Returns:
+            Open rental or None if not found
+        """
+        try:
+            with self._connect("get_open_rental_by_phone") as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(self.SQL.get_open_rental_by_phone, (phone, *self.OPEN_STATUSES))
+
+                row = cursor.fetchone()
+
+                if row:
+                    return self._row_to_rental(row)
+                return None
+
+        except self.DatabaseError as e:
+            logger.error(f"Error getting open rental for {phone}: {e}")
+            return None
+
     def get_active_rental_by_cart(self, cart_id: int) -> Optional[Rental]:
         """
         Get active rental for a cart.
@@ -203,16 +514,10 @@ class RentalDatabase:
             Active rental or None if not found
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect("get_active_rental_by_cart") as conn:
                 cursor = conn.cursor()
 
-                cursor.execute("""
-                    SELECT * FROM rentals
-                    WHERE cart_id = ? AND status = ?
-                    ORDER BY start_time DESC
-                    LIMIT 1
-                """, (cart_id, RentalStatus.ACTIVE.value))
+                cursor.execute(self.SQL.get_rental_by_cart, (cart_id, RentalStatus.ACTIVE.value))
 
                 row = cursor.fetchone()
 
@@ -220,7 +525,7 @@ class RentalDatabase:
                     return self._row_to_rental(row)
                 return None
 
-        except sqlite3.Error as e:
+        except self.DatabaseError as e:
             logger.error(f"Error getting active rental for cart {cart_id}: {e}")
             return None
 
@@ -233,42 +538,85 @@ class RentalDatabase:
 
         Returns:
             True if successful, False otherwise
+
+        Raises:
+            DatabaseError: If the update fails inside transaction() (so the
+                           whole unit of work rolls back)
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-
-                cursor.execute("""
-                    UPDATE rentals SET
-                        cart_id = ?,
-                        user_phone = ?,
-                        locker_id = ?,
-                        start_time = ?,
-                        expected_return = ?,
-                        actual_return = ?,
-                        status = ?,
-                        notes = ?
-                    WHERE rental_id = ?
-                """, (
-                    rental.cart_id,
-                    rental.user_phone,
-                    rental.locker_id,
-                    rental.start_time.isoformat(),
-                    rental.expected_return.isoformat(),
-                    rental.actual_return.isoformat() if rental.actual_return else None,
-                    rental.status.value,
-                    rental.notes,
-                    rental.rental_id
-                ))
-
-                conn.commit()
-                logger.debug(f"Updated rental {rental.rental_id}")
+            with self._connect("update_rental") as conn:
+                self._write_rental_update(conn.cursor(), rental)
+                logger.debug("Updated rental %s", rental.rental_id)
                 return True
 
-        except sqlite3.Error as e:
+        except self.DatabaseError as e:
             logger.error(f"Error updating rental {rental.rental_id}: {e}")
+            if self._in_transaction():
+                raise
             return False
 
+    def update_rentals_many(self, rentals: Iterable[Rental]) -> int:
+        """
+        Update several rentals in a single transaction.
+
+        Args:
+            rentals: Rental objects with updated data
+
+        Returns:
+            Number of updated rentals (0 if the batch was rolled back)
+
+        Raises:
+            DatabaseError: If the batch fails inside transaction()
+        """
+        rentals = list(rentals)
+        if not rentals:
+            return 0
+
+        try:
+            with self._connect("update_rentals_many") as conn:
+                cursor = conn.cursor()
+                for rental in rentals:
+                    self._write_rental_update(cursor, rental)
+
+                logger.debug("Updated %d rentals in one batch", len(rentals))
+                return len(rentals)
+
+        except self.DatabaseError as e:
+            logger.error(f"Error updating {len(rentals)} rentals: {e}")
+            if self._in_transaction():
+                raise
+            return 0
+
+    def _write_rental_update(self, cursor: sqlite3.Cursor, rental: Rental):
+        """
+        Write one rental update (and its rollups) inside the caller's transaction.
+
+        Args:
+            cursor: Cursor of the open transaction
+            rental: Rental object with updated data
+        """
+        cursor.execute(self.SQL.get_rental_status, (rental.rental_id,))
+        row = cursor.fetchone()
+        previous_status = row[0] if row else None
+
+        cursor.execute(self.SQL.update_rental, (
+            rental.cart_id,
+            rental.user_phone,
+            rental.locker_id,
+            to_epoch(rental.start_time),
+            to_epoch(rental.expected_return),
+            to_epoch(rental.actual_return),
+            rental.status.value,
+            rental.notes,
+            rental.rental_id
+        ))
+
+        # Rental just closed - fold it into the analytics rollups
+        if (previous_status in self.OPEN_STATUSES
+                and rental.status.value in self.CLOSED_STATUSES
+                and rental.actual_return):
+            self.rollups.apply_closed_rental(cursor, rental, self.branch_id)
+
     def get_rental_history(self, phone: Optional[str] = None, limit: int = 100) -> List[Rental]:
         """
         Get rental history.
@@ -281,31 +629,43 @@ class RentalDatabase:
             List of rentals
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect("get_rental_history") as conn:
                 cursor = conn.cursor()
 
                 if phone:
-                    cursor.execute("""
-                        SELECT * FROM rentals
-                        WHERE user_phone = ?
-                        ORDER BY start_time DESC
-                        LIMIT ?
-                    """, (phone, limit))
+                    cursor.execute(self.SQL.get_history_by_phone, (phone, limit))
                 else:
-                    cursor.execute("""
-                        SELECT * FROM rentals
-                        ORDER BY start_time DESC
-                        LIMIT ?
-                    """, (limit,))
+                    cursor.execute(self.SQL.get_history, (limit,))
 
                 rows = cursor.fetchall()
                 return [self._row_to_rental(row) for row in rows]
 
-        except sqlite3.Error as e:
+        except self.DatabaseError as e:
             logger.error(f"Error getting rental history: {e}")
             return []
 
+    def get_open_rentals(self) -> List[Rental]:
+        """
+        Get every rental whose cart has not come back yet (active or overdue).
+
+        Reads the status index only, however long the history is.
+
+        Returns:
+            Open rentals, newest first
+        """
+        try:
+            with self._connect("get_open_rentals") as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(self.SQL.get_rentals_by_statuses, self.OPEN_STATUSES)
+
+                rows = cursor.fetchall()
+                return [self._row_to_rental(row) for row in rows]
+
+        except self.DatabaseError as e:
+            logger.error(f"Error getting open rentals: {e}")
+            return []
+
     def get_overdue_rentals(self) -> List[Rental]:
         """
         Get all overdue rentals (active but past expected return).
@@ -314,88 +674,226 @@ class RentalDatabase:
             List of overdue rentals
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect("get_overdue_rentals") as conn:
                 cursor = conn.cursor()
 
-                now = datetime.now().isoformat()
-                cursor.execute("""
-                    SELECT * FROM rentals
-                    WHERE status = ? AND expected_return < ?
-                    ORDER BY expected_return ASC
-                """, (RentalStatus.ACTIVE.value, now))
+                now = to_epoch(datetime.now())
+                cursor.execute(self.SQL.get_past_due, (RentalStatus.ACTIVE.value, now))
 
                 rows = cursor.fetchall()
                 return [self._row_to_rental(row) for row in rows]
 
-        except sqlite3.Error as e:
+        except self.DatabaseError as e:
             logger.error(f"Error getting overdue rentals: {e}")
             return []
 
+    def mark_overdue_bulk(self, now: Optional[datetime] = None) -> List[Rental]:
+        """
+        Flag every active rental past its expected return as overdue.
+
+        The flagging itself is a single UPDATE ... WHERE over the
+        (status, expected_return) index, however many rentals it touches.
+        With RETURNING the same statement reports the flagged rows, so a
+        rental returned (or flagged by another worker) meanwhile is never
+        reported; older SQLite takes the write lock before reading instead.
+
+        Args:
+            now: Reference time (default: current time)
+
+        Returns:
+            The rentals that were flagged, with their status set to overdue
+
+        Raises:
+            DatabaseError: If flagging fails inside transaction()
+        """
+        cutoff = to_epoch(now or datetime.now())
+        params = (RentalStatus.OVERDUE.value, RentalStatus.ACTIVE.value, cutoff)
+
+        try:
+            with self._connect("mark_overdue_bulk") as conn:
+                cursor = conn.cursor()
+
+                if self.SQL.returning:
+                    cursor.execute(self.SQL.flag_past_due, params)
+                    rentals = [self._row_to_rental(row) for row in cursor.fetchall()]
+                    rentals.sort(key=lambda rental: rental.expected_return)
+                    return rentals
+
+                if not conn.in_transaction:
+                    # No other writer may change the rows between SELECT and UPDATE
+                    cursor.execute("BEGIN IMMEDIATE")
+
+                cursor.execute(self.SQL.get_past_due, (RentalStatus.ACTIVE.value, cutoff))
+                rentals = [self._row_to_rental(row) for row in cursor.fetchall()]
+
+                if rentals:
+                    cursor.execute(self.SQL.flag_past_due, params)
+
+                for rental in rentals:
+                    rental.mark_overdue()
+
+                return rentals
+
+        except self.DatabaseError as e:
+            logger.error(f"Error marking overdue rentals: {e}")
+            if self._in_transaction():
+                raise
+            return []
+
     def get_statistics(self) -> dict:
         """
         Get rental statistics.
 
+        Total, active and late-return counts come from the trigger-maintained
+        counters table. Overdue is not purely a counter read: the flagged
+        (OVERDUE) counter plus a COUNT over the idx_status_expected_return
+        range of active rentals past due that the monitor has not flagged
+        yet. That range only holds rentals that went past due since the last
+        mark_overdue_bulk(), but it is counted on every call - and grows if
+        no monitor is flagging (e.g. without a lock controller).
+
         Returns:
             Dictionary with statistics
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect("get_statistics") as conn:
                 cursor = conn.cursor()
 
-                # Total rentals
-                cursor.execute("SELECT COUNT(*) FROM rentals")
-                total = cursor.fetchone()[0]
+                cursor.execute("SELECT status, count FROM rental_status_counts")
+                counts = dict(cursor.fetchall())
 
-                # Active rentals
-                cursor.execute("SELECT COUNT(*) FROM rentals WHERE status = ?",
-                             (RentalStatus.ACTIVE.value,))
-                active = cursor.fetchone()[0]
-
-                # Overdue rentals
-                now = datetime.now().isoformat()
-                cursor.execute("""
-                    SELECT COUNT(*) FROM rentals
-                    WHERE status = ? AND expected_return < ?
-                """, (RentalStatus.ACTIVE.value, now))
-                overdue = cursor.fetchone()[0]
-
-                # Late returns
-                cursor.execute("SELECT COUNT(*) FROM rentals WHERE status = ?",
-                             (RentalStatus.RETURNED_LATE.value,))
-                late_returns = cursor.fetchone()[0]
+                # Active rentals past due that the monitor has not flagged yet
+                now = to_epoch(datetime.now())
+                cursor.execute(self.SQL.count_past_due, (RentalStatus.ACTIVE.value, now))
+                unflagged_overdue = cursor.fetchone()[0]
 
                 return {
-                    "total_rentals": total,
-                    "active_rentals": active,
-                    "overdue_rentals": overdue,
-                    "late_returns": late_returns
+                    "total_rentals": sum(counts.values()),
+                    "active_rentals": counts.get(RentalStatus.ACTIVE.value, 0),
+                    "overdue_rentals": counts.get(RentalStatus.OVERDUE.value, 0) + unflagged_overdue,
+                    "late_returns": counts.get(RentalStatus.RETURNED_LATE.value, 0)
                 }
 
-        except sqlite3.Error as e:
+        except self.DatabaseError as e:
             logger.error(f"Error getting statistics: {e}")
             return {}
 
-    def _row_to_rental(self, row: sqlite3.Row) -> Rental:
+    def reconcile_statistics(self) -> dict:
+        """
+        Verify the statistics counters against the rentals table.
+
+        Recounts rentals per status and, if any counter disagrees, rewrites the
+        counters table from the recount in the same transaction.
+
+        Returns:
+            Dictionary with "consistent" flag and per-status discrepancies
+        """
+        try:
+            with self._connect("reconcile_statistics") as conn:
+                cursor = conn.cursor()
+
+                actual = self._count_by_status(cursor)
+                cursor.execute("SELECT status, count FROM rental_status_counts")
+                counters = dict(cursor.fetchall())
+
+                discrepancies = {
+                    status: {"counter": counters.get(status, 0), "actual": actual.get(status, 0)}
+                    for status in set(actual) | set(counters)
+                    if counters.get(status, 0) != actual.get(status, 0)
+                }
+
+                if discrepancies:
+                    logger.warning(f"Rental statistics counters out of sync, repairing: {discrepancies}")
+                    self._write_status_counts(cursor, actual)
+                else:
+                    logger.debug("Rental statistics counters verified")
+
+                return {"consistent": not discrepancies, "discrepancies": discrepancies}
+
+        except self.DatabaseError as e:
+            logger.error(f"Error reconciling statistics: {e}")
+            return {"consistent": False, "error": str(e)}
+
+    def get_timeseries(
+        self,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        cart_id: Optional[int] = None,
+        branch_id: Optional[str] = None,
+        capacity: int = 1,
+    ) -> List[dict]:
+        """
+        Get rental analytics time series from the rollups.
+
+        Args:
+            granularity: Bucket size ("hour" or "day")
+            start: Start of the time range
+            end: End of the time range
+            cart_id: Optional cart to filter by
+            branch_id: Branch to read (defaults to this database's branch)
+            capacity: Number of carts utilization is relative to
+
+        Returns:
+            List of buckets with closed rentals, late rate, average duration
+            and utilization
+
+        Raises:
+            ValueError: If granularity is not supported
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+
+        try:
+            with self._connect("get_timeseries") as conn:
+                return self.rollups.query(
+                    conn.cursor(),
+                    granularity,
+                    start,
+                    end,
+                    branch_id=branch_id or self.branch_id,
+                    cart_id=cart_id,
+                    capacity=capacity,
+                )
+
+        except self.DatabaseError as e:
+            logger.error(f"Error getting rental timeseries: {e}")
+            return []
+
+    def _count_by_status(self, cursor: sqlite3.Cursor) -> dict:
+        """Count rentals per status with a full table scan."""
+        cursor.execute("SELECT status, COUNT(*) FROM rentals GROUP BY status")
+        return dict(cursor.fetchall())
+
+    def _write_status_counts(self, cursor: sqlite3.Cursor, counts: dict):
+        """Replace the statistics counters with the given per-status counts."""
+        cursor.execute("DELETE FROM rental_status_counts")
+        cursor.executemany(self.SQL.insert_status_count, list(counts.items()))
+
+    def _row_to_rental(self, row: tuple) -> Rental:
         """
         Convert database row to Rental object.
 
+        Rows come from SELECT {RENTAL_COLUMNS}: plain tuples with epoch
+        timestamps, unpacked positionally instead of by column name.
+
         Args:
             row: SQLite row
 
         Returns:
             Rental object
         """
+        rental_id, cart_id, user_phone, locker_id, start, expected, actual, status, notes = row
         return Rental(
-            rental_id=row["rental_id"],
-            cart_id=row["cart_id"],
-            user_phone=row["user_phone"],
-            locker_id=row["locker_id"],
-            start_time=datetime.fromisoformat(row["start_time"]),
-            expected_return=datetime.fromisoformat(row["expected_return"]),
-            actual_return=datetime.fromisoformat(row["actual_return"]) if row["actual_return"] else None,
-            status=RentalStatus(row["status"]),
-            notes=row["notes"]
+            rental_id=rental_id,
+            cart_id=cart_id,
+            user_phone=user_phone,
+            locker_id=locker_id,
+            start_time=from_epoch(start),
+            expected_return=from_epoch(expected),
+            actual_return=from_epoch(actual),
+            status=RentalStatus(status),
+            notes=notes
         )
 
     def close(self):
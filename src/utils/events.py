@@ -0,0 +1,293 @@
+"""
+Event Bus
+=========
+
+In-process publish/subscribe for state changes (locker states, cart
+returns) between the monitor thread and async API handlers.
+
+- publish() may be called from any thread; events are handed to each
+  subscriber's event loop with call_soon_threadsafe
+- Every subscriber has a bounded queue; when it is full, new events for
+  that subscriber are dropped and counted (a slow client never blocks the
+  publisher or other subscribers)
+- Events published with a key are retained (last event per topic + key),
+  so new subscribers can start from a snapshot of the current state
+- Every topic has a version (number of events published on it), usable
+  as a cheap "has anything changed" check
+- An optional `forward` hook sees every locally published event (used to
+  share events between worker processes, see utils.state_sync); it is
+  called on the publishing thread, so it must not block
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from core import get_logger
+
+logger = get_logger(__name__)
+
+# Topics
+TOPIC_LOCKER = "locker"                # Locker state changed (key: locker ID)
+TOPIC_CART_RETURNED = "cart_returned"  # Monitor detected and recorded a return
+TOPIC_CART = "cart"                    # Cart state changed (key: cart ID)
+TOPIC_RENTAL = "rental"                # Rental created/returned/overdue
+
+ALL_TOPICS = (TOPIC_LOCKER, TOPIC_CART_RETURNED, TOPIC_CART, TOPIC_RENTAL)
+
+
+@dataclass
+class Event:
+    """One published event."""
+
+    topic: str
+    data: dict
+    key: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        """Convert event to a JSON-serializable dictionary."""
+        return {"topic": self.topic, "key": self.key, "timestamp": self.timestamp, "data": self.data}
+
+    @cached_property
+    def sse(self) -> bytes:
+        """Server-Sent Events frame, encoded once and shared by all subscribers."""
+        return f"event: {self.topic}\ndata: {json.dumps(self.to_dict(), default=str)}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """
+    Queue of events of some topics for one subscriber.
+
+    Must be created inside a running event loop. Use as a context manager
+    so it is always unsubscribed:
+
+        with bus.subscribe("locker", "cart_returned") as subscription:
+            event = await subscription.get(timeout=25)
+    """
+
+    def __init__(self, bus: "EventBus", topics: Tuple[str, ...], max_queue: int):
+        self.bus = bus
+        self.topics = topics
+        self.dropped = 0
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def _deliver(self, event: Event):
+        """Put an event on the queue (runs in the subscriber's loop)."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    @property
+    def overflowed(self) -> bool:
+        """True once an event was dropped because the queue was full."""
+        return self.dropped > 0
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """
+        Wait for the next event.
+
+        Args:
+            timeout: Seconds to wait (None waits forever)
+
+        Returns:
+            Next event, or None on timeout
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        """Unsubscribe."""
+        self.bus._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class EventBus:
+    """Thread-safe publish/subscribe hub."""
+
+    def __init__(self, max_queue: int = 100):
+        """
+        Initialize event bus.
+
+        Args:
+            max_queue: Default queue size of each subscription
+        """
+        self.max_queue = max_queue
+        self.published = 0
+        self._versions: Dict[str, int] = {}
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._retained: Dict[Tuple[str, str], Event] = {}
+        self._lock = threading.Lock()
+        # Called with every event published locally (not with relayed ones)
+        self.forward: Optional[Callable[[Event], None]] = None
+
+    def subscribe(self, *topics: str, max_queue: Optional[int] = None) -> Subscription:
+        """
+        Subscribe to topics (call from a running event loop).
+
+        Args:
+            *topics: Topic names
+            max_queue: Queue size of this subscription (default: bus default)
+
+        Returns:
+            Subscription
+        """
+        subscription = Subscription(self, topics, max_queue or self.max_queue)
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, topic: str, data: dict, key: Optional[str] = None, relayed: bool = False):
+        """
+        Publish an event (from any thread).
+
+        Args:
+            topic: Topic name (e.g. "locker")
+            data: Event payload
+            key: Entity the event describes (e.g. locker ID); keyed events
+                 are retained for snapshot()
+            relayed: Event comes from another worker (not forwarded again)
+        """
+        event = Event(topic=topic, data=data, key=key)
+        if self.forward is not None and not relayed:
+            try:
+                self.forward(event)
+            except Exception as e:
+                logger.error(f"Failed to forward {topic} event: {e}")
+
+        with self._lock:
+            self.published += 1
+            self._versions[topic] = self._versions.get(topic, 0) + 1
+            if key is not None:
+                self._retained[(topic, key)] = event
+            subscribers = list(self._subscribers.get(topic, ()))
+
+        if not subscribers:
+            return
+
+        # One loop wake-up per event loop, not per subscriber
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+
+        for loop, loop_subscribers in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver_all, loop_subscribers, event)
+            except RuntimeError:
+                # Subscribers' loop is closed
+                for subscription in loop_subscribers:
+                    self._unsubscribe(subscription)
+
+    def bump(self, topic: str):
+        """
+        Bump a topic's version without publishing.
+
+        For a change made now whose event is published later (after
+        awaits): caches keyed by the version stop serving the old state
+        at once.
+
+        Args:
+            topic: Topic name
+        """
+        with self._lock:
+            self._versions[topic] = self._versions.get(topic, 0) + 1
+
+    def version(self, topic: str) -> int:
+        """
+        Get the version of a topic (bumped by every publish on it).
+
+        Args:
+            topic: Topic name
+
+        Returns:
+            Number of events published on the topic
+        """
+        return self._versions.get(topic, 0)
+
+    def snapshot(self, topic: str) -> List[Event]:
+        """
+        Get the retained (latest) event of every key of a topic.
+
+        Args:
+            topic: Topic name
+
+        Returns:
+            Retained events
+        """
+        with self._lock:
+            return [event for (t, _), event in self._retained.items() if t == topic]
+
+    def latest(self, topic: str, key: str) -> Optional[Event]:
+        """
+        Get the retained event of one key.
+
+        Args:
+            topic: Topic name
+            key: Entity key
+
+        Returns:
+            Retained event or None
+        """
+        return self._retained.get((topic, key))
+
+    def subscriber_count(self) -> int:
+        """Get the number of active subscriptions."""
+        with self._lock:
+            return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+
+def _deliver_all(subscriptions: List[Subscription], event: Event):
+    """Deliver an event to subscriptions of one loop (runs in that loop)."""
+    for subscription in subscriptions:
+        subscription._deliver(event)
+
+
+def publish_cart(event_bus: Optional[EventBus], cart):
+    """
+    Publish a cart's current state (retained per cart).
+
+    Args:
+        event_bus: Bus to publish on (nothing is done if None)
+        cart: Cart model
+    """
+    if event_bus is not None:
+        event_bus.publish(TOPIC_CART, cart.model_dump(mode="json"), key=str(cart.cart_id))
+
+
+def publish_rental(event_bus: Optional[EventBus], rental, change: str):
+    """
+    Publish a rental change (not retained - rentals are unbounded).
+
+    Args:
+        event_bus: Bus to publish on (nothing is done if None)
+        rental: Rental model
+        change: "created", "returned" or "overdue"
+    """
+    if event_bus is not None:
+        event_bus.publish(TOPIC_RENTAL, {"change": change, "rental": rental.model_dump(mode="json")})
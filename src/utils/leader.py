@@ -0,0 +1,129 @@
+"""
+Leader Election
+===============
+
+Elects exactly one worker process (on one machine) to own the serial
+port and the CU16 monitor.
+
+The leader holds an exclusive flock() on a lock file. The kernel releases
+the lock when the process exits, however it exits, so a follower that
+keeps retrying takes over after a leader crash without any timeout
+bookkeeping.
+
+On platforms without fcntl (Windows) there is no election: the process
+is always the leader, which is only correct with a single worker.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+from core import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = get_logger(__name__)
+
+
+class LeaderElection:
+    """
+    File-lock leader election between worker processes.
+
+    Example:
+        election = LeaderElection("data/leader.lock", on_elected=start_hardware)
+        election.start()
+    """
+
+    def __init__(
+        self,
+        lock_path: str,
+        on_elected: Callable[[], None],
+        retry_interval: float = 2.0,
+    ):
+        """
+        Initialize election.
+
+        Args:
+            lock_path: Lock file shared by the workers
+            on_elected: Called once, from the election thread, when this
+                        process becomes the leader
+            retry_interval: Seconds between attempts of a follower
+        """
+        self.lock_path = lock_path
+        self.on_elected = on_elected
+        self.retry_interval = retry_interval
+        self.is_leader = False
+        self._fd: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def try_acquire(self) -> bool:
+        """
+        Try once to become the leader.
+
+        Returns:
+            True if this process is (now) the leader
+        """
+        if self.is_leader:
+            return True
+
+        if fcntl is None:
+            logger.warning("No fcntl - leader election disabled (run a single worker)")
+            self.is_leader = True
+            return True
+
+        Path(self.lock_path).parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        # Record the leader's PID for operators (the lock is what counts)
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        self.is_leader = True
+        return True
+
+    def start(self):
+        """Campaign in a background thread until elected or stopped."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="leader-election", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        announced = False
+        while not self._stop.is_set():
+            if self.try_acquire():
+                logger.info(f"Worker {os.getpid()} elected leader (owns RS485 and monitor)")
+                try:
+                    self.on_elected()
+                except Exception as e:
+                    logger.error(f"Leader startup failed: {e}")
+                return
+            if not announced:
+                logger.info(f"Worker {os.getpid()} is a follower (hardware commands go to the leader)")
+                announced = True
+            self._stop.wait(self.retry_interval)
+
+    def stop(self):
+        """Stop campaigning and give up leadership."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self.is_leader = False
@@ -0,0 +1,165 @@
+"""
+Database Migrations
+===================
+
+Schema migrations for the rentals SQLite database.
+
+Schema history:
+- v1: start_time / expected_return / actual_return / created_at as ISO TEXT
+- v2: the same columns as INTEGER epoch seconds
+
+RentalDatabase applies pending migrations automatically when it opens a
+database. The module can also be run by hand against an existing file
+before deploying:
+
+    PYTHONPATH=src python -m utils.migrations data/rentals.db
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from core import get_logger
+
+logger = get_logger(__name__)
+
+# Current (v2) rentals table definition
+RENTALS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS rentals (
+        rental_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cart_id INTEGER NOT NULL,
+        user_phone TEXT NOT NULL,
+        locker_id INTEGER NOT NULL,
+        start_time INTEGER NOT NULL,
+        expected_return INTEGER NOT NULL,
+        actual_return INTEGER,
+        status TEXT NOT NULL,
+        notes TEXT,
+        created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+    )
+"""
+
+# Rows copied per executemany batch during the migration
+_BATCH_SIZE = 10000
+
+
+def _iso_to_epoch(value: Optional[str]) -> Optional[int]:
+    """Convert an ISO timestamp from the v1 schema to epoch seconds."""
+    if value is None:
+        return None
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def _utc_text_to_epoch(value: Optional[str]) -> Optional[int]:
+    """Convert a SQLite CURRENT_TIMESTAMP value (UTC text) to epoch seconds."""
+    if value is None:
+        return None
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+
+
+def needs_epoch_migration(conn: sqlite3.Connection) -> bool:
+    """
+    Check whether the rentals table still uses the v1 (ISO TEXT) schema.
+
+    Args:
+        conn: Open database connection
+
+    Returns:
+        True if the table exists with TEXT timestamps
+    """
+    columns = {row[1]: row[2].upper() for row in conn.execute("PRAGMA table_info(rentals)")}
+    return columns.get("start_time") == "TEXT"
+
+
+def migrate_rentals_to_epoch(conn: sqlite3.Connection) -> int:
+    """
+    Rebuild the rentals table with INTEGER epoch timestamp columns.
+
+    Runs as a single transaction: on any error the database is left
+    untouched. Indexes and triggers are dropped with the old table and
+    must be recreated by the caller (RentalDatabase does this as part of
+    its schema initialization). Row ids are preserved and the statistics
+    counters are not touched, since no rental changes status.
+
+    Args:
+        conn: Open database connection
+
+    Returns:
+        Number of migrated rows
+    """
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # Manual transaction control (DDL included)
+
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("ALTER TABLE rentals RENAME TO rentals_v1")
+        conn.execute(RENTALS_TABLE_SQL)
+
+        source = conn.execute("""
+            SELECT rental_id, cart_id, user_phone, locker_id,
+                   start_time, expected_return, actual_return,
+                   status, notes, created_at
+            FROM rentals_v1
+        """)
+
+        migrated = 0
+        while True:
+            rows = source.fetchmany(_BATCH_SIZE)
+            if not rows:
+                break
+
+            conn.executemany("""
+                INSERT INTO rentals (
+                    rental_id, cart_id, user_phone, locker_id,
+                    start_time, expected_return, actual_return,
+                    status, notes, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    rental_id, cart_id, phone, locker_id,
+                    _iso_to_epoch(start), _iso_to_epoch(expected), _iso_to_epoch(actual),
+                    status, notes, _utc_text_to_epoch(created_at),
+                )
+                for (rental_id, cart_id, phone, locker_id,
+                     start, expected, actual, status, notes, created_at) in rows
+            ])
+            migrated += len(rows)
+
+        conn.execute("DROP TABLE rentals_v1")
+        conn.execute("COMMIT")
+
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    finally:
+        conn.isolation_level = previous_isolation
+
+    logger.info(f"Migrated {migrated} rentals to epoch timestamp schema")
+    return migrated
+
+
+def main(argv: list) -> int:
+    """Migrate the database file given on the command line."""
+    if len(argv) != 2:
+        print("Usage: python -m utils.migrations <path/to/rentals.db>")
+        return 1
+
+    # Opening the database applies pending migrations and recreates indexes
+    from utils.database import RentalDatabase
+
+    db_path = argv[1]
+    with sqlite3.connect(db_path) as conn:
+        pending = needs_epoch_migration(conn)
+
+    RentalDatabase(db_path)
+    print(f"{db_path}: {'migrated to' if pending else 'already on'} epoch timestamp schema")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
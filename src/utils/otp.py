@@ -12,25 +12,13 @@ import random
 import string
 from typing import Optional, Dict
 from datetime import datetime, timedelta
-from dataclasses import dataclass
 
 from core import get_logger
+from utils.otp_store import OTPEntry, OTPStore, MemoryOTPStore
 
 logger = get_logger(__name__)
 
 
-@dataclass
-class OTPEntry:
-    """OTP entry with metadata."""
-
-    code: str
-    phone: str
-    created_at: datetime
-    expires_at: datetime
-    attempts: int = 0
-    max_attempts: int = 3
-
-
 class OTPManager:
     """
     Manages OTP generation and validation.
@@ -38,20 +26,27 @@ class OTPManager:
     Features:
     - Time-based expiration
     - Attempt limiting
-    - Auto-cleanup
+    - Auto-cleanup in expiry order (see utils.otp_store)
+    - Pluggable store (in-process or shared by all workers)
     """
 
-    def __init__(self, code_length: int = 4, expiration_minutes: int = 5):
+    def __init__(
+        self,
+        code_length: int = 4,
+        expiration_minutes: int = 5,
+        store: Optional[OTPStore] = None,
+    ):
         """
         Initialize OTP manager.
 
         Args:
             code_length: Length of OTP code (default: 4)
             expiration_minutes: OTP validity duration (default: 5)
+            store: OTP store (default: in-process MemoryOTPStore)
         """
         self.code_length = code_length
         self.expiration_minutes = expiration_minutes
-        self.otp_storage: Dict[str, OTPEntry] = {}
+        self.store = store if store is not None else MemoryOTPStore()
 
         logger.info(
             f"OTP Manager initialized (length={code_length}, expiry={expiration_minutes}min)"
@@ -80,7 +75,7 @@ class OTPManager:
         )
 
         # Store OTP (overwrite if exists)
-        self.otp_storage[phone] = entry
+        self.store.put(entry)
 
         logger.info(
             f"Generated OTP for {phone}: {code} (expires in {self.expiration_minutes}min)"
@@ -105,36 +100,41 @@ class OTPManager:
         logger.info(f"Validating OTP for {phone}")
 
         # Check if OTP exists
-        if phone not in self.otp_storage:
+        entry = self.store.get(phone)
+        if entry is None:
             logger.warning(f"No OTP found for {phone}")
             return False
 
-        entry = self.otp_storage[phone]
-
         # Check if expired
         if datetime.now() > entry.expires_at:
             logger.warning(f"OTP expired for {phone}")
-            del self.otp_storage[phone]
+            self.store.delete(phone)
             return False
 
         # Check attempts
         if entry.attempts >= entry.max_attempts:
             logger.warning(f"Max attempts exceeded for {phone}")
-            del self.otp_storage[phone]
+            self.store.delete(phone)
             return False
 
-        # Increment attempts
-        entry.attempts += 1
+        # Increment attempts (atomic in the store, workers may race)
+        attempts = self.store.increment_attempts(phone)
+        if attempts is None or attempts > entry.max_attempts:
+            logger.warning(f"Max attempts exceeded for {phone}")
+            self.store.delete(phone)
+            return False
 
-        # Validate code
-        if entry.code == code:
+        # Validate code; consuming the OTP decides (only one of two racing
+        # requests with the right code deletes it)
+        if entry.code == code and self.store.delete(phone):
             logger.info(f"OTP verified for {phone}")
-            # Remove OTP after successful validation
-            del self.otp_storage[phone]
             return True
+        elif entry.code == code:
+            logger.warning(f"OTP for {phone} already used")
+            return False
         else:
             logger.warning(
-                f"Invalid OTP for {phone} (attempt {entry.attempts}/{entry.max_attempts})"
+                f"Invalid OTP for {phone} (attempt {attempts}/{entry.max_attempts})"
             )
             return False
 
@@ -148,10 +148,10 @@ class OTPManager:
         Returns:
             Remaining seconds or None if not found
         """
-        if phone not in self.otp_storage:
+        entry = self.store.get(phone)
+        if entry is None:
             return None
 
-        entry = self.otp_storage[phone]
         remaining = (entry.expires_at - datetime.now()).total_seconds()
 
         return int(max(0, remaining))
@@ -166,27 +166,18 @@ class OTPManager:
         Returns:
             True if OTP was found and deleted
         """
-        if phone in self.otp_storage:
-            del self.otp_storage[phone]
+        if self.store.delete(phone):
             logger.info(f"OTP revoked for {phone}")
             return True
 
         return False
 
     def _cleanup_expired(self):
-        """Remove all expired OTPs."""
-        now = datetime.now()
-        expired_phones = [
-            phone
-            for phone, entry in self.otp_storage.items()
-            if now > entry.expires_at
-        ]
-
-        for phone in expired_phones:
-            del self.otp_storage[phone]
+        """Remove expired OTPs (only the expired ones are touched)."""
+        removed = self.store.purge_expired()
 
-        if expired_phones:
-            logger.debug(f"Cleaned up {len(expired_phones)} expired OTPs")
+        if removed:
+            logger.debug("Cleaned up %d expired OTPs", removed)
 
     def get_stats(self) -> Dict:
         """
@@ -198,7 +189,7 @@ class OTPManager:
         self._cleanup_expired()
 
         return {
-            "active_otps": len(self.otp_storage),
+            "active_otps": self.store.count(),
             "code_length": self.code_length,
             "expiration_minutes": self.expiration_minutes,
         }
@@ -0,0 +1,356 @@
+"""
+OTP Stores
+==========
+
+Storage backends for pending OTP codes.
+
+- MemoryOTPStore: in-process dict with an expiry min-heap and an LRU cap
+- SQLiteOTPStore: shared SQLite file, so every worker process sees the
+  same OTPs (a code sent by one worker can be verified by another)
+
+Expired codes are removed in expiry order: each purge only touches the
+entries that actually expired (O(log n) each) instead of scanning the
+whole store on every request.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import heapq
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from core import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class OTPEntry:
+    """OTP entry with metadata."""
+
+    code: str
+    phone: str
+    created_at: datetime
+    expires_at: datetime
+    attempts: int = 0
+    max_attempts: int = 3
+
+
+class OTPStore(ABC):
+    """
+    Storage backend of the OTP manager.
+
+    Entries are keyed by phone number; storing a new entry for a phone
+    replaces the previous one.
+    """
+
+    @abstractmethod
+    def put(self, entry: OTPEntry):
+        """
+        Store an OTP entry (replacing any entry of the same phone).
+
+        Args:
+            entry: OTP entry
+        """
+
+    @abstractmethod
+    def get(self, phone: str) -> Optional[OTPEntry]:
+        """
+        Get the entry of a phone number (expired entries included).
+
+        Args:
+            phone: Phone number
+
+        Returns:
+            OTP entry or None if not found
+        """
+
+    @abstractmethod
+    def increment_attempts(self, phone: str) -> Optional[int]:
+        """
+        Atomically count one validation attempt.
+
+        Args:
+            phone: Phone number
+
+        Returns:
+            Attempts after the increment, or None if not found
+        """
+
+    @abstractmethod
+    def delete(self, phone: str) -> bool:
+        """
+        Delete the entry of a phone number.
+
+        Args:
+            phone: Phone number
+
+        Returns:
+            True if an entry was deleted
+        """
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """
+        Remove expired entries.
+
+        Returns:
+            Number of entries removed
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Get the number of stored entries."""
+
+
+class MemoryOTPStore(OTPStore):
+    """
+    In-process OTP store.
+
+    - Entries live in an OrderedDict in least-recently-stored order; when
+      `max_entries` is exceeded the oldest entry is evicted.
+    - A min-heap of (expiry, sequence, phone) drives expiry. Replaced or
+      deleted entries leave stale heap items behind; they are skipped when
+      popped and the heap is rebuilt when stale items dominate.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize store.
+
+        Args:
+            max_entries: Maximum number of stored OTPs (LRU eviction beyond)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, OTPEntry]" = OrderedDict()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def put(self, entry: OTPEntry):
+        with self._lock:
+            self._entries.pop(entry.phone, None)
+            self._entries[entry.phone] = entry
+            self._sequence += 1
+            heapq.heappush(self._heap, (entry.expires_at.timestamp(), self._sequence, entry.phone))
+
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.warning(f"OTP store full ({self.max_entries}) - evicted OTP for {evicted}")
+
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                self._compact()
+
+    def get(self, phone: str) -> Optional[OTPEntry]:
+        return self._entries.get(phone)
+
+    def increment_attempts(self, phone: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(phone)
+            if entry is None:
+                return None
+            entry.attempts += 1
+            return entry.attempts
+
+    def delete(self, phone: str) -> bool:
+        with self._lock:
+            return self._entries.pop(phone, None) is not None
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] < now:
+                expires, _, phone = heapq.heappop(heap)
+                entry = self._entries.get(phone)
+                # Skip stale heap items of replaced/deleted entries
+                if entry is not None and entry.expires_at.timestamp() == expires:
+                    del self._entries[phone]
+                    removed += 1
+        return removed
+
+    def count(self) -> int:
+        return len(self._entries)
+
+    def _compact(self):
+        """Rebuild the heap from the live entries (drops stale items)."""
+        self._heap = [
+            (entry.expires_at.timestamp(), i, phone)
+            for i, (phone, entry) in enumerate(self._entries.items())
+        ]
+        heapq.heapify(self._heap)
+        self._sequence = len(self._heap)
+
+
+class SQLiteOTPStore(OTPStore):
+    """
+    OTP store in a SQLite file shared by all worker processes.
+
+    Expiry is indexed, so purging deletes only the expired rows. The
+    `max_entries` cap is enforced on purge by deleting the oldest rows.
+    """
+
+    # Minimum seconds between purges of one process
+    PURGE_INTERVAL = 1.0
+
+    def __init__(self, db_path: str = "data/otp.db", max_entries: int = 10000):
+        """
+        Initialize store.
+
+        Args:
+            db_path: Path to SQLite database file
+            max_entries: Maximum number of stored OTPs (oldest evicted beyond)
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._last_purge = 0.0
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection (waits for other workers' writes)."""
+        return sqlite3.connect(self.db_path, timeout=5.0)
+
+    def _init_database(self):
+        """Create the OTP table and expiry index."""
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS otp_codes (
+                    phone TEXT PRIMARY KEY,
+                    code TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_otp_expires ON otp_codes(expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_otp_created ON otp_codes(created_at)")
+            conn.commit()
+        finally:
+            conn.close()
+
+        logger.info(f"OTP store: {self.db_path}")
+
+    def put(self, entry: OTPEntry):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO otp_codes "
+                    "(phone, code, created_at, expires_at, attempts, max_attempts) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        entry.phone, entry.code,
+                        entry.created_at.timestamp(), entry.expires_at.timestamp(),
+                        entry.attempts, entry.max_attempts,
+                    ),
+                )
+        finally:
+            conn.close()
+
+    def get(self, phone: str) -> Optional[OTPEntry]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT code, phone, created_at, expires_at, attempts, max_attempts "
+                "FROM otp_codes WHERE phone = ?",
+                (phone,),
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+        return OTPEntry(
+            code=row[0],
+            phone=row[1],
+            created_at=datetime.fromtimestamp(row[2]),
+            expires_at=datetime.fromtimestamp(row[3]),
+            attempts=row[4],
+            max_attempts=row[5],
+        )
+
+    def increment_attempts(self, phone: str) -> Optional[int]:
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE otp_codes SET attempts = attempts + 1 WHERE phone = ?", (phone,)
+                )
+                if cursor.rowcount == 0:
+                    return None
+                row = conn.execute(
+                    "SELECT attempts FROM otp_codes WHERE phone = ?", (phone,)
+                ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def delete(self, phone: str) -> bool:
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute("DELETE FROM otp_codes WHERE phone = ?", (phone,))
+        finally:
+            conn.close()
+        return cursor.rowcount > 0
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        if now - self._last_purge < self.PURGE_INTERVAL:
+            return 0
+        self._last_purge = now
+
+        conn = self._connect()
+        try:
+            with conn:
+                removed = conn.execute(
+                    "DELETE FROM otp_codes WHERE expires_at < ?", (now,)
+                ).rowcount
+                overflow = conn.execute("SELECT COUNT(*) FROM otp_codes").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM otp_codes WHERE phone IN "
+                        "(SELECT phone FROM otp_codes ORDER BY created_at LIMIT ?)",
+                        (overflow,),
+                    )
+                    logger.warning(f"OTP store full ({self.max_entries}) - evicted {overflow} OTPs")
+        finally:
+            conn.close()
+        return removed
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM otp_codes").fetchone()[0]
+        finally:
+            conn.close()
+
+
+def create_otp_store(store_path: str = "", max_entries: int = 10000) -> OTPStore:
+    """
+    Create the OTP store selected by settings.
+
+    Args:
+        store_path: SQLite file shared by all workers ("" keeps OTPs in-process)
+        max_entries: Maximum number of stored OTPs
+
+    Returns:
+        OTP store instance
+    """
+    if store_path:
+        return SQLiteOTPStore(store_path, max_entries=max_entries)
+    return MemoryOTPStore(max_entries=max_entries)
+
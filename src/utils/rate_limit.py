@@ -0,0 +1,271 @@
+"""
+Rate Limiting
+=============
+
+Token-bucket rate limiter with pluggable bucket stores.
+
+- MemoryBucketStore: in-process OrderedDict, LRU-bounded (idle keys are
+  evicted first, so memory stays flat under key-spraying abuse)
+- SQLiteBucketStore: SQLite file shared by all worker processes
+
+Every check is O(1): one bucket is read, refilled and written.
+
+Limits are written as "<count>/<period>", e.g. "3/minute": a burst of
+up to 3 hits, refilled at 3 per minute.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+from core import get_logger
+
+logger = get_logger(__name__)
+
+PERIOD_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket parameters."""
+
+    capacity: int           # Burst size
+    refill_per_second: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """
+        Parse a "<count>/<period>" limit.
+
+        Args:
+            spec: e.g. "3/minute", "60/hour"
+
+        Returns:
+            RateLimit
+
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        try:
+            count_text, period = spec.strip().lower().split("/", 1)
+            count = int(count_text)
+            seconds = PERIOD_SECONDS[period.rstrip("s")]
+        except (ValueError, KeyError):
+            raise ValueError(f"Invalid rate limit: {spec!r} (expected e.g. '3/minute')")
+        if count <= 0:
+            raise ValueError(f"Invalid rate limit: {spec!r} (count must be positive)")
+        return cls(capacity=count, refill_per_second=count / seconds)
+
+
+def _take(tokens: float, updated: float, now: float, limit: RateLimit) -> Tuple[float, float]:
+    """
+    Refill a bucket and take one token.
+
+    Returns:
+        (tokens left, seconds until a token is available) - the wait is
+        0.0 if the token was taken
+    """
+    tokens = min(limit.capacity, tokens + (now - updated) * limit.refill_per_second)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / limit.refill_per_second
+
+
+class BucketStore(ABC):
+    """Storage of token buckets keyed by string."""
+
+    @abstractmethod
+    def hit(self, key: str, limit: RateLimit) -> float:
+        """
+        Take one token from a key's bucket.
+
+        Args:
+            key: Bucket key (e.g. "otp:phone:0501234567")
+            limit: Bucket parameters
+
+        Returns:
+            0.0 if allowed, otherwise seconds until the next token
+        """
+
+
+class MemoryBucketStore(BucketStore):
+    """In-process bucket store, LRU-bounded to `max_keys` buckets."""
+
+    def __init__(self, max_keys: int = 100000):
+        """
+        Initialize store.
+
+        Args:
+            max_keys: Maximum number of tracked keys
+        """
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens, wait = limit.capacity - 1, 0.0
+            else:
+                tokens, wait = _take(bucket[0], bucket[1], now, limit)
+                self._buckets.move_to_end(key)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBucketStore(BucketStore):
+    """
+    Bucket store in a SQLite file shared by all workers.
+
+    Each hit is one short write transaction, so the limit holds across
+    workers. Buckets idle for longer than `max_idle` are deleted
+    periodically.
+    """
+
+    # Seconds between cleanups of idle buckets
+    CLEANUP_INTERVAL = 300.0
+
+    def __init__(self, db_path: str = "data/rate_limits.db", max_idle: float = 86400.0):
+        """
+        Initialize store.
+
+        Args:
+            db_path: Path to SQLite database file
+            max_idle: Seconds after which an untouched bucket is deleted
+        """
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self._last_cleanup = time.time()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_buckets_updated ON rate_buckets(updated)")
+            conn.commit()
+        finally:
+            conn.close()
+
+        logger.info(f"Rate limit store: {self.db_path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode (transactions are explicit)."""
+        return sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+
+    def hit(self, key: str, limit: RateLimit) -> float:
+        # Wall clock: buckets are shared between processes
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                tokens, wait = limit.capacity - 1, 0.0
+            else:
+                tokens, wait = _take(row[0], row[1], now, limit)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            if now - self._last_cleanup >= self.CLEANUP_INTERVAL:
+                self._last_cleanup = now
+                conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - self.max_idle,))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return wait
+
+
+class RateLimiter:
+    """
+    Named token-bucket limits over a shared bucket store.
+
+    Example:
+        limiter = RateLimiter(MemoryBucketStore())
+        wait = limiter.hit("otp:phone", "0501234567", RateLimit.parse("3/minute"))
+        if wait:
+            ...  # reject, retry after `wait` seconds
+    """
+
+    def __init__(self, store: Optional[BucketStore] = None):
+        """
+        Initialize limiter.
+
+        Args:
+            store: Bucket store (default: in-process MemoryBucketStore)
+        """
+        self.store = store if store is not None else MemoryBucketStore()
+        self.rejected = 0
+
+    def hit(self, scope: str, key: str, limit: RateLimit) -> float:
+        """
+        Count one hit of `key` against a limit.
+
+        Args:
+            scope: Limit name (e.g. "otp:phone"); keys of different scopes
+                   have separate buckets
+            key: Client key (phone number, IP address)
+            limit: Bucket parameters
+
+        Returns:
+            0.0 if allowed, otherwise seconds until the next hit is allowed
+        """
+        try:
+            wait = self.store.hit(f"{scope}:{key}", limit)
+        except sqlite3.Error as e:
+            # Fail open: a broken limiter must not take the kiosk down
+            logger.error(f"Rate limit store error: {e}")
+            return 0.0
+
+        if wait:
+            self.rejected += 1
+        return wait
+
+
+def create_rate_limiter(store_path: str = "", max_keys: int = 100000) -> RateLimiter:
+    """
+    Create the rate limiter selected by settings.
+
+    Args:
+        store_path: SQLite file shared by all workers ("" keeps buckets in-process)
+        max_keys: Maximum number of in-process buckets
+
+    Returns:
+        Rate limiter instance
+    """
+    if store_path:
+        return RateLimiter(SQLiteBucketStore(store_path))
+    return RateLimiter(MemoryBucketStore(max_keys=max_keys))
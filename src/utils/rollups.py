@@ -0,0 +1,223 @@
+"""
+Rental Rollups
+==============
+
+Incrementally maintained hourly/daily aggregates of closed rentals.
+
+Each closed rental is folded into per-cart buckets once, when it is
+returned, so dashboard queries read a handful of pre-aggregated rows
+instead of scanning the rentals table.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from models.rental import Rental, RentalStatus
+
+# Supported bucket sizes (granularity -> bucket length in seconds)
+GRANULARITIES: Dict[str, int] = {
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+def bucket_floor(moment: datetime, granularity: str) -> datetime:
+    """
+    Get the start of the bucket containing a moment.
+
+    Args:
+        moment: Point in time (naive local time, like all rental timestamps)
+        granularity: "hour" or "day"
+
+    Returns:
+        Bucket start time
+    """
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _bucket_step(granularity: str) -> timedelta:
+    """Get the length of one bucket."""
+    return timedelta(seconds=GRANULARITIES[granularity])
+
+
+class RentalRollups:
+    """
+    Time-bucketed rental analytics stored next to the rentals table.
+
+    Per bucket and cart the rollup keeps:
+    - rentals_closed: rentals returned inside the bucket
+    - late_returns: of those, how many were returned late
+    - duration_seconds: summed duration of the rentals returned inside the bucket
+    - busy_seconds: rental time overlapping the bucket (for utilization)
+    """
+
+    def __init__(self, param: str = "?"):
+        """
+        Initialize rollups.
+
+        Args:
+            param: The database driver's parameter placeholder
+        """
+        p = self.param = param
+        self._upsert_sql = f"""
+            INSERT INTO rental_rollups (
+                granularity, bucket_start, branch_id, cart_id,
+                rentals_closed, late_returns, duration_seconds, busy_seconds
+            ) VALUES ({p}, {p}, {p}, {p}, {p}, {p}, {p}, {p})
+            ON CONFLICT(granularity, branch_id, cart_id, bucket_start) DO UPDATE SET
+                rentals_closed = rental_rollups.rentals_closed + excluded.rentals_closed,
+                late_returns = rental_rollups.late_returns + excluded.late_returns,
+                duration_seconds = rental_rollups.duration_seconds + excluded.duration_seconds,
+                busy_seconds = rental_rollups.busy_seconds + excluded.busy_seconds
+        """
+
+    def init_schema(self, cursor: sqlite3.Cursor):
+        """
+        Create the rollups table.
+
+        Args:
+            cursor: Cursor of the schema initialization transaction
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rental_rollups (
+                granularity TEXT NOT NULL,
+                bucket_start INTEGER NOT NULL,
+                branch_id TEXT NOT NULL,
+                cart_id INTEGER NOT NULL,
+                rentals_closed INTEGER NOT NULL DEFAULT 0,
+                late_returns INTEGER NOT NULL DEFAULT 0,
+                duration_seconds REAL NOT NULL DEFAULT 0,
+                busy_seconds REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (granularity, branch_id, cart_id, bucket_start)
+            )
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_rollups_branch_bucket
+            ON rental_rollups(granularity, branch_id, bucket_start)
+        """)
+
+    def bucket_contributions(self, rental: Rental) -> List[Tuple[str, int, int, int, float, float]]:
+        """
+        Split a closed rental into per-bucket contributions.
+
+        Args:
+            rental: Returned rental (actual_return must be set)
+
+        Returns:
+            List of (granularity, bucket_start, rentals_closed, late_returns,
+            duration_seconds, busy_seconds) tuples
+        """
+        start = rental.start_time
+        end = rental.actual_return
+        is_late = 1 if rental.status == RentalStatus.RETURNED_LATE else 0
+        duration = max(0.0, (end - start).total_seconds())
+
+        rows = []
+        for granularity in GRANULARITIES:
+            step = _bucket_step(granularity)
+            closing_bucket = bucket_floor(end, granularity)
+
+            # Busy time of every bucket the rental overlaps
+            bucket = bucket_floor(start, granularity)
+            while bucket <= closing_bucket:
+                overlap = (min(end, bucket + step) - max(start, bucket)).total_seconds()
+                is_closing = bucket == closing_bucket
+                rows.append((
+                    granularity,
+                    int(bucket.timestamp()),
+                    1 if is_closing else 0,
+                    is_late if is_closing else 0,
+                    duration if is_closing else 0.0,
+                    max(0.0, overlap),
+                ))
+                bucket += step
+
+        return rows
+
+    def apply_closed_rental(self, cursor: sqlite3.Cursor, rental: Rental, branch_id: str):
+        """
+        Fold a closed rental into the rollups.
+
+        Must be called inside the transaction that closes the rental so the
+        rollups and the rentals table commit together.
+
+        Args:
+            cursor: Cursor of the closing transaction
+            rental: Returned rental
+            branch_id: Branch the rental belongs to
+        """
+        cursor.executemany(self._upsert_sql, [
+            (granularity, bucket_start, branch_id, rental.cart_id, closed, late, duration, busy)
+            for granularity, bucket_start, closed, late, duration, busy
+            in self.bucket_contributions(rental)
+        ])
+
+    def query(
+        self,
+        cursor: sqlite3.Cursor,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        branch_id: str,
+        cart_id: Optional[int] = None,
+        capacity: int = 1,
+    ) -> List[dict]:
+        """
+        Read a time series of buckets.
+
+        Args:
+            cursor: Database cursor
+            granularity: "hour" or "day"
+            start: First bucket to include
+            end: Last bucket to include
+            branch_id: Branch to read
+            cart_id: Optional cart to read (all carts of the branch if None)
+            capacity: Number of carts the utilization is relative to
+
+        Returns:
+            List of bucket dictionaries ordered by time
+        """
+        params = [
+            granularity,
+            branch_id,
+            int(bucket_floor(start, granularity).timestamp()),
+            int(bucket_floor(end, granularity).timestamp()),
+        ]
+        p = self.param
+        cart_filter = ""
+        if cart_id is not None:
+            cart_filter = f"AND cart_id = {p}"
+            params.append(cart_id)
+
+        cursor.execute(f"""
+            SELECT bucket_start,
+                   SUM(rentals_closed), SUM(late_returns),
+                   SUM(duration_seconds), SUM(busy_seconds)
+            FROM rental_rollups
+            WHERE granularity = {p} AND branch_id = {p}
+              AND bucket_start BETWEEN {p} AND {p}
+              {cart_filter}
+            GROUP BY bucket_start
+            ORDER BY bucket_start
+        """, params)
+
+        bucket_seconds = GRANULARITIES[granularity]
+        series = []
+        for bucket_start, closed, late, duration, busy in cursor.fetchall():
+            series.append({
+                "bucket_start": datetime.fromtimestamp(bucket_start).isoformat(),
+                "rentals_closed": closed,
+                "late_returns": late,
+                "late_rate": late / closed if closed else 0.0,
+                "avg_duration_seconds": duration / closed if closed else 0.0,
+                "utilization": busy / (bucket_seconds * max(capacity, 1)),
+            })
+
+        return series
@@ -0,0 +1,291 @@
+"""
+Signed Auth Tokens
+==================
+
+Stateless authentication tokens: the phone number and expiry travel in
+the token, signed with HMAC-SHA256 under settings.SECRET_KEY. Any node
+holding the key validates a token with CPU work only, without a token
+store.
+
+Token format (URL-safe base64, no padding):
+    <payload>.<signature>    payload = "<phone>:<issued_ms>:<expires_s>"
+
+The payload is signed, not encrypted - it must not carry secrets.
+
+Revoked tokens are kept in a RevocationList: a Bloom filter answers
+"definitely not revoked" for almost every token, and only filter hits are
+checked against the exact set. The filter hashes are taken from the token
+signature (already uniformly random), so checking costs no extra hashing.
+An optional `forward` hook sees every local revocation, so other workers
+can apply it (see utils.state_sync).
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import base64
+import hashlib
+import hmac
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+@dataclass
+class TokenClaims:
+    """Claims carried by a signed token."""
+
+    phone: str
+    issued_ms: int
+    expires_at: int  # Epoch seconds
+    signature: bytes = b""
+
+
+class SignedTokenCodec:
+    """Encodes and verifies HMAC-signed tokens."""
+
+    # Signature bytes kept in the token (128 bits)
+    SIGNATURE_BYTES = 16
+
+    def __init__(self, secret_key: str):
+        """
+        Initialize codec.
+
+        Args:
+            secret_key: HMAC key shared by every node
+
+        Raises:
+            ValueError: If the key is empty
+        """
+        if not secret_key:
+            raise ValueError("SECRET_KEY is required for signed auth tokens")
+        # Keyed HMAC state, copied per token (skips re-keying)
+        self._mac = hmac.new(secret_key.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def _sign(self, payload: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(payload)
+        return mac.digest()[:self.SIGNATURE_BYTES]
+
+    def encode(self, phone: str, expires_at: int) -> str:
+        """
+        Create a signed token.
+
+        Args:
+            phone: User phone number
+            expires_at: Expiry (epoch seconds)
+
+        Returns:
+            Signed token
+        """
+        payload = f"{phone}:{int(time.time() * 1000)}:{expires_at}".encode("utf-8")
+        return f"{_b64encode(payload)}.{_b64encode(self._sign(payload))}"
+
+    def decode(self, token: str) -> Optional[TokenClaims]:
+        """
+        Verify a token's signature and parse its claims.
+
+        Expiry is not checked here.
+
+        Args:
+            token: Signed token
+
+        Returns:
+            Token claims, or None if the token is malformed or forged
+        """
+        try:
+            payload_text, signature_text = token.split(".", 1)
+            payload = _b64decode(payload_text)
+            signature = _b64decode(signature_text)
+        except (ValueError, TypeError):
+            return None
+
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+
+        try:
+            phone, issued_ms, expires_at = payload.decode("utf-8").rsplit(":", 2)
+            return TokenClaims(
+                phone=phone,
+                issued_ms=int(issued_ms),
+                expires_at=int(expires_at),
+                signature=signature,
+            )
+        except ValueError:
+            return None
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of digests (no deletions).
+
+    Items must be at least 16 bytes of uniformly distributed data (MACs,
+    hashes); bit positions are derived from them by double hashing.
+    """
+
+    def __init__(self, capacity: int = 10000, error_rate: float = 0.001):
+        """
+        Initialize filter.
+
+        Args:
+            capacity: Expected number of items
+            error_rate: False positive rate at capacity
+        """
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: bytes):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, digest: bytes):
+        """Add an item."""
+        for pos in self._positions(digest):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        # Probe lazily: a non-member usually fails on the first bit or two
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        bits, size = self._bits, self.size
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    """
+    Revoked signed tokens and per-phone revocations.
+
+    - Single tokens: Bloom filter in front of an exact {signature: expiry} map.
+      Entries are dropped once the token would have expired anyway (the
+      filter is rebuilt from the remaining entries).
+    - Phones: {phone: revoked_ms}; every token issued up to then is revoked.
+
+    Revocations are exchanged between processes as (key, value) pairs:
+    ("token:<signature hex>", expires_at) and ("phone:<phone>", revoked_ms).
+    A revoked token's signature is no secret - the token is rejected anyway.
+    """
+
+    TOKEN_PREFIX = "token:"
+    PHONE_PREFIX = "phone:"
+
+    def __init__(self, capacity: int = 10000):
+        """
+        Initialize revocation list.
+
+        Args:
+            capacity: Expected number of revoked, unexpired tokens
+        """
+        self.capacity = capacity
+        self._filter = BloomFilter(capacity)
+        self._tokens: Dict[bytes, int] = {}
+        self._phones: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.forward: Optional[Callable[[str, int], None]] = None
+
+    def revoke_token(self, claims: TokenClaims):
+        """
+        Revoke one token.
+
+        Args:
+            claims: Verified claims of the token
+        """
+        with self._lock:
+            self._tokens[claims.signature] = claims.expires_at
+            self._filter.add(claims.signature)
+        if self.forward is not None:
+            self.forward(f"{self.TOKEN_PREFIX}{claims.signature.hex()}", claims.expires_at)
+
+    def revoke_phone(self, phone: str):
+        """
+        Revoke every token issued to a phone number so far.
+
+        Args:
+            phone: Phone number
+        """
+        revoked_ms = int(time.time() * 1000)
+        with self._lock:
+            self._phones[phone] = revoked_ms
+        if self.forward is not None:
+            self.forward(f"{self.PHONE_PREFIX}{phone}", revoked_ms)
+
+    def apply(self, key: str, value: int):
+        """
+        Add a revocation made by another process (not forwarded again).
+
+        Args:
+            key: "token:<signature hex>" or "phone:<phone>"
+            value: Token expiry (seconds) or phone revocation time (ms)
+        """
+        with self._lock:
+            if key.startswith(self.TOKEN_PREFIX):
+                signature = bytes.fromhex(key[len(self.TOKEN_PREFIX):])
+                self._tokens[signature] = value
+                self._filter.add(signature)
+            elif key.startswith(self.PHONE_PREFIX):
+                phone = key[len(self.PHONE_PREFIX):]
+                self._phones[phone] = max(value, self._phones.get(phone, 0))
+
+    def is_revoked(self, claims: TokenClaims) -> bool:
+        """
+        Check whether a token was revoked.
+
+        Args:
+            claims: Verified claims of the token
+
+        Returns:
+            True if revoked
+        """
+        if self._phones:
+            revoked_ms = self._phones.get(claims.phone)
+            if revoked_ms is not None and claims.issued_ms <= revoked_ms:
+                return True
+        signature = claims.signature
+        return signature in self._filter and signature in self._tokens
+
+    def purge_expired(self, max_token_age: int) -> int:
+        """
+        Drop revocations of tokens that have expired.
+
+        Args:
+            max_token_age: Token lifetime in seconds (phone revocations
+                           older than that cover no valid token)
+
+        Returns:
+            Number of entries removed
+        """
+        now = int(time.time())
+        with self._lock:
+            expired = [s for s, expires_at in self._tokens.items() if expires_at < now]
+            for signature in expired:
+                del self._tokens[signature]
+            if expired:
+                self._filter = BloomFilter(max(self.capacity, len(self._tokens)))
+                for signature in self._tokens:
+                    self._filter.add(signature)
+
+            cutoff_ms = (now - max_token_age) * 1000
+            stale = [p for p, revoked_ms in self._phones.items() if revoked_ms < cutoff_ms]
+            for phone in stale:
+                del self._phones[phone]
+
+        return len(expired) + len(stale)
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._phones)
@@ -0,0 +1,400 @@
+"""
+State Backend
+=============
+
+Storage for API state that must be shared by all worker processes:
+carts, agent command queues/results/status/keys, forwarded hardware
+commands and the cross-worker event log.
+
+The backend offers three primitives, all JSON values:
+- Namespaced key-value entries, with compare-and-set
+- Named FIFO queues (push one, pop all)
+- An append-only event log read by cursor
+
+Backends:
+- MemoryStateBackend: in-process dicts (single worker, the default)
+- SQLiteStateBackend: SQLite file shared by all workers (WORKERS > 1)
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from core import get_logger
+
+logger = get_logger(__name__)
+
+# (event id, origin worker, topic, key, data)
+LoggedEvent = Tuple[int, str, str, Optional[str], dict]
+
+
+def _encode(value: Any) -> str:
+    """Deterministic JSON encoding (compare-and-set compares encoded values)."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class StateBackend(ABC):
+    """Shared state primitives."""
+
+    # True if the state is visible to other processes
+    shared = False
+
+    # Key-value
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Get a value (None if missing)."""
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any):
+        """Store a value."""
+
+    @abstractmethod
+    def setdefault(self, namespace: str, key: str, value: Any) -> Any:
+        """Store a value unless the key exists; return the stored value."""
+
+    @abstractmethod
+    def compare_and_set(self, namespace: str, key: str, expected: Any, value: Any) -> bool:
+        """
+        Replace a value only if it still equals `expected`.
+
+        Returns:
+            True if replaced
+        """
+
+    @abstractmethod
+    def pop(self, namespace: str, key: str) -> Optional[Any]:
+        """Remove and return a value (None if missing)."""
+
+    @abstractmethod
+    def items(self, namespace: str) -> Dict[str, Any]:
+        """Get all entries of a namespace."""
+
+    # Queues
+
+    @abstractmethod
+    def push(self, queue: str, item: Any):
+        """Append an item to a queue."""
+
+    @abstractmethod
+    def pop_all(self, queue: str) -> List[Any]:
+        """Remove and return all items of a queue, oldest first."""
+
+    @abstractmethod
+    def queue_lengths(self, prefix: str = "") -> Dict[str, int]:
+        """Get the length of every non-empty queue whose name starts with `prefix`."""
+
+    # Event log
+
+    @abstractmethod
+    def append_event(self, origin: str, topic: str, key: Optional[str], data: dict) -> int:
+        """Append an event; return its id."""
+
+    @abstractmethod
+    def read_events(self, after_id: int, limit: int = 1000) -> List[LoggedEvent]:
+        """Get events with an id greater than `after_id`, oldest first."""
+
+    @abstractmethod
+    def last_event_id(self) -> int:
+        """Get the id of the newest event (0 if none)."""
+
+
+class MemoryStateBackend(StateBackend):
+    """In-process state (one worker)."""
+
+    def __init__(self, max_events: int = 10000):
+        """
+        Initialize backend.
+
+        Args:
+            max_events: Events kept in the log
+        """
+        self._values: Dict[Tuple[str, str], str] = {}
+        self._queues: Dict[str, List[Any]] = {}
+        self._events: Deque[LoggedEvent] = deque(maxlen=max_events)
+        self._last_event_id = 0
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        encoded = self._values.get((namespace, key))
+        return json.loads(encoded) if encoded is not None else None
+
+    def set(self, namespace: str, key: str, value: Any):
+        self._values[(namespace, key)] = _encode(value)
+
+    def setdefault(self, namespace: str, key: str, value: Any) -> Any:
+        with self._lock:
+            encoded = self._values.setdefault((namespace, key), _encode(value))
+        return json.loads(encoded)
+
+    def compare_and_set(self, namespace: str, key: str, expected: Any, value: Any) -> bool:
+        with self._lock:
+            if self._values.get((namespace, key)) != _encode(expected):
+                return False
+            self._values[(namespace, key)] = _encode(value)
+            return True
+
+    def pop(self, namespace: str, key: str) -> Optional[Any]:
+        encoded = self._values.pop((namespace, key), None)
+        return json.loads(encoded) if encoded is not None else None
+
+    def items(self, namespace: str) -> Dict[str, Any]:
+        return {
+            key: json.loads(encoded)
+            for (ns, key), encoded in list(self._values.items())
+            if ns == namespace
+        }
+
+    def push(self, queue: str, item: Any):
+        with self._lock:
+            self._queues.setdefault(queue, []).append(item)
+
+    def pop_all(self, queue: str) -> List[Any]:
+        with self._lock:
+            return self._queues.pop(queue, [])
+
+    def queue_lengths(self, prefix: str = "") -> Dict[str, int]:
+        with self._lock:
+            return {name: len(items) for name, items in self._queues.items() if name.startswith(prefix) and items}
+
+    def append_event(self, origin: str, topic: str, key: Optional[str], data: dict) -> int:
+        with self._lock:
+            self._last_event_id += 1
+            self._events.append((self._last_event_id, origin, topic, key, data))
+            return self._last_event_id
+
+    def read_events(self, after_id: int, limit: int = 1000) -> List[LoggedEvent]:
+        with self._lock:
+            return [event for event in self._events if event[0] > after_id][:limit]
+
+    def last_event_id(self) -> int:
+        return self._last_event_id
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    State in a SQLite file shared by all workers.
+
+    Every operation is one short transaction on its own connection (WAL
+    mode: readers never wait for the writer). The event log is trimmed to
+    the newest `max_events` events.
+    """
+
+    shared = True
+
+    # Appends between event log trims
+    TRIM_EVERY = 500
+
+    def __init__(self, db_path: str = "data/state.db", max_events: int = 10000):
+        """
+        Initialize backend.
+
+        Args:
+            db_path: Path to SQLite database file
+            max_events: Events kept in the log
+        """
+        self.db_path = db_path
+        self.max_events = max_events
+        self._appends = 0
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection (waits for other workers' writes)."""
+        return sqlite3.connect(self.db_path, timeout=5.0)
+
+    def _init_database(self):
+        """Create the key-value, queue and event tables."""
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS state_values (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS state_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    item TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_state_queue_name ON state_queue(name, id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS state_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    origin TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    key TEXT,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+        logger.info(f"Shared state backend: {self.db_path}")
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT value FROM state_values WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO state_values (namespace, key, value) VALUES (?, ?, ?)",
+                    (namespace, key, _encode(value)),
+                )
+        finally:
+            conn.close()
+
+    def setdefault(self, namespace: str, key: str, value: Any) -> Any:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO state_values (namespace, key, value) VALUES (?, ?, ?)",
+                    (namespace, key, _encode(value)),
+                )
+                row = conn.execute(
+                    "SELECT value FROM state_values WHERE namespace = ? AND key = ?", (namespace, key)
+                ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0])
+
+    def compare_and_set(self, namespace: str, key: str, expected: Any, value: Any) -> bool:
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE state_values SET value = ? WHERE namespace = ? AND key = ? AND value = ?",
+                    (_encode(value), namespace, key, _encode(expected)),
+                )
+        finally:
+            conn.close()
+        return cursor.rowcount == 1
+
+    def pop(self, namespace: str, key: str) -> Optional[Any]:
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT value FROM state_values WHERE namespace = ? AND key = ?", (namespace, key)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute("DELETE FROM state_values WHERE namespace = ? AND key = ?", (namespace, key))
+        finally:
+            conn.close()
+        return json.loads(row[0])
+
+    def items(self, namespace: str) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT key, value FROM state_values WHERE namespace = ?", (namespace,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {key: json.loads(value) for key, value in rows}
+
+    def push(self, queue: str, item: Any):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT INTO state_queue (name, item) VALUES (?, ?)", (queue, _encode(item)))
+        finally:
+            conn.close()
+
+    def pop_all(self, queue: str) -> List[Any]:
+        conn = self._connect()
+        try:
+            with conn:
+                rows = conn.execute(
+                    "SELECT id, item FROM state_queue WHERE name = ? ORDER BY id", (queue,)
+                ).fetchall()
+                if rows:
+                    conn.execute("DELETE FROM state_queue WHERE name = ? AND id <= ?", (queue, rows[-1][0]))
+        finally:
+            conn.close()
+        return [json.loads(item) for _, item in rows]
+
+    def queue_lengths(self, prefix: str = "") -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT name, COUNT(*) FROM state_queue WHERE substr(name, 1, ?) = ? GROUP BY name",
+                (len(prefix), prefix),
+            ).fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def append_event(self, origin: str, topic: str, key: Optional[str], data: dict) -> int:
+        self._appends += 1
+        conn = self._connect()
+        try:
+            with conn:
+                event_id = conn.execute(
+                    "INSERT INTO state_events (origin, topic, key, data) VALUES (?, ?, ?, ?)",
+                    (origin, topic, key, _encode(data)),
+                ).lastrowid
+                if self._appends % self.TRIM_EVERY == 0:
+                    conn.execute("DELETE FROM state_events WHERE id <= ?", (event_id - self.max_events,))
+        finally:
+            conn.close()
+        return event_id
+
+    def read_events(self, after_id: int, limit: int = 1000) -> List[LoggedEvent]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, origin, topic, key, data FROM state_events WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(row[0], row[1], row[2], row[3], json.loads(row[4])) for row in rows]
+
+    def last_event_id(self) -> int:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT MAX(id) FROM state_events").fetchone()
+        finally:
+            conn.close()
+        return row[0] or 0
+
+
+def create_state_backend(db_path: str = "") -> StateBackend:
+    """
+    Create the state backend selected by settings.
+
+    Args:
+        db_path: SQLite file shared by all workers ("" keeps state in-process)
+
+    Returns:
+        State backend instance
+    """
+    if db_path:
+        return SQLiteStateBackend(db_path)
+    return MemoryStateBackend()
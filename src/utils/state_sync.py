@@ -0,0 +1,238 @@
+"""
+Worker State Sync
+=================
+
+Keeps the carts and the event bus of one worker process in step with the
+other workers through a shared StateBackend.
+
+- Outgoing: every event published locally is queued and the sync thread
+  appends it to the backend's event log; cart events also store the
+  cart's latest state (publishing never writes the backend on the event
+  loop)
+- Incoming: a thread reads events of other workers from the log, applies
+  cart events to the local carts and republishes everything on the local
+  bus (so SSE streams and long-polls see changes made by any worker)
+- Cart assignment is claimed with compare-and-set, so two workers never
+  hand out the same cart
+- Signed-token revocations are stored in the backend (loaded by workers
+  that start later) and applied by every worker; they are never
+  republished on the local bus (SSE clients must not see them)
+
+With an in-process backend (one worker) nothing is shared and claims
+always succeed.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+from core import get_logger
+from models import Cart
+from utils.events import Event, EventBus, TOPIC_CART
+from utils.signed_tokens import RevocationList
+from utils.state_backend import StateBackend
+
+logger = get_logger(__name__)
+
+CARTS_NAMESPACE = "carts"
+REVOCATIONS_NAMESPACE = "revocations"
+
+# Event log topic of token revocations (not an event bus topic)
+TOPIC_REVOCATION = "revocation"
+
+
+class StateSync:
+    """Replicates carts and events between worker processes."""
+
+    def __init__(
+        self,
+        backend: StateBackend,
+        event_bus: EventBus,
+        default_carts: Dict[int, Cart],
+        poll_interval: float = 0.1,
+    ):
+        """
+        Initialize sync and load the carts.
+
+        Args:
+            backend: Shared state backend
+            event_bus: This worker's event bus
+            default_carts: Carts to create if the backend has none yet
+            poll_interval: Seconds between reads of the shared event log
+        """
+        self.backend = backend
+        self.event_bus = event_bus
+        self.poll_interval = poll_interval
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self.relayed = 0
+        self._cursor = 0
+        self._outbox: "queue.SimpleQueue[Event]" = queue.SimpleQueue()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.revocations: Optional[RevocationList] = None
+
+        # The first worker stores the defaults; the others load its carts
+        self.carts: Dict[int, Cart] = {
+            cart_id: Cart.model_validate(
+                backend.setdefault(CARTS_NAMESPACE, str(cart_id), cart.model_dump(mode="json"))
+            )
+            for cart_id, cart in default_carts.items()
+        }
+
+        if backend.shared:
+            event_bus.forward = self._forward
+
+    def _forward(self, event: Event):
+        """Queue a locally published event for sharing (bus forward hook)."""
+        self._outbox.put(event)
+        self._wake.set()
+
+    def share_revocations(self, revocations: RevocationList):
+        """
+        Share a token revocation list with the other workers (shared backend only).
+
+        Args:
+            revocations: This worker's revocation list
+        """
+        if not self.backend.shared:
+            return
+        self.revocations = revocations
+        revocations.forward = self._forward_revocation
+        self._load_revocations()
+
+    def _load_revocations(self):
+        """Apply the stored revocations (dropping those of expired tokens)."""
+        now = time.time()
+        for key, value in self.backend.items(REVOCATIONS_NAMESPACE).items():
+            if key.startswith(RevocationList.TOKEN_PREFIX) and value < now:
+                self.backend.pop(REVOCATIONS_NAMESPACE, key)
+            else:
+                self.revocations.apply(key, value)
+
+    def _forward_revocation(self, key: str, value: int):
+        """Queue a local revocation for sharing (revocation list forward hook)."""
+        self._forward(Event(topic=TOPIC_REVOCATION, data={"value": value}, key=key))
+
+    def flush(self) -> int:
+        """
+        Write the queued local events to the backend, in publish order.
+
+        Returns:
+            Number of events written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                try:
+                    event = self._outbox.get_nowait()
+                except queue.Empty:
+                    return written
+                try:
+                    if event.topic == TOPIC_CART:
+                        self.backend.set(CARTS_NAMESPACE, event.key, event.data)
+                    elif event.topic == TOPIC_REVOCATION:
+                        self.backend.set(REVOCATIONS_NAMESPACE, event.key, event.data["value"])
+                    self.backend.append_event(self.origin, event.topic, event.key, event.data)
+                    written += 1
+                except Exception as e:
+                    logger.error(f"Failed to share {event.topic} event: {e}")
+
+    def claim_cart(self, cart: Cart, before: dict) -> bool:
+        """
+        Store a cart assignment unless another worker changed the cart first.
+
+        Args:
+            cart: Cart after the local change
+            before: The cart's state (model_dump(mode="json")) before the change
+
+        Returns:
+            True if claimed; False if the cart was taken (the local copy
+            is then replaced with the shared state, or with `before` if
+            the shared cart is gone)
+
+        Raises:
+            Exception: Backend errors (the local copy is restored to `before`)
+        """
+        if not self.backend.shared:
+            return True
+
+        key = str(cart.cart_id)
+        try:
+            # The shared cart must include this worker's own queued changes
+            self.flush()
+            if self.backend.compare_and_set(CARTS_NAMESPACE, key, before, cart.model_dump(mode="json")):
+                return True
+            current = self.backend.get(CARTS_NAMESPACE, key)
+        except Exception:
+            self.carts[cart.cart_id] = Cart.model_validate(before)
+            raise
+
+        self.carts[cart.cart_id] = Cart.model_validate(current if current is not None else before)
+        logger.info(f"Cart {cart.cart_id} was taken by another worker")
+        return False
+
+    def start(self):
+        """Start relaying other workers' events (shared backend only)."""
+        if not self.backend.shared or self._thread is not None:
+            return
+        self._cursor = self.backend.last_event_id()
+        if self.revocations is not None:
+            # Stored before the cursor was taken, so not relayed
+            self._load_revocations()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="state-sync", daemon=True)
+        self._thread.start()
+        logger.info(f"State sync started (worker {self.origin})")
+
+    def stop(self):
+        """Stop relaying and write the events still queued."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self.backend.shared:
+            self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Woken early by a local publish; otherwise poll every interval
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                self.poll()
+            except Exception as e:
+                logger.error(f"State sync failed: {e}")
+
+    def poll(self) -> int:
+        """
+        Apply and republish events of other workers since the last poll.
+
+        Returns:
+            Number of events relayed
+        """
+        relayed = 0
+        for event_id, origin, topic, key, data in self.backend.read_events(self._cursor):
+            self._cursor = event_id
+            if origin == self.origin:
+                continue
+            if topic == TOPIC_REVOCATION:
+                if self.revocations is not None:
+                    self.revocations.apply(key, data["value"])
+            else:
+                if topic == TOPIC_CART:
+                    cart = Cart.model_validate(data)
+                    self.carts[cart.cart_id] = cart
+                self.event_bus.publish(topic, data, key=key, relayed=True)
+            relayed += 1
+        self.relayed += relayed
+        return relayed
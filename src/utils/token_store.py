@@ -0,0 +1,365 @@
+"""
+Auth Token Stores
+=================
+
+Storage backends for authentication tokens.
+
+- MemoryTokenStore: in-process dicts (tokens are lost on restart)
+- SQLiteTokenStore: SQLite file shared by all workers and kept across
+  restarts, with an in-memory read-through LRU cache so validating a
+  known token does not touch the disk
+
+Both index tokens by expiry, so cleanup only touches expired tokens.
+
+Author: CartWise Team
+Version: 1.0.0
+"""
+
+import heapq
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class TokenRecord:
+    """Stored authentication token."""
+
+    token: str
+    phone: str
+    created_at: datetime
+    expires_at: datetime
+
+
+class TokenStore(ABC):
+    """
+    Storage backend of the auth token manager.
+
+    A phone number has at most one token; storing a new token for a phone
+    replaces the previous one.
+    """
+
+    @abstractmethod
+    def put(self, record: TokenRecord):
+        """
+        Store a token (replacing the phone's previous token).
+
+        Args:
+            record: Token record
+        """
+
+    @abstractmethod
+    def get(self, token: str) -> Optional[TokenRecord]:
+        """
+        Get a token record (expired tokens included).
+
+        Args:
+            token: Authentication token
+
+        Returns:
+            Token record or None if not found
+        """
+
+    @abstractmethod
+    def get_by_phone(self, phone: str) -> Optional[TokenRecord]:
+        """
+        Get the token record of a phone number.
+
+        Args:
+            phone: Phone number
+
+        Returns:
+            Token record or None if not found
+        """
+
+    @abstractmethod
+    def delete(self, token: str) -> bool:
+        """
+        Delete a token.
+
+        Args:
+            token: Authentication token
+
+        Returns:
+            True if a token was deleted
+        """
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """
+        Remove expired tokens.
+
+        Returns:
+            Number of tokens removed
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Get the number of stored tokens."""
+
+
+class MemoryTokenStore(TokenStore):
+    """
+    In-process token store.
+
+    Expiry is tracked in a min-heap; items of replaced or deleted tokens
+    are skipped when popped.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, TokenRecord] = {}
+        self._phone_to_token: Dict[str, str] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def put(self, record: TokenRecord):
+        with self._lock:
+            old_token = self._phone_to_token.get(record.phone)
+            if old_token is not None:
+                self._tokens.pop(old_token, None)
+            self._tokens[record.token] = record
+            self._phone_to_token[record.phone] = record.token
+            heapq.heappush(self._expiry, (record.expires_at.timestamp(), record.token))
+
+    def get(self, token: str) -> Optional[TokenRecord]:
+        return self._tokens.get(token)
+
+    def get_by_phone(self, phone: str) -> Optional[TokenRecord]:
+        token = self._phone_to_token.get(phone)
+        return self._tokens.get(token) if token is not None else None
+
+    def delete(self, token: str) -> bool:
+        with self._lock:
+            return self._remove(token)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < now:
+                _, token = heapq.heappop(self._expiry)
+                if self._remove(token):
+                    removed += 1
+        return removed
+
+    def count(self) -> int:
+        return len(self._tokens)
+
+    def _remove(self, token: str) -> bool:
+        """Remove a token and its phone mapping (lock held)."""
+        record = self._tokens.pop(token, None)
+        if record is None:
+            return False
+        if self._phone_to_token.get(record.phone) == token:
+            del self._phone_to_token[record.phone]
+        return True
+
+
+class SQLiteTokenStore(TokenStore):
+    """
+    Token store in a SQLite file shared by all workers.
+
+    Lookups by token go through an LRU cache. Cached tokens are trusted for
+    `cache_ttl` seconds, so a token revoked by another worker stops working
+    there within that time (immediately on the worker that revoked it).
+    """
+
+    # Minimum seconds between purges of one process
+    PURGE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        db_path: str = "data/auth_tokens.db",
+        cache_size: int = 10000,
+        cache_ttl: float = 30.0,
+    ):
+        """
+        Initialize store.
+
+        Args:
+            db_path: Path to SQLite database file
+            cache_size: Maximum number of cached tokens
+            cache_ttl: Seconds a cached token is trusted without a database read
+        """
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: "OrderedDict[str, Tuple[float, TokenRecord]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._last_purge = 0.0
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection (waits for other workers' writes)."""
+        return sqlite3.connect(self.db_path, timeout=5.0)
+
+    def _init_database(self):
+        """Create the token table and its phone/expiry indexes."""
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS auth_tokens (
+                    token TEXT PRIMARY KEY,
+                    phone TEXT NOT NULL UNIQUE,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_auth_tokens_expires ON auth_tokens(expires_at)")
+            conn.commit()
+        finally:
+            conn.close()
+
+        logger.info(f"Auth token store: {self.db_path}")
+
+    @staticmethod
+    def _row_to_record(row) -> TokenRecord:
+        """Convert a (token, phone, created_at, expires_at) row to a record."""
+        return TokenRecord(
+            token=row[0],
+            phone=row[1],
+            created_at=datetime.fromtimestamp(row[2]),
+            expires_at=datetime.fromtimestamp(row[3]),
+        )
+
+    def _cache_put(self, record: TokenRecord):
+        with self._cache_lock:
+            self._cache[record.token] = (time.monotonic(), record)
+            self._cache.move_to_end(record.token)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_drop(self, token: str):
+        with self._cache_lock:
+            self._cache.pop(token, None)
+
+    def put(self, record: TokenRecord):
+        conn = self._connect()
+        try:
+            with conn:
+                old = conn.execute(
+                    "SELECT token FROM auth_tokens WHERE phone = ?", (record.phone,)
+                ).fetchone()
+                conn.execute("DELETE FROM auth_tokens WHERE phone = ?", (record.phone,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO auth_tokens (token, phone, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (record.token, record.phone, record.created_at.timestamp(), record.expires_at.timestamp()),
+                )
+        finally:
+            conn.close()
+
+        if old is not None:
+            self._cache_drop(old[0])
+        self._cache_put(record)
+
+    def get(self, token: str) -> Optional[TokenRecord]:
+        with self._cache_lock:
+            cached = self._cache.get(token)
+            if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+                self._cache.move_to_end(token)
+                self.cache_hits += 1
+                return cached[1]
+        self.cache_misses += 1
+
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT token, phone, created_at, expires_at FROM auth_tokens WHERE token = ?",
+                (token,),
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            self._cache_drop(token)
+            return None
+
+        record = self._row_to_record(row)
+        self._cache_put(record)
+        return record
+
+    def get_by_phone(self, phone: str) -> Optional[TokenRecord]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT token, phone, created_at, expires_at FROM auth_tokens WHERE phone = ?",
+                (phone,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return self._row_to_record(row) if row else None
+
+    def delete(self, token: str) -> bool:
+        self._cache_drop(token)
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute("DELETE FROM auth_tokens WHERE token = ?", (token,))
+        finally:
+            conn.close()
+        return cursor.rowcount > 0
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        if now - self._last_purge < self.PURGE_INTERVAL:
+            return 0
+        self._last_purge = now
+
+        conn = self._connect()
+        try:
+            with conn:
+                removed = conn.execute(
+                    "DELETE FROM auth_tokens WHERE expires_at < ?", (now,)
+                ).rowcount
+        finally:
+            conn.close()
+
+        if removed:
+            with self._cache_lock:
+                expired = [t for t, (_, r) in self._cache.items() if r.expires_at.timestamp() < now]
+                for token in expired:
+                    del self._cache[token]
+        return removed
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM auth_tokens").fetchone()[0]
+        finally:
+            conn.close()
+
+
+def create_token_store(
+    db_path: str = "",
+    cache_size: int = 10000,
+    cache_ttl: float = 30.0,
+) -> TokenStore:
+    """
+    Create the token store selected by settings.
+
+    Args:
+        db_path: SQLite file shared by all workers ("" keeps tokens in-process)
+        cache_size: Maximum number of cached tokens (SQLite store)
+        cache_ttl: Seconds a cached token is trusted (SQLite store)
+
+    Returns:
+        Token store instance
+    """
+    if db_path:
+        return SQLiteTokenStore(db_path, cache_size=cache_size, cache_ttl=cache_ttl)
+    return MemoryTokenStore()